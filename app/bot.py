@@ -3,25 +3,44 @@
 import logging
 import asyncio
 import os
+import signal
 
+from sqlalchemy.engine import Engine
+from telegram import Bot
 from telegram.ext import (
     ApplicationBuilder,
     CallbackQueryHandler,
     CommandHandler,
     Defaults,
 )
-from telegram.error import RetryAfter
 
 from app.config import config
-from app.db.models import init_db
+from app.db.schema import ensure_schema
 from app.handlers import (
     callback_handler,
     help_handler,
+    live_handler,
+    month_handler,
+    pause_handler,
     pomodoro_handler,
+    resume_handler,
     start_handler,
+    status_handler,
+    team_handler,
+    team_stop_handler,
     today_handler,
+    week_handler,
+)
+from app.services.metrics import (
+    STARTUP_SECONDS,
+    InstrumentedRequest,
+    MetricsExporter,
+    instrument_engine,
+    instrument_handler,
+    registry,
 )
 from app.services.timer import timer_service
+from app.startup import startup
 
 # Configure logging
 logging.basicConfig(
@@ -30,6 +49,25 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Update types the handlers use
+ALLOWED_UPDATES = ["message", "callback_query"]
+
+
+def finish_startup():
+    """Log the startup breakdown and export it as metrics."""
+    startup.finish()
+    for phase, seconds in startup.phases.items():
+        STARTUP_SECONDS.labels(phase).set(seconds)
+    STARTUP_SECONDS.labels("total").set(startup.total)
+
+
+def start_metrics() -> MetricsExporter:
+    """Serve metrics next to the webhook port, if enabled."""
+    exporter = MetricsExporter(interval=config.METRICS_LOOP_LAG_INTERVAL)
+    if config.METRICS_PORT:
+        exporter.start("0.0.0.0", config.METRICS_PORT)
+    return exporter
+
 
 async def create_application():
     """Create and configure the bot application.
@@ -37,9 +75,6 @@ async def create_application():
     Returns:
         Application: Configured application instance
     """
-    # Initialize database
-    init_db()
-    
     # Configure default behavior
     defaults = Defaults(
         parse_mode=None,
@@ -48,57 +83,182 @@ async def create_application():
     )
 
     # Create application
-    application = (
-        ApplicationBuilder().token(config.TELEGRAM_TOKEN).defaults(defaults).build()
+    builder = (
+        ApplicationBuilder()
+        .token(config.TELEGRAM_TOKEN)
+        .base_url(config.TELEGRAM_API_URL)
+        .defaults(defaults)
+        # Records latency, errors and 429s of every Bot API call
+        .request(InstrumentedRequest(connection_pool_size=256))
     )
+    persistence = None
+    if config.PERSISTENCE:
+        from app.services.persistence import DatabasePersistence
+
+        # user_data (the last session of next_round_yes) survives restarts
+        persistence = DatabasePersistence(
+            update_interval=config.PERSISTENCE_UPDATE_SECONDS,
+            refresh_always=config.PERSISTENCE_REFRESH_ALWAYS,
+        )
+        builder = builder.persistence(persistence)
+        registry.add_collector("pomodoro_persistence", lambda: persistence.metrics)
+    if config.CONCURRENT_UPDATES:
+        from app.services.update_processor import PerUserUpdateProcessor
+
+        # Users run in parallel, each user's updates stay in order
+        builder = builder.concurrent_updates(
+            PerUserUpdateProcessor(config.CONCURRENT_UPDATES)
+        )
+    application = builder.build()
 
     # Register handlers
-    application.add_handler(CommandHandler("start", start_handler))
-    application.add_handler(CommandHandler("help", help_handler))
-    application.add_handler(CommandHandler("pomodoro", pomodoro_handler))
-    application.add_handler(CommandHandler("today", today_handler))
-    application.add_handler(CallbackQueryHandler(callback_handler))
-
-    # Start the scheduler
-    timer_service.start_scheduler()
-    
-    # Initialize the application
-    await application.initialize()
-    
+    commands = {
+        "start": start_handler,
+        "help": help_handler,
+        "pomodoro": pomodoro_handler,
+        "pause": pause_handler,
+        "resume": resume_handler,
+        "status": status_handler,
+        "live": live_handler,
+        "team": team_handler,
+        "team_stop": team_stop_handler,
+        "today": today_handler,
+        "week": week_handler,
+        "month": month_handler,
+    }
+    for command, handler in commands.items():
+        application.add_handler(
+            CommandHandler(command, instrument_handler(f"/{command}", handler))
+        )
+    application.add_handler(
+        CallbackQueryHandler(instrument_handler("callback", callback_handler))
+    )
+
+    # Time the statements of every engine, the lazily created ones included
+    instrument_engine(Engine)
+
+    async def migrate():
+        with startup.phase("schema"):
+            await ensure_schema()
+
+    async def introduce():
+        with startup.phase("get_me"):
+            await application.bot.initialize()
+
+    # Check the schema while the bot introduces itself to the Bot API; the
+    # persistence reads the database only after that
+    await asyncio.gather(migrate(), introduce())
+    with startup.phase("initialize"):
+        await application.initialize()
+
+    # Start the scheduler; timers that survived a restart are re-armed in the
+    # background, and past-due ones fire as soon as they are loaded
+    timer_service.start_scheduler(application.bot)
+    timer_service.start_restore()
+
     # Log successful setup
     logger.info("Bot initialized successfully")
 
     return application
 
 
+async def wait_for_stop_signal():
+    """Wait until the process receives SIGINT or SIGTERM."""
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stop.set)
+    await stop.wait()
+    logger.info("Stop signal received, draining")
+
+
+async def drain(application, ingestor=None):
+    """Hand the bot over to the next replica without losing work.
+
+    1. Stop accepting updates. Telegram keeps undelivered ones for the next
+       replica: polling commits only the offsets of fetched updates and the
+       webhook is left registered.
+    2. Finish the updates already received, including timers they start.
+    3. Stop firing timers, flush buffered writes and queued messages. The
+       deadlines are already in pending_timers, where the next replica
+       claims them and fires each at its original time.
+
+    Args:
+        application: Running application
+        ingestor: UpdateIngestor receiving the webhook updates, if any
+    """
+    try:
+        if ingestor is not None:
+            await ingestor.stop()
+        elif application.updater.running:
+            await application.updater.stop()
+        if application.running:
+            await application.stop()
+        await timer_service.shutdown()
+        await application.shutdown()
+    except Exception as e:
+        logger.error(f"Error during shutdown: {e}", exc_info=True)
+
+
 async def run_polling():
     """Run the bot with polling (for development)."""
-    application = await create_application()
-    
+    with startup.phase("application"):
+        application = await create_application()
+    metrics = start_metrics()
+
     # Start receiving updates
     await application.start()
-    
+
     try:
-        # First, delete any existing webhook
-        await application.bot.delete_webhook()
-        
-        # Keep the program running until it's interrupted
-        await application.updater.start_polling(
-            drop_pending_updates=True,
-            allowed_updates=["message", "callback_query"],
-        )
-        await asyncio.Event().wait()  # Wait forever
+        # Keep the program running until it's interrupted; start_polling
+        # deletes the webhook itself
+        with startup.phase("updates"):
+            await application.updater.start_polling(
+                # Updates sent during a restart are handled, not skipped
+                drop_pending_updates=False,
+                allowed_updates=ALLOWED_UPDATES,
+            )
+        finish_startup()
+        await wait_for_stop_signal()
     except KeyboardInterrupt:
         logger.info("Stopping bot due to keyboard interrupt")
     except Exception as e:
         logger.error(f"Error in polling: {e}", exc_info=True)
     finally:
         # Properly close the application
-        try:
-            await application.stop()
-            await application.shutdown()
-        except Exception as e:
-            logger.error(f"Error during shutdown: {e}")
+        await drain(application)
+        await metrics.stop()
+
+
+async def ensure_webhook(bot: Bot, webhook_url: str) -> bool:
+    """Point the webhook at this bot unless it already is.
+
+    Re-setting an unchanged webhook costs two Bot API calls per boot and,
+    with drop_pending_updates, loses the updates queued during a restart.
+
+    Args:
+        bot: Bot whose webhook is set
+        webhook_url: Public URL of the webhook endpoint
+
+    Returns:
+        bool: True if the webhook was set
+    """
+    info = await bot.get_webhook_info()
+    if (
+        info.url == webhook_url
+        and not info.last_error_message
+        and sorted(info.allowed_updates or []) == sorted(ALLOWED_UPDATES)
+    ):
+        logger.info(f"Webhook already set to: {webhook_url}")
+        return False
+
+    await bot.set_webhook(
+        url=webhook_url,
+        allowed_updates=ALLOWED_UPDATES,
+        secret_token=config.WEBHOOK_SECRET_TOKEN,
+    )
+    logger.info(f"Webhook set to: {webhook_url}")
+    return True
 
 
 async def run_webhook():
@@ -110,46 +270,51 @@ async def run_webhook():
 
     webhook_url = config.WEBHOOK_URL
     logger.info(f"Using webhook URL: {webhook_url}")
-        
-    application = await create_application()
-    
+
+    with startup.phase("application"):
+        application = await create_application()
+    metrics = start_metrics()
+    ingestor = None
+
     try:
         # Start receiving updates
         await application.start()
-        
-        # Удаляем существующий webhook
-        await application.bot.delete_webhook()
-        await asyncio.sleep(1)  # Небольшая задержка
-        
-        # Устанавливаем новый webhook
-        await application.bot.set_webhook(url=webhook_url)
-        logger.info(f"Webhook set to: {webhook_url}")
-        
-        # Запускаем webhook сервер
-        await application.updater.start_webhook(
-            listen="0.0.0.0",
-            port=config.WEBHOOK_PORT,
-            url_path="webhook",
-            drop_pending_updates=True,
-        )
-        
-        # Проверяем, что webhook установлен
-        webhook_info = await application.bot.get_webhook_info()
-        logger.info(f"Webhook info: {webhook_info.url}")
-        
-        # Ждем бесконечно
-        await asyncio.Event().wait()
+
+        with startup.phase("webhook"):
+            if config.WEBHOOK_INGESTION == "queue":
+                # Свой сервер: проверка секрета, ответ сразу, очереди по чатам
+                from app.services.ingestion import UpdateIngestor
+
+                ingestor = UpdateIngestor(
+                    application,
+                    consumers=config.WEBHOOK_CONSUMERS,
+                    queue_size=config.WEBHOOK_QUEUE_SIZE,
+                    enqueue_timeout=config.WEBHOOK_ENQUEUE_TIMEOUT,
+                    secret_token=config.WEBHOOK_SECRET_TOKEN,
+                )
+                ingestor.start("0.0.0.0", config.WEBHOOK_PORT, url_path="webhook")
+                registry.add_collector("pomodoro_ingestion", lambda: ingestor.metrics)
+                await ensure_webhook(application.bot, webhook_url)
+            else:
+                # Запускаем webhook сервер; start_webhook всегда вызывает
+                # setWebhook, поэтому без drop_pending_updates
+                await application.updater.start_webhook(
+                    listen="0.0.0.0",
+                    port=config.WEBHOOK_PORT,
+                    url_path="webhook",
+                    webhook_url=webhook_url,
+                    allowed_updates=ALLOWED_UPDATES,
+                    secret_token=config.WEBHOOK_SECRET_TOKEN,
+                )
+                logger.info(f"Webhook set to: {webhook_url}")
+        finish_startup()
+
+        # Ждем сигнала остановки (SIGTERM при деплое)
+        await wait_for_stop_signal()
     except Exception as e:
         logger.error(f"Error in webhook mode: {e}", exc_info=True)
     finally:
-        try:
-            # Удаляем webhook перед выключением
-            await application.bot.delete_webhook()
-            # Останавливаем updater
-            await application.updater.stop()
-            # Останавливаем приложение
-            await application.stop()
-            # Завершаем приложение
-            await application.shutdown()
-        except Exception as e:
-            logger.error(f"Error during shutdown: {e}") 
\ No newline at end of file
+        # Webhook остаётся: Telegram копит обновления до следующего старта
+        await drain(application, ingestor)
+        # Останавливаем метрики
+        await metrics.stop()
@@ -1,6 +1,7 @@
 """Configuration module for the Pomodoro bot."""
 
 import os
+import socket
 from pathlib import Path
 from typing import Optional
 
@@ -20,8 +21,26 @@ class Config:
     if not TELEGRAM_TOKEN:
         raise ValueError("TELEGRAM_TOKEN environment variable is not set")
 
+    # Bot API endpoint, e.g. a local Bot API server or a load-test fake
+    TELEGRAM_API_URL: str = os.getenv(
+        "TELEGRAM_API_URL", "https://api.telegram.org/bot"
+    )
+
     # Database
     DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite:///pomodoro.sqlite3")
+    # Upserts and streak queries are written for SQLite and Postgres only
+    DATABASE_DIALECT: str = DATABASE_URL.split(":", 1)[0].split("+", 1)[0]
+    if DATABASE_DIALECT not in ("sqlite", "postgres", "postgresql"):
+        raise ValueError(
+            f"DATABASE_URL must be a SQLite or Postgres URL, not {DATABASE_DIALECT}"
+        )
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "10"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+    DB_POOL_PRE_PING: bool = os.getenv("DB_POOL_PRE_PING", "True").lower() in (
+        "true",
+        "1",
+        "t",
+    )
 
     # Webhook settings (for production)
     WEBHOOK_URL: Optional[str] = os.getenv("WEBHOOK_URL")
@@ -31,13 +50,92 @@ class Config:
     # Construct webhook URL from Railway domain if needed
     if not WEBHOOK_URL and RAILWAY_STATIC_URL:
         WEBHOOK_URL = f"https://{RAILWAY_STATIC_URL}/webhook"
+    # Sent by Telegram in X-Telegram-Bot-Api-Secret-Token with every update
+    WEBHOOK_SECRET_TOKEN: Optional[str] = os.getenv("WEBHOOK_SECRET_TOKEN")
+    # "builtin" uses python-telegram-bot's webhook server, "queue" the
+    # bounded per-chat queues of app.services.ingestion
+    WEBHOOK_INGESTION: str = os.getenv("WEBHOOK_INGESTION", "builtin")
+    WEBHOOK_CONSUMERS: int = int(os.getenv("WEBHOOK_CONSUMERS", "8"))
+    WEBHOOK_QUEUE_SIZE: int = int(os.getenv("WEBHOOK_QUEUE_SIZE", "1000"))
+    WEBHOOK_ENQUEUE_TIMEOUT: float = float(os.getenv("WEBHOOK_ENQUEUE_TIMEOUT", "1.0"))
+    # The queue server is reachable by anyone who finds the URL, so it only
+    # runs with a secret
+    if WEBHOOK_URL and WEBHOOK_INGESTION == "queue" and not WEBHOOK_SECRET_TOKEN:
+        raise ValueError("WEBHOOK_SECRET_TOKEN must be set for queue ingestion")
+
+    # Updates processed concurrently, one at a time per user (0 = sequential)
+    CONCURRENT_UPDATES: int = int(os.getenv("CONCURRENT_UPDATES", "0"))
+
+    # Prometheus metrics endpoint (0 disables it) and loop lag sampling
+    METRICS_PORT: int = int(os.getenv("METRICS_PORT", "9090"))
+    METRICS_LOOP_LAG_INTERVAL: float = float(
+        os.getenv("METRICS_LOOP_LAG_INTERVAL", "0.5")
+    )
 
     # Default Pomodoro settings
     DEFAULT_WORK_MINUTES: int = 25
     DEFAULT_BREAK_MINUTES: int = 5
+    # Length of a timer "minute"; lowered by load tests to compress time
+    TIMER_SECONDS_PER_MINUTE: float = float(os.getenv("TIMER_SECONDS_PER_MINUTE", "60"))
+
+    # Maximum number of expired timers handled in one batch
+    TIMER_BATCH_SIZE: int = int(os.getenv("TIMER_BATCH_SIZE", "500"))
+    # Timers due this close after the earliest one fire in the same wake-up
+    TIMER_COALESCE_MS: int = int(os.getenv("TIMER_COALESCE_MS", "250"))
+    # Longest timer sleep before deadlines are checked against the wall clock
+    TIMER_MAX_SLEEP_SECONDS: float = float(os.getenv("TIMER_MAX_SLEEP_SECONDS", "1"))
+
+    # Live countdown messages: total edits per second across all users and
+    # how often the countdowns are checked
+    LIVE_EDITS_PER_SECOND: float = float(os.getenv("LIVE_EDITS_PER_SECOND", "5"))
+    LIVE_TICK_SECONDS: float = float(os.getenv("LIVE_TICK_SECONDS", "1"))
+
+    # Closing of sessions left open past the user's local midnight
+    SESSION_SWEEP_MINUTES: int = int(os.getenv("SESSION_SWEEP_MINUTES", "15"))
+    SESSION_SWEEP_BATCH_SIZE: int = int(os.getenv("SESSION_SWEEP_BATCH_SIZE", "500"))
+
+    # In-process caches for user and session lookups
+    CACHE_MAX_SIZE: int = int(os.getenv("CACHE_MAX_SIZE", "10000"))
+    CACHE_TTL_SECONDS: float = float(os.getenv("CACHE_TTL_SECONDS", "300"))
+
+    # Outbound Telegram rate limits
+    TELEGRAM_RATE_LIMIT: float = float(os.getenv("TELEGRAM_RATE_LIMIT", "30"))
+    TELEGRAM_CHAT_INTERVAL: float = float(os.getenv("TELEGRAM_CHAT_INTERVAL", "1.0"))
+    TELEGRAM_MAX_IN_FLIGHT: int = int(os.getenv("TELEGRAM_MAX_IN_FLIGHT", "30"))
+
+    # Write-behind batching of completion updates
+    WRITE_BEHIND_FLUSH_MS: int = int(os.getenv("WRITE_BEHIND_FLUSH_MS", "500"))
+    WRITE_BEHIND_MAX_EVENTS: int = int(os.getenv("WRITE_BEHIND_MAX_EVENTS", "1000"))
+
+    # Timer sharding between worker processes (0 disables sharding)
+    SHARD_COUNT: int = int(os.getenv("SHARD_COUNT", "0"))
+    WORKER_ID: str = os.getenv("WORKER_ID") or f"{socket.gethostname()}-{os.getpid()}"
+    SHARD_LEASE_SECONDS: int = int(os.getenv("SHARD_LEASE_SECONDS", "30"))
+    # How often timers armed by other processes are picked up: other shards'
+    # workers, or the old replica during a deploy (0 disables it when unsharded)
+    TIMER_SYNC_SECONDS: float = float(
+        os.getenv("TIMER_SYNC_SECONDS") or os.getenv("SHARD_SYNC_SECONDS", "2")
+    )
+
+    # Shared state of daily counters and the outbound rate limit: "memory://"
+    # keeps it in the process, a redis:// URL shares it between replicas
+    STATE_STORE_URL: str = os.getenv("STATE_STORE_URL", "memory://")
+    # Seconds a daily count read from the database stays in the store
+    STATE_COUNTER_TTL_SECONDS: int = int(os.getenv("STATE_COUNTER_TTL_SECONDS", "300"))
+
+    # user_data, chat_data and bot_data kept in the database
+    PERSISTENCE: bool = os.getenv("PERSISTENCE", "True").lower() in ("true", "1", "t")
+    PERSISTENCE_UPDATE_SECONDS: float = float(
+        os.getenv("PERSISTENCE_UPDATE_SECONDS", "5")
+    )
+    # Reload a user's data before each update; needed when any worker may
+    # receive any user's updates, so on by default with sharding
+    PERSISTENCE_REFRESH_ALWAYS: bool = os.getenv(
+        "PERSISTENCE_REFRESH_ALWAYS", str(SHARD_COUNT > 0)
+    ).lower() in ("true", "1", "t")
 
     # Development mode
     DEBUG: bool = os.getenv("DEBUG", "False").lower() in ("true", "1", "t")
 
 
-config = Config() 
\ No newline at end of file
+config = Config()
@@ -1,5 +1,27 @@
 """Database module for the Pomodoro bot."""
 
-from app.db.models import PomodoroSession, User, init_db
+from app.db.models import (
+    DailyStats,
+    HourlyStats,
+    PendingTimer,
+    PomodoroSession,
+    ShardLease,
+    User,
+    WeeklyStats,
+    WorkerHeartbeat,
+    get_async_session,
+    init_db,
+)
 
-__all__ = ["User", "PomodoroSession", "init_db"] 
\ No newline at end of file
+__all__ = [
+    "User",
+    "PomodoroSession",
+    "PendingTimer",
+    "DailyStats",
+    "HourlyStats",
+    "WeeklyStats",
+    "ShardLease",
+    "WorkerHeartbeat",
+    "init_db",
+    "get_async_session",
+]
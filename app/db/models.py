@@ -1,29 +1,148 @@
 """Database models for the Pomodoro bot."""
 
+from contextlib import asynccontextmanager
 from datetime import datetime
-from typing import Optional
+from functools import lru_cache
+from typing import AsyncIterator, Optional
 
-from sqlalchemy import Column, DateTime, ForeignKey, Integer, String, create_engine
+from sqlalchemy import (
+    JSON,
+    BigInteger,
+    Boolean,
+    Column,
+    Date,
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    create_engine,
+    false,
+)
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship, sessionmaker
 
 from app.config import config
 
-# Create SQLAlchemy engine and session
-engine = create_engine(config.DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def get_async_database_url(url: str) -> str:
+    """Convert a database URL to its async driver variant.
+
+    Postgres URLs use asyncpg and SQLite URLs use aiosqlite.
+    """
+    if url.startswith("postgres://"):
+        url = "postgresql://" + url[len("postgres://") :]
+    if url.startswith("postgresql://") or url.startswith("postgresql+psycopg2://"):
+        return "postgresql+asyncpg://" + url.split("://", 1)[1]
+    if url.startswith("sqlite://"):
+        return "sqlite+aiosqlite://" + url.split("://", 1)[1]
+    return url
+
+
+def get_pool_options(url: str) -> dict:
+    """Get connection pool options for an engine."""
+    options = {"pool_pre_ping": config.DB_POOL_PRE_PING}
+    # SQLite picks its own pool class, which may not accept sizing options
+    if not url.startswith("sqlite"):
+        options["pool_size"] = config.DB_POOL_SIZE
+        options["max_overflow"] = config.DB_MAX_OVERFLOW
+    return options
+
+
 Base = declarative_base()
 
 
+@lru_cache(maxsize=None)
+def get_engine() -> Engine:
+    """Get the sync engine, creating it on first use."""
+    return create_engine(config.DATABASE_URL)
+
+
+@lru_cache(maxsize=None)
+def get_async_engine() -> AsyncEngine:
+    """Get the async engine used from handlers and timers.
+
+    The engine is created on first use, which also defers loading the async
+    database driver.
+    """
+    return create_async_engine(
+        get_async_database_url(config.DATABASE_URL),
+        **get_pool_options(config.DATABASE_URL),
+    )
+
+
+@lru_cache(maxsize=None)
+def get_session_factory() -> sessionmaker:
+    """Get the sync session factory."""
+    return sessionmaker(autocommit=False, autoflush=False, bind=get_engine())
+
+
+@lru_cache(maxsize=None)
+def get_async_session_factory() -> async_sessionmaker:
+    """Get the async session factory."""
+    return async_sessionmaker(
+        get_async_engine(),
+        class_=AsyncSession,
+        autoflush=False,
+        expire_on_commit=False,
+    )
+
+
+# Engines and session factories are created lazily on first access
+_LAZY_ATTRIBUTES = {
+    "engine": get_engine,
+    "async_engine": get_async_engine,
+    "SessionLocal": get_session_factory,
+    "AsyncSessionLocal": get_async_session_factory,
+}
+
+
+def __getattr__(name: str):
+    """Resolve the lazily created engines and session factories."""
+    factory = _LAZY_ATTRIBUTES.get(name)
+    if factory is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return factory()
+
+
 def get_db_session():
     """Get a database session."""
-    db = SessionLocal()
+    db = get_session_factory()()
     try:
         yield db
     finally:
         db.close()
 
 
+def dialect_insert(dialect_name: str):
+    """Get the INSERT construct supporting ON CONFLICT for a dialect.
+
+    Config rejects a DATABASE_URL of any other dialect at startup.
+    """
+    if dialect_name == "postgresql":
+        return postgresql_insert
+    if dialect_name == "sqlite":
+        return sqlite_insert
+    raise NotImplementedError(f"Upserts are not supported for {dialect_name}")
+
+
+@asynccontextmanager
+async def get_async_session() -> AsyncIterator[AsyncSession]:
+    """Get an async database session without blocking the event loop."""
+    async with get_async_session_factory()() as session:
+        yield session
+
+
 class User(Base):
     """User model."""
 
@@ -34,12 +153,20 @@ class User(Base):
     username = Column(String, nullable=True)
     first_name = Column(String)
     last_name = Column(String, nullable=True)
-    timezone = Column(String, default="UTC")
+    timezone = Column(String, default="UTC", index=True)
+    # Timer messages are edited into a live countdown, toggled by /live
+    live_countdown = Column(
+        Boolean, nullable=False, default=False, server_default=false()
+    )
     created_at = Column(DateTime, default=datetime.utcnow)
+    # Watermark of incremental analytics exports, set by every UPDATE
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     # Relationship
     pomodoro_sessions = relationship("PomodoroSession", back_populates="user")
 
+    __table_args__ = (Index("ix_users_updated_at_id", updated_at, id),)
+
     def __repr__(self) -> str:
         """String representation of the User model."""
         return f"User(telegram_id={self.telegram_id}, username={self.username})"
@@ -57,10 +184,25 @@ class PomodoroSession(Base):
     start_time = Column(DateTime, default=datetime.utcnow)
     end_time = Column(DateTime, nullable=True)
     completed = Column(Integer, default=0)  # Number of completed pomodoros
+    # Watermark of incremental analytics exports, set by every UPDATE
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     # Relationship
     user = relationship("User", back_populates="pomodoro_sessions")
 
+    __table_args__ = (
+        Index("ix_pomodoro_sessions_user_id_start_time", user_id, start_time),
+        Index("ix_pomodoro_sessions_updated_at_id", updated_at, id),
+        # Only open sessions, in the ID order the stale session sweeper
+        # pages them in
+        Index(
+            "ix_pomodoro_sessions_open",
+            id,
+            sqlite_where=end_time.is_(None),
+            postgresql_where=end_time.is_(None),
+        ),
+    )
+
     def __repr__(self) -> str:
         """String representation of the PomodoroSession model."""
         return (
@@ -70,7 +212,220 @@ class PomodoroSession(Base):
         )
 
 
+class PendingTimer(Base):
+    """Pending timer deadline model.
+
+    Holds at most one row per user so running timers can be restored after
+    a restart or redeploy.
+    """
+
+    __tablename__ = "pending_timers"
+
+    user_id = Column(BigInteger, primary_key=True)  # Telegram user ID
+    chat_id = Column(BigInteger)
+    phase = Column(String)  # "work" or "break"
+    deadline = Column(DateTime, index=True)  # UTC
+    session_id = Column(
+        Integer, ForeignKey("pomodoro_sessions.id"), nullable=True, index=True
+    )
+    break_minutes = Column(Integer)
+    # Shard of user_id, used to find the timers of a worker's shards
+    shard_id = Column(Integer, default=0, index=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, index=True)
+    # Seconds left when the timer was paused, NULL while it runs; a paused
+    # row keeps the deadline it had and never fires
+    remaining_seconds = Column(Float, nullable=True)
+
+    def __repr__(self) -> str:
+        """String representation of the PendingTimer model."""
+        return (
+            f"PendingTimer(user_id={self.user_id}, "
+            f"phase={self.phase}, "
+            f"deadline={self.deadline})"
+        )
+
+
+class DailyStats(Base):
+    """Per-user daily pomodoro counter model.
+
+    Maintained incrementally when pomodoros complete, so daily totals are
+    read from a single row. ``date`` is the day in the user's timezone.
+    """
+
+    __tablename__ = "daily_stats"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    date = Column(Date, primary_key=True)
+    completed = Column(Integer, default=0, nullable=False)
+    focus_minutes = Column(Integer, default=0, nullable=False)
+
+    def __repr__(self) -> str:
+        """String representation of the DailyStats model."""
+        return (
+            f"DailyStats(user_id={self.user_id}, "
+            f"date={self.date}, "
+            f"completed={self.completed})"
+        )
+
+
+class HourlyStats(Base):
+    """Per-user hourly pomodoro counter model.
+
+    ``date`` and ``hour`` are the day and hour of the completion in the
+    user's timezone. Used to find the most productive hour of the day.
+    """
+
+    __tablename__ = "hourly_stats"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    date = Column(Date, primary_key=True)
+    hour = Column(Integer, primary_key=True)
+    completed = Column(Integer, default=0, nullable=False)
+    focus_minutes = Column(Integer, default=0, nullable=False)
+
+    def __repr__(self) -> str:
+        """String representation of the HourlyStats model."""
+        return (
+            f"HourlyStats(user_id={self.user_id}, "
+            f"date={self.date}, "
+            f"hour={self.hour}, "
+            f"completed={self.completed})"
+        )
+
+
+class WeeklyStats(Base):
+    """Per-user weekly pomodoro counter model.
+
+    ``week_start`` is the Monday of the week in the user's timezone.
+    """
+
+    __tablename__ = "weekly_stats"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    week_start = Column(Date, primary_key=True)
+    completed = Column(Integer, default=0, nullable=False)
+    focus_minutes = Column(Integer, default=0, nullable=False)
+
+    def __repr__(self) -> str:
+        """String representation of the WeeklyStats model."""
+        return (
+            f"WeeklyStats(user_id={self.user_id}, "
+            f"week_start={self.week_start}, "
+            f"completed={self.completed})"
+        )
+
+
+class ShardLease(Base):
+    """Timer shard ownership lease model.
+
+    A worker arms the timers of a shard only while it holds an unexpired
+    lease on it.
+    """
+
+    __tablename__ = "shard_leases"
+
+    shard_id = Column(Integer, primary_key=True)
+    owner = Column(String, nullable=True)
+    expires_at = Column(DateTime, nullable=False)
+
+    def __repr__(self) -> str:
+        """String representation of the ShardLease model."""
+        return (
+            f"ShardLease(shard_id={self.shard_id}, "
+            f"owner={self.owner}, "
+            f"expires_at={self.expires_at})"
+        )
+
+
+class WorkerHeartbeat(Base):
+    """Live bot worker model, used to spread shards between workers."""
+
+    __tablename__ = "worker_heartbeats"
+
+    worker_id = Column(String, primary_key=True)
+    expires_at = Column(DateTime, nullable=False, index=True)
+
+    def __repr__(self) -> str:
+        """String representation of the WorkerHeartbeat model."""
+        return (
+            f"WorkerHeartbeat(worker_id={self.worker_id}, expires_at={self.expires_at})"
+        )
+
+
+class PersistentData(Base):
+    """Key of a user's, chat's or the bot's data, kept across restarts.
+
+    Backs ``context.user_data``, ``chat_data`` and ``bot_data`` through
+    app.services.persistence, one row per key so only changed keys are
+    written.
+    """
+
+    __tablename__ = "persistent_data"
+
+    # "user", "chat" or "bot"
+    scope = Column(String, primary_key=True)
+    # Telegram user or chat ID, 0 for bot data
+    owner_id = Column(BigInteger, primary_key=True)
+    key = Column(String, primary_key=True)
+    value = Column(JSON)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+    def __repr__(self) -> str:
+        """String representation of the PersistentData model."""
+        return (
+            f"PersistentData(scope={self.scope}, "
+            f"owner_id={self.owner_id}, "
+            f"key={self.key})"
+        )
+
+
+class Team(Base):
+    """Shared pomodoro timer of a group chat.
+
+    The team's timer is a single pending_timers row keyed by the (negative)
+    group chat ID, so a team costs one timer whatever its size.
+    """
+
+    __tablename__ = "teams"
+
+    chat_id = Column(BigInteger, primary_key=True)  # Telegram group chat ID
+    work_minutes = Column(Integer)
+    break_minutes = Column(Integer)
+    # "group": one message to the chat, "dm": a message to each member
+    notify = Column(String, default="group")
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    def __repr__(self) -> str:
+        """String representation of the Team model."""
+        return f"Team(chat_id={self.chat_id}, notify={self.notify})"
+
+
+class TeamMember(Base):
+    """Member of a team.
+
+    Each member has one open pomodoro session for as long as they stay in
+    the team, which collects the pomodoros completed with it.
+    """
+
+    __tablename__ = "team_members"
+
+    chat_id = Column(BigInteger, ForeignKey("teams.chat_id"), primary_key=True)
+    user_id = Column(BigInteger, primary_key=True)  # Telegram user ID
+    session_id = Column(
+        Integer, ForeignKey("pomodoro_sessions.id"), nullable=True, index=True
+    )
+    joined_at = Column(DateTime, default=datetime.utcnow)
+
+    def __repr__(self) -> str:
+        """String representation of the TeamMember model."""
+        return f"TeamMember(chat_id={self.chat_id}, user_id={self.user_id})"
+
+
 # Create all tables
 def init_db():
-    """Initialize the database."""
-    Base.metadata.create_all(bind=engine) 
\ No newline at end of file
+    """Initialize the database.
+
+    Creates missing tables for development and tests. Deployed databases are
+    migrated on startup instead, see app.db.schema.
+    """
+    Base.metadata.create_all(bind=get_engine())
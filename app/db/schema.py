@@ -0,0 +1,102 @@
+"""Schema version checks for the Pomodoro bot."""
+
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import AsyncIterator, Optional
+
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+
+from app.config import config
+from app.db.models import get_async_engine
+
+logger = logging.getLogger(__name__)
+
+# Head revision of migrations/, bump it with every new migration
+SCHEMA_VERSION = "0007"
+
+MIGRATIONS_PATH = Path(__file__).resolve().parent.parent.parent / "migrations"
+
+# Postgres advisory lock held while a worker migrates the database
+MIGRATION_LOCK_ID = 0x706F6D6F
+
+
+async def get_schema_version() -> Optional[str]:
+    """Get the migration revision the database is at.
+
+    Returns:
+        str: Revision, or None if the database was never migrated
+    """
+    async with get_async_engine().connect() as connection:
+        try:
+            result = await connection.execute(
+                text("SELECT version_num FROM alembic_version")
+            )
+        except DBAPIError:
+            # No alembic_version table yet
+            return None
+        return result.scalar()
+
+
+def upgrade_schema(url: Optional[str] = None):
+    """Apply all migrations up to the head revision.
+
+    Args:
+        url: Synchronous database URL, defaults to DATABASE_URL
+    """
+    # Alembic is only needed when the schema changes
+    from alembic import command
+    from alembic.config import Config
+
+    alembic_config = Config()
+    alembic_config.set_main_option("script_location", str(MIGRATIONS_PATH))
+    alembic_config.set_main_option("sqlalchemy.url", url or config.DATABASE_URL)
+    command.upgrade(alembic_config, "head")
+
+
+@asynccontextmanager
+async def migration_lock() -> AsyncIterator[None]:
+    """Keep other workers from migrating the database at the same time.
+
+    Sharded workers start together, and each would otherwise run the same
+    migrations concurrently. On Postgres this holds a session-level
+    advisory lock; SQLite is not shared between hosts and needs none.
+    """
+    engine = get_async_engine()
+    if engine.dialect.name != "postgresql":
+        yield
+        return
+    async with engine.connect() as connection:
+        await connection.execute(
+            text("SELECT pg_advisory_lock(:id)"), {"id": MIGRATION_LOCK_ID}
+        )
+        try:
+            yield
+        finally:
+            await connection.execute(
+                text("SELECT pg_advisory_unlock(:id)"), {"id": MIGRATION_LOCK_ID}
+            )
+
+
+async def ensure_schema() -> bool:
+    """Migrate the database unless it is already at SCHEMA_VERSION.
+
+    An up-to-date database costs a single query. Otherwise the version is
+    checked again under the migration lock, so of the workers starting
+    together only the first one migrates. Migrations run in a worker thread
+    so they do not block the event loop.
+
+    Returns:
+        bool: True if migrations were applied
+    """
+    if await get_schema_version() == SCHEMA_VERSION:
+        return False
+    async with migration_lock():
+        version = await get_schema_version()
+        if version == SCHEMA_VERSION:
+            return False
+        logger.info(f"Migrating database schema from {version} to {SCHEMA_VERSION}")
+        await asyncio.to_thread(upgrade_schema)
+    return True
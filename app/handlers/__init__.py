@@ -3,15 +3,31 @@
 from app.handlers.command_handlers import (
     callback_handler,
     help_handler,
+    live_handler,
+    month_handler,
+    pause_handler,
     pomodoro_handler,
+    resume_handler,
     start_handler,
+    status_handler,
+    team_handler,
+    team_stop_handler,
     today_handler,
+    week_handler,
 )
 
 __all__ = [
     "start_handler",
     "help_handler",
     "pomodoro_handler",
+    "pause_handler",
+    "resume_handler",
+    "status_handler",
+    "live_handler",
+    "team_handler",
+    "team_stop_handler",
     "today_handler",
+    "week_handler",
+    "month_handler",
     "callback_handler",
-] 
\ No newline at end of file
+]
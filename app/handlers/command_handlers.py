@@ -8,6 +8,8 @@ from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Update
 from telegram.ext import CallbackContext
 
 from app.config import config
+from app.services.stats import PeriodSummary
+from app.services.teams import DM_NOTIFY, GROUP_NOTIFY
 from app.services.timer import timer_service
 
 logger = logging.getLogger(__name__)
@@ -41,16 +43,22 @@ async def help_handler(update: Update, context: CallbackContext) -> None:
         "*Доступные команды:*\n"
         "/start - Начать работу с ботом\n"
         "/pomodoro <работа> <перерыв> - Запустить таймер с указанной длительностью в минутах\n"
+        "/pause - Поставить таймер на паузу\n"
+        "/resume - Продолжить таймер после паузы\n"
+        "/status - Сколько осталось до конца работы или перерыва\n"
+        "/live - Включить или выключить живой отсчёт в сообщениях таймера\n"
+        "/team <работа> <перерыв> [dm] - Общий таймер группы, dm - в личку\n"
+        "/team\\_stop - Остановить общий таймер группы\n"
         "/today - Показать количество выполненных помидоров за сегодня\n"
+        "/week - Статистика за неделю\n"
+        "/month - Статистика за месяц\n"
         "/help - Показать эту справку\n\n"
         "*Примеры:*\n"
         "/pomodoro 25 5 - Запустить таймер с 25 минутами работы и 5 минутами перерыва\n"
         "/pomodoro 50 10 - Запустить таймер с 50 минутами работы и 10 минутами перерыва"
     )
 
-    await update.effective_message.reply_text(
-        help_text, parse_mode="Markdown"
-    )
+    await update.effective_message.reply_text(help_text, parse_mode="Markdown")
 
 
 def parse_pomodoro_args(args: list) -> Tuple[int, int]:
@@ -92,6 +100,43 @@ async def pomodoro_handler(update: Update, context: CallbackContext) -> None:
     await timer_service.start_timer(update, context, work_minutes, break_minutes)
 
 
+async def team_handler(update: Update, context: CallbackContext) -> None:
+    """Handle the /team command."""
+    args = list(context.args or [])
+    notify = GROUP_NOTIFY
+    if DM_NOTIFY in args:
+        args.remove(DM_NOTIFY)
+        notify = DM_NOTIFY
+    work_minutes, break_minutes = parse_pomodoro_args(args)
+
+    await timer_service.start_team_timer(update, work_minutes, break_minutes, notify)
+
+
+async def team_stop_handler(update: Update, context: CallbackContext) -> None:
+    """Handle the /team_stop command."""
+    await timer_service.stop_team(update)
+
+
+async def pause_handler(update: Update, context: CallbackContext) -> None:
+    """Handle the /pause command."""
+    await timer_service.pause_timer(update)
+
+
+async def resume_handler(update: Update, context: CallbackContext) -> None:
+    """Handle the /resume command."""
+    await timer_service.resume_timer(update)
+
+
+async def status_handler(update: Update, context: CallbackContext) -> None:
+    """Handle the /status command."""
+    await timer_service.send_status(update)
+
+
+async def live_handler(update: Update, context: CallbackContext) -> None:
+    """Handle the /live command."""
+    await timer_service.toggle_live(update)
+
+
 async def today_handler(update: Update, context: CallbackContext) -> None:
     """Handle the /today command."""
     user_id = update.effective_user.id
@@ -114,13 +159,62 @@ async def today_handler(update: Update, context: CallbackContext) -> None:
     await update.effective_message.reply_text(f"{emoji} {message}")
 
 
+def format_summary(title: str, summary: PeriodSummary) -> str:
+    """Format period statistics as a message."""
+    hours, minutes = divmod(summary.focus_minutes, 60)
+    lines = [
+        title,
+        f"🍅 Помидоров: {summary.completed}",
+        f"⏱ Время фокуса: {hours} ч {minutes} мин",
+        f"📆 Активных дней: {summary.active_days}",
+    ]
+    if summary.best_hour is not None:
+        lines.append(
+            f"🕘 Самый продуктивный час: "
+            f"{summary.best_hour:02d}:00–{(summary.best_hour + 1) % 24:02d}:00"
+        )
+    lines.append(f"🔥 Текущая серия: {summary.current_streak} дн.")
+    lines.append(f"🏆 Лучшая серия: {summary.longest_streak} дн.")
+    return "\n".join(lines)
+
+
+async def week_handler(update: Update, context: CallbackContext) -> None:
+    """Handle the /week command."""
+    summary = await timer_service.get_summary(update.effective_user.id, "week")
+    if summary is None or not summary.completed:
+        text = "😔 На этой неделе пока нет выполненных помидоров."
+    else:
+        text = format_summary("📊 Статистика за неделю", summary)
+
+    await update.effective_message.reply_text(text)
+
+
+async def month_handler(update: Update, context: CallbackContext) -> None:
+    """Handle the /month command."""
+    summary = await timer_service.get_summary(update.effective_user.id, "month")
+    if summary is None or not summary.completed:
+        text = "😔 В этом месяце пока нет выполненных помидоров."
+    else:
+        text = format_summary("📊 Статистика за месяц", summary)
+
+    await update.effective_message.reply_text(text)
+
+
 async def callback_handler(update: Update, context: CallbackContext) -> None:
     """Handle callback queries from inline keyboards."""
     query = update.callback_query
-    await query.answer()  # Answer to remove the loading state
-
     data = query.data
 
+    # Team membership is confirmed in the answer
+    if data == "team_join":
+        await query.answer(await timer_service.join_team(update))
+        return
+    if data == "team_leave":
+        await query.answer(await timer_service.leave_team(update))
+        return
+
+    await query.answer()  # Answer to remove the loading state
+
     # Handle preset timers
     if data.startswith("preset_"):
         # Extract minutes from preset_X_Y format
@@ -128,7 +222,9 @@ async def callback_handler(update: Update, context: CallbackContext) -> None:
         if match:
             work_minutes = int(match.group(1))
             break_minutes = int(match.group(2))
-            await timer_service.start_timer(update, context, work_minutes, break_minutes)
+            await timer_service.start_timer(
+                update, context, work_minutes, break_minutes
+            )
             # Remove the inline keyboard
             await query.edit_message_reply_markup(None)
             return
@@ -157,12 +253,10 @@ async def callback_handler(update: Update, context: CallbackContext) -> None:
 
         # If we have a previous session, use its parameters
         if session_id:
-            from app.db.models import PomodoroSession, get_db_session
-            for session in get_db_session():
-                pomodoro = session.query(PomodoroSession).get(session_id)
-                if pomodoro:
-                    work_minutes = pomodoro.work_minutes
-                    break_minutes = pomodoro.break_minutes
+            pomodoro = await timer_service.get_session_info(session_id)
+            if pomodoro:
+                work_minutes = pomodoro.work_minutes
+                break_minutes = pomodoro.break_minutes
 
         # Start a new timer with the same parameters
         await timer_service.start_timer(update, context, work_minutes, break_minutes)
@@ -170,9 +264,19 @@ async def callback_handler(update: Update, context: CallbackContext) -> None:
         await query.edit_message_reply_markup(None)
         return
 
+    # Handle team rounds
+    if data == "team_next_yes":
+        await timer_service.next_team_round(update)
+        await query.edit_message_reply_markup(None)
+        return
+    if data == "team_stop":
+        await timer_service.stop_team(update)
+        await query.edit_message_reply_markup(None)
+        return
+
     # Handle end session
     if data == "next_round_no":
         await query.edit_message_text(
             text="Сессия завершена. Отдохни и возвращайся, когда будешь готов!"
         )
-        return 
\ No newline at end of file
+        return
@@ -3,14 +3,21 @@
 import asyncio
 import logging
 
-from app.bot import run_polling, run_webhook
 from app.config import config
+from app.startup import startup
 
 logger = logging.getLogger(__name__)
 
 
 async def main():
     """Start the bot application."""
+    # Telegram, SQLAlchemy and APScheduler load here, timed as a phase.
+    # The bot needs them all before it can start, so this only spares
+    # scripts and tests that import app.main; importing app.bot also
+    # configures logging
+    with startup.phase("imports"):
+        from app.bot import run_polling, run_webhook
+
     logger.info("Starting Pomodoro bot...")
 
     # Use polling in debug mode, webhook in production
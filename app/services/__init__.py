@@ -1,5 +1,16 @@
 """Services module for the Pomodoro bot."""
 
-from app.services.timer import timer_service
+__all__ = ["timer_service"]
 
-__all__ = ["timer_service"] 
\ No newline at end of file
+
+def __getattr__(name: str):
+    """Import the timer service on first access.
+
+    Importing a single service module, e.g. ``app.services.metrics``, then
+    does not load the whole timer stack.
+    """
+    if name == "timer_service":
+        from app.services.timer import timer_service
+
+        return timer_service
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
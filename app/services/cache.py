@@ -0,0 +1,87 @@
+"""In-process caches for the Pomodoro bot."""
+
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, NamedTuple, Optional
+
+
+class UserInfo(NamedTuple):
+    """Cached user fields needed on every interaction."""
+
+    id: int
+    timezone: str
+    live_countdown: bool = False
+
+
+class SessionInfo(NamedTuple):
+    """Cached pomodoro session durations."""
+
+    work_minutes: int
+    break_minutes: int
+
+
+class LRUCache:
+    """Bounded least-recently-used cache with a per-entry time to live."""
+
+    def __init__(self, max_size: int = 10_000, ttl: float = 300.0):
+        """Initialize the LRUCache.
+
+        Args:
+            max_size: Maximum number of entries before the oldest is evicted
+            ttl: Seconds an entry stays valid after it was set
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+
+        # Metrics
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        """Return the number of cached entries, including expired ones."""
+        return len(self._entries)
+
+    @property
+    def metrics(self) -> dict:
+        """Snapshot of the cache metrics."""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+    def get(self, key: Hashable, default: Any = None) -> Optional[Any]:
+        """Get a cached value, counting the lookup as a hit or a miss."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            self.misses += 1
+            return default
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any):
+        """Cache a value, evicting the least recently used entry if full."""
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key: Hashable):
+        """Remove a key so the next lookup goes to the database."""
+        self._entries.pop(key, None)
+
+    def clear(self):
+        """Remove all entries."""
+        self._entries.clear()
@@ -0,0 +1,336 @@
+"""Live countdown messages edited on an adaptive cadence."""
+
+import asyncio
+import logging
+import math
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+from telegram import InlineKeyboardMarkup
+
+from app.services.dispatcher import INFO_PRIORITY, MessageDispatcher, TokenBucket
+from app.services.scheduler import TimerRecord
+
+logger = logging.getLogger(__name__)
+
+# Seconds left above the threshold -> seconds between edits, farthest first
+CADENCE = ((300, 60), (60, 15), (0, 5))
+
+# Telegram user ID -> timer record and seconds left if paused, from memory
+TimerLookup = Callable[[int], Tuple[Optional[TimerRecord], Optional[float]]]
+
+
+def format_remaining(seconds: float) -> str:
+    """Format seconds left as minutes and seconds, e.g. ``12:05``."""
+    minutes, seconds = divmod(int(max(0.0, seconds) + 0.5), 60)
+    return f"{minutes}:{seconds:02d}"
+
+
+def edit_interval(remaining: float) -> float:
+    """Get the seconds between edits of a countdown with ``remaining`` left."""
+    for threshold, interval in CADENCE:
+        if remaining > threshold:
+            return interval
+    return CADENCE[-1][1]
+
+
+def render(prefix: str, remaining: float, paused: bool = False) -> str:
+    """Render a countdown message.
+
+    The time left is rounded up to the edit interval, so the text only
+    changes when an edit is due: whole minutes far from the deadline,
+    seconds close to it.
+
+    Args:
+        prefix: Text of the timer message above the countdown
+        remaining: Seconds left
+        paused: Whether the timer is paused
+
+    Returns:
+        str: Message text
+    """
+    if paused:
+        return f"{prefix}\n⏸ На паузе, осталось {format_remaining(remaining)}"
+    step = edit_interval(remaining)
+    if step >= 60:
+        return f"{prefix}\n⏳ Осталось {math.ceil(remaining / 60)} мин"
+    shown = math.ceil(remaining / step) * step
+    return f"{prefix}\n⏳ Осталось {format_remaining(shown)}"
+
+
+class LiveMessage:
+    """Timer message kept up to date with the time left."""
+
+    __slots__ = (
+        "chat_id",
+        "message_id",
+        "prefix",
+        "phase",
+        "reply_markup",
+        "text",
+        "next_edit",
+        "edit",
+    )
+
+    def __init__(
+        self,
+        chat_id: int,
+        message_id: int,
+        prefix: str,
+        phase: str,
+        reply_markup: Optional[InlineKeyboardMarkup] = None,
+    ):
+        """Initialize the LiveMessage."""
+        self.chat_id = chat_id
+        self.message_id = message_id
+        self.prefix = prefix
+        self.phase = phase
+        self.reply_markup = reply_markup
+        # Text the message has or is being edited to
+        self.text = prefix
+        # Unix timestamp of the next edit, the first one is due at once
+        self.next_edit = 0.0
+        # Latest edit queued in the dispatcher
+        self.edit: Optional[asyncio.Future] = None
+
+
+class LiveCountdown:
+    """Periodic ticker editing the messages of opted-in timers.
+
+    Every ``tick_interval`` seconds one pass walks all tracked messages and
+    edits those whose edit is due: every minute far from the deadline, more
+    often close to it (see CADENCE). An edit is skipped when the rendered
+    text has not changed, and every edit takes a token from a budget of
+    ``edits_per_second`` shared by all messages, so the edit volume stays
+    bounded however many users opt in. Edits over the budget wait for the
+    next pass, oldest first. With a shared state store, ``shared_limit``
+    also caps the edits of all replicas together.
+
+    A message is tracked until its timer is gone from this process or moves
+    to another phase; it is then edited back to its own text.
+    """
+
+    def __init__(
+        self,
+        dispatcher: MessageDispatcher,
+        lookup: TimerLookup,
+        edits_per_second: float = 5,
+        tick_interval: float = 1.0,
+    ):
+        """Initialize the LiveCountdown.
+
+        Args:
+            dispatcher: Dispatcher sending the edits
+            lookup: Finds a user's timer and the seconds left if it is paused
+            edits_per_second: Edits allowed per second across all messages
+            tick_interval: Seconds between passes over the messages
+        """
+        self.dispatcher = dispatcher
+        self.lookup = lookup
+        self.budget = TokenBucket(edits_per_second)
+        # Edit budget shared with other replicas, set by the timer service
+        self.shared_limit = None
+        self.tick_interval = tick_interval
+        # Telegram user ID -> live message of the user's timer
+        self._messages: Dict[int, LiveMessage] = {}
+        self._task: Optional[asyncio.Task] = None
+
+        # Metrics
+        self.ticks = 0
+        self.edits = 0
+        self.unchanged = 0
+        self.deferred = 0
+
+    def __len__(self) -> int:
+        """Number of tracked messages."""
+        return len(self._messages)
+
+    def __contains__(self, user_id: int) -> bool:
+        """Check whether the user's timer message is tracked."""
+        return user_id in self._messages
+
+    @property
+    def metrics(self) -> dict:
+        """Snapshot of the countdown metrics."""
+        return {
+            "messages": len(self._messages),
+            "ticks": self.ticks,
+            "edits": self.edits,
+            "unchanged": self.unchanged,
+            "deferred": self.deferred,
+        }
+
+    def track(
+        self,
+        user_id: int,
+        chat_id: int,
+        message_id: int,
+        prefix: str,
+        phase: str,
+        reply_markup: Optional[InlineKeyboardMarkup] = None,
+    ):
+        """Start counting down in a timer message.
+
+        A message already tracked for the user is finished first.
+
+        Args:
+            user_id: Telegram user ID of the timer
+            chat_id: Chat of the message
+            message_id: Message to edit
+            prefix: Text of the message, kept above the countdown
+            phase: Timer phase the message counts down
+            reply_markup: Keyboard of the message, kept on every edit
+        """
+        self.untrack(user_id)
+        self._messages[user_id] = LiveMessage(
+            chat_id, message_id, prefix, phase, reply_markup
+        )
+
+    def track_sent(
+        self,
+        sent: asyncio.Future,
+        user_id: int,
+        chat_id: int,
+        prefix: str,
+        phase: str,
+        reply_markup: Optional[InlineKeyboardMarkup] = None,
+    ):
+        """Track a message once the dispatcher has sent it.
+
+        Args:
+            sent: Future of the send, resolving with the message or None
+            user_id: Telegram user ID of the timer
+            chat_id: Chat of the message
+            prefix: Text of the message
+            phase: Timer phase the message counts down
+            reply_markup: Keyboard of the message
+        """
+
+        def on_sent(future: asyncio.Future):
+            message = None if future.cancelled() else future.result()
+            if message is not None:
+                self.track(
+                    user_id, chat_id, message.message_id, prefix, phase, reply_markup
+                )
+
+        sent.add_done_callback(on_sent)
+
+    def untrack(self, user_id: int):
+        """Stop counting down, editing the message back to its own text."""
+        message = self._messages.pop(user_id, None)
+        if message is not None and message.text != message.prefix:
+            self._edit(message, message.prefix, None)
+
+    def start(self):
+        """Start the ticker in the running event loop."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the ticker; the messages keep their last countdown."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        """Tick on a fixed interval."""
+        while True:
+            await asyncio.sleep(self.tick_interval)
+            try:
+                await self.tick()
+            except Exception as e:
+                logger.error(f"Live countdown tick failed: {e}", exc_info=True)
+
+    async def tick(self, now: float = None, monotonic: float = None) -> int:
+        """Edit every message whose edit is due, within the budget.
+
+        Args:
+            now: Current Unix timestamp, for deadlines and edit times
+            monotonic: Current time.monotonic() value, for the edit budget
+
+        Returns:
+            int: Number of edits queued
+        """
+        now = time.time() if now is None else now
+        monotonic = time.monotonic() if monotonic is None else monotonic
+        self.ticks += 1
+        due = sorted(
+            (message.next_edit, user_id)
+            for user_id, message in self._messages.items()
+            if message.next_edit <= now
+        )
+        edits = 0
+        for position, (_, user_id) in enumerate(due):
+            message = self._messages[user_id]
+            if message.edit is not None:
+                # The previous edit is still queued behind other calls
+                if not message.edit.done():
+                    continue
+                # A failed edit means the message was deleted or is too old
+                if message.edit.result() is None:
+                    del self._messages[user_id]
+                    continue
+            record, remaining = self.lookup(user_id)
+            finished = record is None or record.phase != message.phase
+            if finished:
+                text = message.prefix
+            else:
+                paused = remaining is not None
+                if not paused:
+                    remaining = max(0.0, record.deadline - now)
+                text = render(message.prefix, remaining, paused)
+            if text == message.text:
+                self.unchanged += 1
+            elif await self._take(now, monotonic):
+                self._edit(message, text, None if finished else message.reply_markup)
+                edits += 1
+            else:
+                self.deferred += len(due) - position
+                break
+            if finished:
+                del self._messages[user_id]
+            else:
+                message.next_edit = now + edit_interval(remaining)
+        return edits
+
+    async def _take(self, now: float, monotonic: float) -> bool:
+        """Take one edit from the budget.
+
+        The local budget runs on the monotonic clock like the dispatcher's,
+        the shared one on Unix time windows every replica agrees on. If the
+        shared store is unreachable, only the local budget applies.
+        """
+        if self.budget.take(monotonic):
+            return False
+        if self.shared_limit is None:
+            return True
+        try:
+            wait = await self.shared_limit.take(now)
+        except Exception as e:
+            logger.warning(f"Shared edit budget unavailable: {e}")
+            return True
+        return not wait
+
+    def _edit(
+        self,
+        message: LiveMessage,
+        text: str,
+        reply_markup: Optional[InlineKeyboardMarkup],
+    ):
+        """Queue an edit of a message through the dispatcher."""
+        message.text = text
+        message.edit = self.dispatcher.submit(
+            message.chat_id,
+            lambda: self.dispatcher.bot.edit_message_text(
+                text,
+                chat_id=message.chat_id,
+                message_id=message.message_id,
+                reply_markup=reply_markup,
+            ),
+            priority=INFO_PRIORITY,
+        )
+        self.edits += 1
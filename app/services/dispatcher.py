@@ -0,0 +1,383 @@
+"""Rate-limited outbound message dispatcher for the Pomodoro bot."""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+
+from telegram import Bot, InlineKeyboardMarkup
+from telegram.error import RetryAfter
+
+from app.config import config
+
+logger = logging.getLogger(__name__)
+
+# Lower values are sent first
+TIMER_PRIORITY = 0
+INFO_PRIORITY = 1
+PRIORITIES = (TIMER_PRIORITY, INFO_PRIORITY)
+
+
+def retry_after_seconds(error: RetryAfter) -> float:
+    """Get the flood-control delay of a RetryAfter error in seconds."""
+    delay = error.retry_after
+    if hasattr(delay, "total_seconds"):
+        return delay.total_seconds()
+    return float(delay)
+
+
+class TokenBucket:
+    """Token bucket limiting the overall send rate."""
+
+    def __init__(self, rate: float, capacity: float = None):
+        """Initialize the TokenBucket.
+
+        Args:
+            rate: Tokens added per second
+            capacity: Maximum burst size, defaults to one second of tokens
+        """
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else rate
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def take(self, now: float = None) -> float:
+        """Take one token.
+
+        Returns:
+            float: 0 if a token was taken, otherwise seconds until one is available
+        """
+        now = time.monotonic() if now is None else now
+        # A clock set back refills nothing instead of draining the bucket
+        elapsed = max(0.0, now - self.updated)
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class _Job:
+    """Queued outbound API call."""
+
+    __slots__ = ("chat_id", "priority", "call", "future", "attempts")
+
+    def __init__(
+        self,
+        chat_id: int,
+        priority: int,
+        call: Callable[[], Awaitable[Any]],
+        future: asyncio.Future,
+    ):
+        """Initialize the _Job."""
+        self.chat_id = chat_id
+        self.priority = priority
+        self.call = call
+        self.future = future
+        self.attempts = 0
+
+
+class MessageDispatcher:
+    """Central outbound queue for Telegram API calls.
+
+    Calls are grouped per chat and per priority. The sender loop serves
+    priorities in order and rotates between chats within a priority, so one
+    busy chat cannot starve the others. Each chat has at most one call in
+    flight and waits ``chat_interval`` seconds between calls, and all chats
+    share a global token bucket; with a shared state store, ``shared_limit``
+    also caps the rate of all replicas together. A ``RetryAfter`` pauses all
+    sending for the requested delay and requeues the call at the front of
+    its chat.
+    """
+
+    def __init__(
+        self,
+        rate: float = 30,
+        chat_interval: float = 1.0,
+        max_in_flight: int = 30,
+        max_retries: int = 3,
+    ):
+        """Initialize the MessageDispatcher.
+
+        Args:
+            rate: Global messages per second
+            chat_interval: Minimum seconds between calls to the same chat
+            max_in_flight: Maximum number of concurrent API calls
+            max_retries: Attempts allowed after a RetryAfter before giving up
+        """
+        self.bucket = TokenBucket(rate)
+        # Rate limit shared with other replicas, set by the timer service
+        self.shared_limit = None
+        self.chat_interval = chat_interval
+        self.max_retries = max_retries
+        self.bot: Optional[Bot] = None
+        # priority -> chat_id -> queued jobs
+        self._queues: Dict[int, Dict[int, Deque[_Job]]] = {p: {} for p in PRIORITIES}
+        # priority -> round-robin order of chats with queued jobs
+        self._rotation: Dict[int, Deque[int]] = {p: deque() for p in PRIORITIES}
+        self._chat_ready_at: Dict[int, float] = {}
+        self._paused_until = 0.0
+        self._in_flight = 0
+        self._max_in_flight = max_in_flight
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._deliveries: set = set()
+
+        # Metrics
+        self.sent = 0
+        self.failed = 0
+        self.retried = 0
+        self.batches = 0
+        self.last_batch_size = 0
+        self.max_batch_size = 0
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of calls waiting to be sent."""
+        return sum(
+            len(jobs) for queues in self._queues.values() for jobs in queues.values()
+        )
+
+    @property
+    def metrics(self) -> dict:
+        """Snapshot of the dispatcher metrics."""
+        return {
+            "queue_depth": self.queue_depth,
+            "in_flight": self._in_flight,
+            "sent": self.sent,
+            "failed": self.failed,
+            "retried": self.retried,
+            "batches": self.batches,
+            "last_batch_size": self.last_batch_size,
+            "max_batch_size": self.max_batch_size,
+        }
+
+    def start(self, bot: Bot):
+        """Start the sender loop in the running event loop.
+
+        Args:
+            bot: Bot used by send_message
+        """
+        self.bot = bot
+        if self._task is not None:
+            return
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self, timeout: float = 5.0):
+        """Send what is still queued, waiting at most ``timeout`` seconds."""
+        if self._task is None:
+            return
+        deadline = time.monotonic() + timeout
+        while (self.queue_depth or self._in_flight) and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        self._wakeup = None
+
+    def submit(
+        self,
+        chat_id: int,
+        call: Callable[[], Awaitable[Any]],
+        priority: int = INFO_PRIORITY,
+    ) -> asyncio.Future:
+        """Queue an API call for a chat.
+
+        Args:
+            chat_id: Chat the call is addressed to
+            call: Factory creating the API call coroutine
+            priority: TIMER_PRIORITY or INFO_PRIORITY
+
+        Returns:
+            asyncio.Future: Resolves with the call result, or None if it failed
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._enqueue(_Job(chat_id, priority, call, future))
+        return future
+
+    def send_message(
+        self,
+        chat_id: int,
+        text: str,
+        reply_markup: InlineKeyboardMarkup = None,
+        priority: int = INFO_PRIORITY,
+    ) -> asyncio.Future:
+        """Queue a text message through the dispatcher's bot."""
+        return self.submit(
+            chat_id,
+            lambda: self.bot.send_message(
+                chat_id=chat_id, text=text, reply_markup=reply_markup
+            ),
+            priority,
+        )
+
+    def _enqueue(self, job: _Job, front: bool = False):
+        """Add a job to its chat queue and wake the sender."""
+        queues = self._queues[job.priority]
+        jobs = queues.get(job.chat_id)
+        if jobs is None:
+            jobs = queues[job.chat_id] = deque()
+            self._rotation[job.priority].append(job.chat_id)
+        if front:
+            jobs.appendleft(job)
+        else:
+            jobs.append(job)
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def _next_job(self, now: float) -> Optional[_Job]:
+        """Pop the next job whose chat may be sent to now."""
+        for priority in PRIORITIES:
+            rotation = self._rotation[priority]
+            queues = self._queues[priority]
+            for _ in range(len(rotation)):
+                chat_id = rotation[0]
+                rotation.rotate(-1)
+                if self._chat_ready_at.get(chat_id, 0.0) > now:
+                    continue
+                jobs = queues[chat_id]
+                job = jobs.popleft()
+                if not jobs:
+                    # The chat was just rotated to the back
+                    del queues[chat_id]
+                    rotation.pop()
+                return job
+        return None
+
+    def _next_ready_delay(self, now: float) -> Optional[float]:
+        """Get seconds until some queued chat may be sent to again."""
+        ready_at = [
+            self._chat_ready_at.get(chat_id, 0.0)
+            for rotation in self._rotation.values()
+            for chat_id in rotation
+        ]
+        # Chats with a call in flight are woken up when the call finishes
+        ready_at = [value for value in ready_at if value != float("inf")]
+        if not ready_at:
+            return None
+        return max(0.0, min(ready_at) - now)
+
+    def _forget_idle_chats(self, now: float):
+        """Drop per-chat pacing state that no longer delays anything."""
+        self._chat_ready_at = {
+            chat_id: ready_at
+            for chat_id, ready_at in self._chat_ready_at.items()
+            if ready_at > now
+        }
+
+    async def _run(self):
+        """Send queued jobs as fast as the limits allow."""
+        while True:
+            self._wakeup.clear()
+            now = time.monotonic()
+            if self._paused_until > now:
+                await asyncio.sleep(self._paused_until - now)
+                continue
+
+            batch = 0
+            while self._in_flight < self._max_in_flight:
+                wait = self.bucket.take()
+                if wait:
+                    await asyncio.sleep(wait)
+                    continue
+                if self.shared_limit is not None and any(self._rotation.values()):
+                    await self._take_shared()
+                job = self._next_job(time.monotonic())
+                if job is None:
+                    # Nothing sendable, so give the token back
+                    self.bucket.tokens = min(
+                        self.bucket.capacity, self.bucket.tokens + 1
+                    )
+                    break
+                self._start_delivery(job)
+                batch += 1
+                if self._paused_until > time.monotonic():
+                    break
+
+            if batch:
+                self.batches += 1
+                self.last_batch_size = batch
+                self.max_batch_size = max(self.max_batch_size, batch)
+
+            now = time.monotonic()
+            delay = None
+            if self._in_flight < self._max_in_flight:
+                delay = self._next_ready_delay(now)
+            if not any(self._rotation.values()):
+                self._forget_idle_chats(now)
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _take_shared(self):
+        """Wait for the rate limit shared with other replicas.
+
+        If the store is unreachable, only the local bucket limits sending.
+        """
+        while True:
+            try:
+                wait = await self.shared_limit.take()
+            except Exception as e:
+                logger.warning(f"Shared rate limit unavailable: {e}")
+                return
+            if not wait:
+                return
+            await asyncio.sleep(wait)
+
+    def _start_delivery(self, job: _Job):
+        """Run a job in the background, blocking its chat until it is done."""
+        self._in_flight += 1
+        self._chat_ready_at[job.chat_id] = float("inf")
+        task = asyncio.create_task(self._deliver(job))
+        self._deliveries.add(task)
+        task.add_done_callback(self._deliveries.discard)
+
+    async def _deliver(self, job: _Job):
+        """Perform one API call and settle its future."""
+        job.attempts += 1
+        requeue = False
+        try:
+            result = await job.call()
+        except RetryAfter as e:
+            delay = retry_after_seconds(e)
+            self.retried += 1
+            self._paused_until = max(self._paused_until, time.monotonic() + delay)
+            logger.warning(f"Flood control for chat {job.chat_id}, retry in {delay}s")
+            requeue = job.attempts <= self.max_retries
+            if not requeue:
+                self._fail(job, e)
+        except Exception as e:
+            self._fail(job, e)
+        else:
+            self.sent += 1
+            if not job.future.done():
+                job.future.set_result(result)
+        finally:
+            self._in_flight -= 1
+            self._chat_ready_at[job.chat_id] = time.monotonic() + self.chat_interval
+            if requeue:
+                self._enqueue(job, front=True)
+            elif self._wakeup is not None:
+                self._wakeup.set()
+
+    def _fail(self, job: _Job, error: Exception):
+        """Record a failed job."""
+        self.failed += 1
+        logger.error(f"Failed to send to chat {job.chat_id}: {error}")
+        if not job.future.done():
+            job.future.set_result(None)
+
+
+# Create a singleton instance
+dispatcher = MessageDispatcher(
+    rate=config.TELEGRAM_RATE_LIMIT,
+    chat_interval=config.TELEGRAM_CHAT_INTERVAL,
+    max_in_flight=config.TELEGRAM_MAX_IN_FLIGHT,
+)
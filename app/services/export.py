@@ -0,0 +1,306 @@
+"""Incremental export of users and pomodoro sessions for offline analysis.
+
+Rows are read in keyset pages ordered by ``(updated_at, id)``, so each page
+is an index range scan of ix_<table>_updated_at_id and memory stays bounded
+by the page size whatever the table size. Pages are appended to Parquet
+files as row groups, or to CSV files when pyarrow is not installed. After
+each finished file the ``(updated_at, id)`` of its last row is saved as the
+table's watermark, and the next export only reads rows changed after it.
+
+Names of users are not exported.
+"""
+
+import csv
+import json
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import DateTime, Select, and_, or_, select
+
+from app.db.models import PomodoroSession, User
+
+logger = logging.getLogger(__name__)
+
+PARQUET = "parquet"
+CSV = "csv"
+
+# Rows changed this recently are left for the next export: transactions
+# still in flight may yet commit rows with an older updated_at
+EXPORT_LAG_SECONDS = 60
+
+WATERMARKS_FILE = "watermarks.json"
+
+# Exported table name -> model and columns; the model's id and updated_at
+# must be among them
+EXPORT_TABLES = {
+    "users": (
+        User,
+        (User.id, User.telegram_id, User.timezone, User.created_at, User.updated_at),
+    ),
+    "sessions": (
+        PomodoroSession,
+        (
+            PomodoroSession.id,
+            PomodoroSession.user_id,
+            PomodoroSession.work_minutes,
+            PomodoroSession.break_minutes,
+            PomodoroSession.start_time,
+            PomodoroSession.end_time,
+            PomodoroSession.completed,
+            PomodoroSession.updated_at,
+        ),
+    ),
+}
+
+
+class Watermark(NamedTuple):
+    """Position of the last exported row of a table."""
+
+    updated_at: datetime
+    id: int
+
+
+class ExportResult(NamedTuple):
+    """Outcome of exporting one table."""
+
+    rows: int
+    files: List[str]
+    watermark: Optional[Watermark]
+
+
+def resolve_format(fmt: str) -> str:
+    """Get the format to write, falling back to CSV without pyarrow."""
+    if fmt != PARQUET:
+        return fmt
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        logger.warning("pyarrow is not installed, exporting CSV instead")
+        return CSV
+    return PARQUET
+
+
+def changed_rows_query(
+    model, columns: tuple, after: Optional[Watermark], until: datetime, limit: int
+) -> Select:
+    """Select the next keyset page of rows changed after a watermark.
+
+    Args:
+        model: User or PomodoroSession
+        columns: Columns to select
+        after: Watermark of the previous page, None to start from the oldest row
+        until: Rows changed at or after this time are left out
+        limit: Page size
+
+    Returns:
+        Select: Query of the page, ordered by (updated_at, id)
+    """
+    query = select(*columns).where(model.updated_at < until)
+    if after is not None:
+        query = query.where(
+            or_(
+                model.updated_at > after.updated_at,
+                and_(model.updated_at == after.updated_at, model.id > after.id),
+            )
+        )
+    return query.order_by(model.updated_at, model.id).limit(limit)
+
+
+def iter_pages(
+    session,
+    model,
+    columns: tuple,
+    after: Optional[Watermark],
+    until: datetime,
+    page_size: int,
+) -> Iterator[List[tuple]]:
+    """Yield keyset pages of changed rows, each read by its own query."""
+    while True:
+        rows = session.execute(
+            changed_rows_query(model, columns, after, until, page_size)
+        ).all()
+        if not rows:
+            return
+        yield rows
+        if len(rows) < page_size:
+            return
+        after = Watermark(rows[-1].updated_at, rows[-1].id)
+
+
+class CsvChunkWriter:
+    """Write pages of rows to a CSV file with a header line."""
+
+    extension = "csv"
+
+    def __init__(self, path: str, columns: tuple):
+        """Initialize the CsvChunkWriter.
+
+        Args:
+            path: File to create
+            columns: Columns of the rows, in order
+        """
+        self._file = open(path, "w", newline="")
+        self._writer = csv.writer(self._file)
+        self._writer.writerow([column.key for column in columns])
+
+    def write(self, rows: List[tuple]):
+        """Append a page of rows."""
+        self._writer.writerows(
+            [
+                [
+                    value.isoformat() if isinstance(value, datetime) else value
+                    for value in row
+                ]
+                for row in rows
+            ]
+        )
+
+    def close(self):
+        """Finish the file."""
+        self._file.close()
+
+
+class ParquetChunkWriter:
+    """Write pages of rows to a Parquet file, one row group per page."""
+
+    extension = "parquet"
+
+    def __init__(self, path: str, columns: tuple):
+        """Initialize the ParquetChunkWriter.
+
+        Args:
+            path: File to create
+            columns: Columns of the rows, in order
+        """
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self._pa = pa
+        self._schema = pa.schema(
+            [(column.key, self._arrow_type(column)) for column in columns]
+        )
+        self._writer = pq.ParquetWriter(path, self._schema, compression="zstd")
+
+    def _arrow_type(self, column):
+        """Get the Arrow type of a timestamp, text or integer column."""
+        if isinstance(column.type, DateTime):
+            return self._pa.timestamp("us")
+        if column.type.python_type is str:
+            return self._pa.string()
+        return self._pa.int64()
+
+    def write(self, rows: List[tuple]):
+        """Append a page of rows as a row group."""
+        arrays = [
+            self._pa.array([row[index] for row in rows], type=field.type)
+            for index, field in enumerate(self._schema)
+        ]
+        self._writer.write_table(
+            self._pa.Table.from_arrays(arrays, schema=self._schema)
+        )
+
+    def close(self):
+        """Finish the file."""
+        self._writer.close()
+
+
+WRITERS = {PARQUET: ParquetChunkWriter, CSV: CsvChunkWriter}
+
+
+def load_watermarks(output_dir: str) -> Dict[str, Watermark]:
+    """Read the watermarks of the previous exports to a directory."""
+    path = os.path.join(output_dir, WATERMARKS_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as file:
+        stored = json.load(file)
+    return {
+        table: Watermark(datetime.fromisoformat(value["updated_at"]), value["id"])
+        for table, value in stored.items()
+    }
+
+
+def save_watermark(output_dir: str, table: str, watermark: Watermark):
+    """Record the last exported row of a table, replacing the file atomically."""
+    stored = {
+        name: {"updated_at": value.updated_at.isoformat(), "id": value.id}
+        for name, value in load_watermarks(output_dir).items()
+    }
+    stored[table] = {"updated_at": watermark.updated_at.isoformat(), "id": watermark.id}
+    path = os.path.join(output_dir, WATERMARKS_FILE)
+    with open(f"{path}.tmp", "w") as file:
+        json.dump(stored, file, indent=2)
+    os.replace(f"{path}.tmp", path)
+
+
+def export_table(
+    session,
+    table: str,
+    output_dir: str,
+    fmt: str = PARQUET,
+    page_size: int = 50_000,
+    rows_per_file: int = 1_000_000,
+    full: bool = False,
+    now: Optional[datetime] = None,
+) -> ExportResult:
+    """Export the rows of a table changed since its watermark.
+
+    Files are named ``<table>/part-<run>-<n>.<ext>`` and written under a
+    temporary name until complete; the watermark moves after each file.
+
+    Args:
+        session: Synchronous database session
+        table: Key of EXPORT_TABLES
+        output_dir: Directory of the export files and watermarks
+        fmt: PARQUET or CSV
+        page_size: Rows read per query and written per row group
+        rows_per_file: Rows after which a new file is started
+        full: Ignore the watermark and export all rows
+        now: Naive UTC time of the export, defaults to the current time
+
+    Returns:
+        ExportResult: Rows and files written and the new watermark
+    """
+    model, columns = EXPORT_TABLES[table]
+    writer_class = WRITERS[fmt]
+    now = now or datetime.utcnow()
+    until = now - timedelta(seconds=EXPORT_LAG_SECONDS)
+    watermark = None if full else load_watermarks(output_dir).get(table)
+    table_dir = os.path.join(output_dir, table)
+    os.makedirs(table_dir, exist_ok=True)
+    run = now.strftime("%Y%m%dT%H%M%S")
+
+    rows_written = 0
+    files: List[str] = []
+    current: Optional[Tuple[object, str]] = None
+    file_rows = 0
+
+    def finish():
+        """Publish the current file and move the watermark past it."""
+        writer, path = current
+        writer.close()
+        os.replace(f"{path}.tmp", path)
+        files.append(path)
+        save_watermark(output_dir, table, watermark)
+
+    for rows in iter_pages(session, model, columns, watermark, until, page_size):
+        if current is None:
+            path = os.path.join(
+                table_dir, f"part-{run}-{len(files) + 1:05d}.{writer_class.extension}"
+            )
+            current = (writer_class(f"{path}.tmp", columns), path)
+        current[0].write(rows)
+        rows_written += len(rows)
+        file_rows += len(rows)
+        watermark = Watermark(rows[-1].updated_at, rows[-1].id)
+        if file_rows >= rows_per_file:
+            finish()
+            current = None
+            file_rows = 0
+    if current is not None:
+        finish()
+
+    logger.info(f"Exported {rows_written} {table} rows to {len(files)} files")
+    return ExportResult(rows_written, files, watermark)
@@ -0,0 +1,231 @@
+"""Queue-based webhook ingestion for the Pomodoro bot."""
+
+import asyncio
+import hmac
+import json
+import logging
+import time
+import zlib
+from typing import List, Optional, Tuple
+
+import tornado.httpserver
+import tornado.web
+from telegram import Update
+
+logger = logging.getLogger(__name__)
+
+SECRET_TOKEN_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+
+def update_chat_id(data: dict) -> Optional[int]:
+    """Get the chat a raw update belongs to without parsing it.
+
+    Args:
+        data: Update as decoded from the webhook JSON
+
+    Returns:
+        int: Chat ID, the sender's ID for chatless updates, or None
+    """
+    for value in data.values():
+        if not isinstance(value, dict):
+            continue
+        chat = value.get("chat") or (value.get("message") or {}).get("chat")
+        if chat:
+            return chat.get("id")
+        sender = value.get("from") or value.get("user")
+        if sender:
+            return sender.get("id")
+    return None
+
+
+class UpdateIngestor:
+    """Accept webhook updates quickly and process them on a pool of consumers.
+
+    Updates are partitioned by chat over one bounded queue per consumer, so
+    updates of the same chat are processed one at a time in arrival order
+    while different chats run concurrently. When a partition is full the
+    request waits up to ``enqueue_timeout`` for room and is then answered
+    with 503, which makes Telegram deliver the update again later.
+    """
+
+    def __init__(
+        self,
+        application,
+        consumers: int = 8,
+        queue_size: int = 1000,
+        enqueue_timeout: float = 1.0,
+        secret_token: Optional[str] = None,
+    ):
+        """Initialize the UpdateIngestor.
+
+        Args:
+            application: Initialized application processing the updates
+            consumers: Number of concurrent consumers
+            queue_size: Total number of updates buffered over all partitions
+            enqueue_timeout: Seconds a request may wait for a full partition
+            secret_token: Expected X-Telegram-Bot-Api-Secret-Token, if any
+        """
+        self.application = application
+        self.enqueue_timeout = enqueue_timeout
+        self.secret_token = secret_token
+        partition_size = max(1, queue_size // max(1, consumers))
+        self._queues: List[asyncio.Queue] = [
+            asyncio.Queue(maxsize=partition_size) for _ in range(max(1, consumers))
+        ]
+        self._consumers: List[asyncio.Task] = []
+        self._server: Optional[tornado.httpserver.HTTPServer] = None
+
+        # Metrics
+        self.received = 0
+        self.unauthorized = 0
+        self.blocked = 0
+        self.rejected = 0
+        self.processed = 0
+        self.failed = 0
+        self.max_queue_depth = 0
+        self.last_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of updates waiting for a consumer."""
+        return sum(queue.qsize() for queue in self._queues)
+
+    @property
+    def metrics(self) -> dict:
+        """Snapshot of the ingestion metrics."""
+        return {
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+            "received": self.received,
+            "unauthorized": self.unauthorized,
+            "blocked": self.blocked,
+            "rejected": self.rejected,
+            "processed": self.processed,
+            "failed": self.failed,
+            "last_wait_seconds": self.last_wait_seconds,
+            "max_wait_seconds": self.max_wait_seconds,
+        }
+
+    def authorized(self, token: Optional[str]) -> bool:
+        """Check the secret token sent with a webhook request."""
+        if not self.secret_token:
+            return True
+        return token is not None and hmac.compare_digest(token, self.secret_token)
+
+    def _partition(self, data: dict) -> asyncio.Queue:
+        """Get the queue of the chat an update belongs to."""
+        key = update_chat_id(data)
+        if key is None:
+            key = data.get("update_id", 0)
+        return self._queues[zlib.crc32(str(key).encode()) % len(self._queues)]
+
+    async def put(self, data: dict) -> bool:
+        """Queue a raw update for processing.
+
+        Args:
+            data: Update as decoded from the webhook JSON
+
+        Returns:
+            bool: False if the partition stayed full for ``enqueue_timeout``
+        """
+        self.received += 1
+        queue = self._partition(data)
+        item: Tuple[dict, float] = (data, time.monotonic())
+        if queue.full():
+            self.blocked += 1
+        try:
+            await asyncio.wait_for(queue.put(item), self.enqueue_timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            return False
+        self.max_queue_depth = max(self.max_queue_depth, self.queue_depth)
+        return True
+
+    async def _consume(self, queue: asyncio.Queue):
+        """Process the updates of one partition in order."""
+        while True:
+            data, queued_at = await queue.get()
+            self.last_wait_seconds = time.monotonic() - queued_at
+            self.max_wait_seconds = max(self.max_wait_seconds, self.last_wait_seconds)
+            try:
+                update = Update.de_json(data, self.application.bot)
+                await self.application.process_update(update)
+                self.processed += 1
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"Error processing update: {e}", exc_info=True)
+            finally:
+                queue.task_done()
+
+    def start_consumers(self):
+        """Start the consumers in the running event loop."""
+        if not self._consumers:
+            self._consumers = [
+                asyncio.create_task(self._consume(queue)) for queue in self._queues
+            ]
+
+    def start(self, listen: str, port: int, url_path: str = "webhook"):
+        """Start the consumers and the webhook HTTP server.
+
+        Args:
+            listen: Address to listen on
+            port: Port to listen on
+            url_path: Path Telegram posts updates to
+        """
+        self.start_consumers()
+        app = tornado.web.Application(
+            [(f"/{url_path.strip('/')}", WebhookHandler, {"ingestor": self})]
+        )
+        self._server = tornado.httpserver.HTTPServer(app)
+        self._server.listen(port, address=listen)
+        logger.info(f"Webhook ingestion listening on {listen}:{port}/{url_path}")
+
+    async def stop(self, timeout: float = 10.0):
+        """Stop accepting updates and finish the queued ones.
+
+        Args:
+            timeout: Seconds to wait for the queues to drain
+        """
+        if self._server is not None:
+            self._server.stop()
+            self._server = None
+        try:
+            await asyncio.wait_for(
+                asyncio.gather(*(queue.join() for queue in self._queues)), timeout
+            )
+        except asyncio.TimeoutError:
+            logger.warning(f"Dropping {self.queue_depth} queued updates on shutdown")
+        for task in self._consumers:
+            task.cancel()
+        await asyncio.gather(*self._consumers, return_exceptions=True)
+        self._consumers = []
+
+
+class WebhookHandler(tornado.web.RequestHandler):
+    """Validate webhook requests and hand the updates to an UpdateIngestor."""
+
+    def initialize(self, ingestor: UpdateIngestor):
+        """Initialize the WebhookHandler."""
+        self.ingestor = ingestor
+
+    async def post(self):
+        """Acknowledge an update as soon as it is queued."""
+        if not self.ingestor.authorized(self.request.headers.get(SECRET_TOKEN_HEADER)):
+            self.ingestor.unauthorized += 1
+            self.send_error(403)
+            return
+        try:
+            data = json.loads(self.request.body)
+        except ValueError:
+            self.send_error(400)
+            return
+        if not isinstance(data, dict):
+            self.send_error(400)
+            return
+        if not await self.ingestor.put(data):
+            # Telegram retries the update later
+            self.send_error(503)
+            return
+        self.set_status(200)
+        self.finish()
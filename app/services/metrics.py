@@ -0,0 +1,574 @@
+"""Prometheus-style metrics for the Pomodoro bot.
+
+Metrics live in process memory and are rendered in the Prometheus text
+format when scraped. Updating one is a dict lookup and an addition, so
+instrumentation stays on in production. Everything runs on the event loop
+thread, so no locking is needed.
+"""
+
+import asyncio
+import functools
+import logging
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import tornado.httpserver
+import tornado.web
+from sqlalchemy import event
+from telegram import Update
+from telegram.request import HTTPXRequest
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds in seconds
+LATENCY_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+LATENESS_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Callback data reported under its own label, anything else is "other"
+CALLBACK_KINDS = frozenset({"custom", "skip_break", "next_round_yes", "next_round_no"})
+
+Labels = Tuple[str, ...]
+
+
+def _format_value(value: float) -> str:
+    """Format a sample value the way Prometheus expects."""
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    """Format a label set, e.g. ``{handler="/start"}``."""
+    if not names:
+        return ""
+    pairs = []
+    for name, value in zip(names, values):
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"')
+        pairs.append(f'{name}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+class _CounterValue:
+    """Value of one label set of a counter."""
+
+    __slots__ = ("value",)
+
+    def __init__(self):
+        """Initialize the _CounterValue."""
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0):
+        """Add to the counter."""
+        self.value += amount
+
+
+class _GaugeValue:
+    """Value of one label set of a gauge."""
+
+    __slots__ = ("value", "function")
+
+    def __init__(self):
+        """Initialize the _GaugeValue."""
+        self.value = 0.0
+        self.function: Optional[Callable[[], float]] = None
+
+    def set(self, value: float):
+        """Set the gauge."""
+        self.value = value
+
+    def inc(self, amount: float = 1.0):
+        """Add to the gauge."""
+        self.value += amount
+
+    def dec(self, amount: float = 1.0):
+        """Subtract from the gauge."""
+        self.value -= amount
+
+    def set_function(self, function: Callable[[], float]):
+        """Read the gauge from ``function`` whenever it is scraped."""
+        self.function = function
+
+    def get(self) -> float:
+        """Get the current value."""
+        return self.function() if self.function is not None else self.value
+
+
+class _HistogramValue:
+    """Bucket counts of one label set of a histogram."""
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Sequence[float]):
+        """Initialize the _HistogramValue."""
+        self.buckets = buckets
+        # The last slot counts observations above the largest bucket
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        """Record one observation."""
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class _Metric:
+    """Named metric with an optional set of label names."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        """Initialize the metric.
+
+        Args:
+            name: Metric name
+            documentation: Help text
+            labelnames: Names of the labels, given in this order to ``labels``
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Labels, object] = {}
+        if not self.labelnames:
+            self._values[()] = self._new_value()
+
+    def _new_value(self):
+        """Create the value of a new label set."""
+        raise NotImplementedError
+
+    def labels(self, *values: str):
+        """Get the value of a label set, creating it on first use."""
+        value = self._values.get(values)
+        if value is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            value = self._values[values] = self._new_value()
+        return value
+
+    def _samples(self, labels: Labels, value) -> List[str]:
+        """Render the sample lines of one label set."""
+        raise NotImplementedError
+
+    def expose(self) -> List[str]:
+        """Render the metric in the Prometheus text format."""
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        for labels, value in list(self._values.items()):
+            lines.extend(self._samples(labels, value))
+        return lines
+
+
+class Counter(_Metric):
+    """Monotonically increasing count."""
+
+    kind = "counter"
+
+    def _new_value(self) -> _CounterValue:
+        """Create the value of a new label set."""
+        return _CounterValue()
+
+    def inc(self, amount: float = 1.0):
+        """Add to an unlabelled counter."""
+        self._values[()].inc(amount)
+
+    def _samples(self, labels: Labels, value: _CounterValue) -> List[str]:
+        """Render the sample line of one label set."""
+        label_text = _format_labels(self.labelnames, labels)
+        return [f"{self.name}{label_text} {_format_value(value.value)}"]
+
+
+class Gauge(_Metric):
+    """Value that can go up and down."""
+
+    kind = "gauge"
+
+    def _new_value(self) -> _GaugeValue:
+        """Create the value of a new label set."""
+        return _GaugeValue()
+
+    def set(self, value: float):
+        """Set an unlabelled gauge."""
+        self._values[()].set(value)
+
+    def set_function(self, function: Callable[[], float]):
+        """Read an unlabelled gauge from ``function`` whenever it is scraped."""
+        self._values[()].set_function(function)
+
+    def _samples(self, labels: Labels, value: _GaugeValue) -> List[str]:
+        """Render the sample line of one label set."""
+        label_text = _format_labels(self.labelnames, labels)
+        return [f"{self.name}{label_text} {_format_value(value.get())}"]
+
+
+class Histogram(_Metric):
+    """Distribution of observations over fixed buckets."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ):
+        """Initialize the Histogram.
+
+        Args:
+            name: Metric name
+            documentation: Help text
+            labelnames: Names of the labels, given in this order to ``labels``
+            buckets: Sorted upper bounds of the buckets
+        """
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_value(self) -> _HistogramValue:
+        """Create the value of a new label set."""
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value: float):
+        """Record one observation of an unlabelled histogram."""
+        self._values[()].observe(value)
+
+    def _samples(self, labels: Labels, value: _HistogramValue) -> List[str]:
+        """Render the bucket, sum and count lines of one label set."""
+        names = self.labelnames + ("le",)
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), value.counts):
+            cumulative += count
+            label_text = _format_labels(names, labels + (_format_value(bound),))
+            lines.append(f"{self.name}_bucket{label_text} {cumulative}")
+        label_text = _format_labels(self.labelnames, labels)
+        lines.append(f"{self.name}_sum{label_text} {_format_value(value.sum)}")
+        lines.append(f"{self.name}_count{label_text} {value.count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Collection of metrics rendered together when scraped."""
+
+    def __init__(self):
+        """Initialize the MetricsRegistry."""
+        self._metrics: Dict[str, _Metric] = {}
+        # prefix -> function returning a snapshot of component metrics
+        self._collectors: Dict[str, Callable[[], dict]] = {}
+
+    def _register(self, metric: _Metric) -> _Metric:
+        """Add a metric, refusing duplicate names."""
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(
+        self, name: str, documentation: str, labelnames: Sequence[str] = ()
+    ) -> Counter:
+        """Create and register a counter."""
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(
+        self, name: str, documentation: str, labelnames: Sequence[str] = ()
+    ) -> Gauge:
+        """Create and register a gauge."""
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> Histogram:
+        """Create and register a histogram."""
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def add_collector(self, prefix: str, function: Callable[[], dict]):
+        """Export the ``metrics`` snapshot of a component as gauges.
+
+        Args:
+            prefix: Prefix of the exported names, e.g. ``pomodoro_dispatcher``
+            function: Returns a mapping of metric names to numbers
+        """
+        self._collectors[prefix] = function
+
+    def expose(self) -> str:
+        """Render all metrics in the Prometheus text format."""
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.expose())
+        for prefix, function in list(self._collectors.items()):
+            try:
+                snapshot = function()
+            except Exception as e:
+                logger.error(f"Error collecting {prefix} metrics: {e}")
+                continue
+            for key, value in snapshot.items():
+                name = f"{prefix}_{key}"
+                lines.append(f"# TYPE {name} gauge")
+                lines.append(f"{name} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+# Create a singleton instance
+registry = MetricsRegistry()
+
+HANDLER_SECONDS = registry.histogram(
+    "pomodoro_handler_seconds",
+    "Time spent in update handlers",
+    ["handler"],
+)
+HANDLER_ERRORS = registry.counter(
+    "pomodoro_handler_errors_total",
+    "Update handlers that raised an exception",
+    ["handler"],
+)
+ACTIVE_TIMERS = registry.gauge(
+    "pomodoro_active_timers",
+    "Timers armed in this process",
+)
+TIMER_LATENESS_SECONDS = registry.histogram(
+    "pomodoro_timer_lateness_seconds",
+    "Time between a timer's deadline and the moment it fired",
+    ["phase"],
+    buckets=LATENESS_BUCKETS,
+)
+DB_QUERY_SECONDS = registry.histogram(
+    "pomodoro_db_query_seconds",
+    "Database statement execution time",
+    ["statement"],
+)
+DB_ERRORS = registry.counter(
+    "pomodoro_db_errors_total",
+    "Database statements that raised an error",
+)
+TELEGRAM_REQUEST_SECONDS = registry.histogram(
+    "pomodoro_telegram_request_seconds",
+    "Bot API call latency",
+    ["method"],
+)
+TELEGRAM_ERRORS = registry.counter(
+    "pomodoro_telegram_errors_total",
+    "Bot API calls that failed, by HTTP status or 'network'",
+    ["method", "status"],
+)
+TELEGRAM_THROTTLED = registry.counter(
+    "pomodoro_telegram_throttled_total",
+    "Bot API calls answered with 429 Too Many Requests",
+    ["method"],
+)
+EVENT_LOOP_LAG_SECONDS = registry.histogram(
+    "pomodoro_event_loop_lag_seconds",
+    "Delay of event loop wake-ups past their scheduled time",
+)
+STARTUP_SECONDS = registry.gauge(
+    "pomodoro_startup_seconds",
+    "Duration of each startup phase of this process",
+    ["phase"],
+)
+
+
+def handler_label(name: str, update: object) -> str:
+    """Get the handler label of an update.
+
+    Callback queries are labelled by the kind of button pressed, so presets
+    with different durations share one label.
+    """
+    if isinstance(update, Update) and update.callback_query is not None:
+        data = update.callback_query.data or ""
+        if data.startswith("preset_"):
+            return f"{name}:preset"
+        return f"{name}:{data if data in CALLBACK_KINDS else 'other'}"
+    return name
+
+
+def instrument_handler(name: str, callback):
+    """Wrap a handler callback to record its latency and errors.
+
+    Args:
+        name: Handler label, e.g. ``/start`` or ``callback``
+        callback: Handler coroutine function
+
+    Returns:
+        Coroutine function with the same signature
+    """
+
+    @functools.wraps(callback)
+    async def wrapper(update, context):
+        label = handler_label(name, update)
+        started = time.perf_counter()
+        try:
+            return await callback(update, context)
+        except Exception:
+            HANDLER_ERRORS.labels(label).inc()
+            raise
+        finally:
+            HANDLER_SECONDS.labels(label).observe(time.perf_counter() - started)
+
+    return wrapper
+
+
+def _statement_kind(statement: str) -> str:
+    """Get the SQL verb of a statement, e.g. ``SELECT``."""
+    words = statement.split(None, 1)
+    return words[0].upper() if words else "OTHER"
+
+
+def instrument_engine(engine):
+    """Record the latency and errors of statements run on a sync engine.
+
+    Pass ``async_engine.sync_engine`` to instrument an async engine, or the
+    ``Engine`` class to instrument every engine of the process.
+    """
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, many):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, many):
+        started = conn.info["query_started"].pop()
+        DB_QUERY_SECONDS.labels(_statement_kind(statement)).observe(
+            time.perf_counter() - started
+        )
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(context):
+        DB_ERRORS.inc()
+        # after_cursor_execute does not run for a failed statement
+        connection = context.connection
+        if connection is not None and connection.info.get("query_started"):
+            connection.info["query_started"].pop()
+
+
+class InstrumentedRequest(HTTPXRequest):
+    """HTTPXRequest recording latency, errors and 429s of Bot API calls."""
+
+    async def do_request(self, url: str, method: str, *args, **kwargs):
+        """Perform a Bot API call and record its outcome."""
+        api_method = url.rsplit("/", 1)[-1]
+        started = time.perf_counter()
+        try:
+            code, payload = await super().do_request(url, method, *args, **kwargs)
+        except Exception:
+            TELEGRAM_ERRORS.labels(api_method, "network").inc()
+            raise
+        finally:
+            TELEGRAM_REQUEST_SECONDS.labels(api_method).observe(
+                time.perf_counter() - started
+            )
+        if code == 429:
+            TELEGRAM_THROTTLED.labels(api_method).inc()
+        elif code >= 400:
+            TELEGRAM_ERRORS.labels(api_method, str(code)).inc()
+        return code, payload
+
+
+class LoopLagMonitor:
+    """Measure how late the event loop wakes up from short sleeps."""
+
+    def __init__(self, interval: float = 0.5):
+        """Initialize the LoopLagMonitor.
+
+        Args:
+            interval: Seconds between measurements
+        """
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        """Start measuring in the running event loop."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop measuring."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self):
+        """Sleep for the interval and record the overshoot."""
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            EVENT_LOOP_LAG_SECONDS.observe(
+                max(0.0, loop.time() - started - self.interval)
+            )
+
+
+class MetricsHandler(tornado.web.RequestHandler):
+    """Serve a registry in the Prometheus text format."""
+
+    def initialize(self, registry: MetricsRegistry):
+        """Initialize the MetricsHandler."""
+        self.registry = registry
+
+    def get(self):
+        """Render the metrics."""
+        self.set_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.finish(self.registry.expose())
+
+
+class MetricsExporter:
+    """HTTP endpoint for the metrics, together with the loop lag monitor."""
+
+    def __init__(self, registry: MetricsRegistry = registry, interval: float = 0.5):
+        """Initialize the MetricsExporter.
+
+        Args:
+            registry: Metrics to serve
+            interval: Seconds between event loop lag measurements
+        """
+        self.registry = registry
+        self.loop_lag = LoopLagMonitor(interval)
+        self._server: Optional[tornado.httpserver.HTTPServer] = None
+
+    def start(self, listen: str, port: int):
+        """Serve ``/metrics`` and start measuring event loop lag.
+
+        Args:
+            listen: Address to listen on
+            port: Port to listen on
+        """
+        self.loop_lag.start()
+        app = tornado.web.Application(
+            [("/metrics", MetricsHandler, {"registry": self.registry})]
+        )
+        self._server = tornado.httpserver.HTTPServer(app)
+        self._server.listen(port, address=listen)
+        logger.info(f"Metrics listening on {listen}:{port}/metrics")
+
+    async def stop(self):
+        """Stop serving and measuring."""
+        if self._server is not None:
+            self._server.stop()
+            self._server = None
+        await self.loop_lag.stop()
@@ -0,0 +1,206 @@
+"""Paused timers and the lazy persistence of pauses and resumes."""
+
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Dict, NamedTuple, Optional
+
+from sqlalchemy import bindparam
+
+from app.db.models import PendingTimer, get_async_session
+from app.services.scheduler import TimerRecord
+
+logger = logging.getLogger(__name__)
+
+
+class PausedTimer(NamedTuple):
+    """Timer taken off the scheduler with the time it had left."""
+
+    # Record as persisted, with the deadline it had when paused
+    record: TimerRecord
+    remaining: float
+
+
+class PendingChange(NamedTuple):
+    """Latest pause or resume of a timer, not yet written."""
+
+    phase: str
+    # Deadline of the persisted row the change applies to
+    persisted_deadline: float
+    deadline: float
+    # None once resumed
+    remaining: Optional[float]
+
+
+class PauseBuffer:
+    """Collect pauses and resumes of pending timers and write them in bulk.
+
+    Only the latest change of each timer is kept, so pausing and resuming
+    it several times between flushes costs a single UPDATE. Every change
+    applies to the row only if it still holds the phase and deadline the
+    timer had, so a timer restarted or fired meanwhile keeps its newer row.
+    Changes are flushed every ``flush_interval_ms`` milliseconds, before
+    anything reads the rows back and when the buffer is stopped.
+    """
+
+    def __init__(self, flush_interval_ms: int = 500):
+        """Initialize the PauseBuffer.
+
+        Args:
+            flush_interval_ms: Maximum time a change waits before it is written
+        """
+        self.flush_interval = flush_interval_ms / 1000
+        # Telegram user ID -> latest change
+        self._changes: Dict[int, PendingChange] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+
+        # Metrics
+        self.flushes = 0
+        self.flush_failures = 0
+        self.flushed_changes = 0
+        self.coalesced_changes = 0
+
+    def __contains__(self, user_id: int) -> bool:
+        """Check whether a change of the user's timer is waiting."""
+        return user_id in self._changes
+
+    @property
+    def metrics(self) -> dict:
+        """Snapshot of the buffer metrics."""
+        return {
+            "queue_depth": len(self._changes),
+            "flushes": self.flushes,
+            "flush_failures": self.flush_failures,
+            "flushed_changes": self.flushed_changes,
+            "coalesced_changes": self.coalesced_changes,
+        }
+
+    def pause(self, record: TimerRecord, remaining: float):
+        """Queue pausing a running timer.
+
+        Args:
+            record: Record of the timer as it was running
+            remaining: Seconds it had left
+        """
+        self._queue(record, record.deadline, remaining)
+
+    def resume(self, record: TimerRecord, deadline: float):
+        """Queue resuming a paused timer.
+
+        Args:
+            record: Record of the paused timer
+            deadline: New deadline of the timer
+        """
+        self._queue(record, deadline, None)
+
+    def discard(self, user_id: int):
+        """Drop the waiting change of a timer that was replaced or stopped."""
+        self._changes.pop(user_id, None)
+
+    def _queue(self, record: TimerRecord, deadline: float, remaining):
+        """Replace the waiting change of a timer, keeping the row it targets."""
+        previous = self._changes.get(record.user_id)
+        if previous is not None:
+            self.coalesced_changes += 1
+        self._changes[record.user_id] = PendingChange(
+            phase=record.phase,
+            persisted_deadline=(
+                previous.persisted_deadline if previous else record.deadline
+            ),
+            deadline=deadline,
+            remaining=remaining,
+        )
+
+    def start(self):
+        """Start the periodic flusher in the running event loop."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the periodic flusher and write everything still queued."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    async def _run(self):
+        """Flush on a fixed interval."""
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    async def flush(self):
+        """Write all queued changes in a single transaction."""
+        async with self._lock:
+            if not self._changes:
+                return
+            changes, self._changes = self._changes, {}
+            started = time.perf_counter()
+            try:
+                await self._write(changes)
+            except Exception as e:
+                self.flush_failures += 1
+                logger.error(
+                    f"Failed to flush {len(changes)} timer pauses: {e}", exc_info=True
+                )
+                # Changes queued meanwhile are newer, but the row still
+                # holds what the failed change expected
+                for user_id, change in changes.items():
+                    newer = self._changes.get(user_id)
+                    self._changes[user_id] = (
+                        change
+                        if newer is None
+                        else newer._replace(
+                            persisted_deadline=change.persisted_deadline
+                        )
+                    )
+                return
+            self.flushes += 1
+            self.flushed_changes += len(changes)
+            logger.debug(
+                f"Flushed {len(changes)} timer pauses in "
+                f"{(time.perf_counter() - started) * 1000:.1f} ms"
+            )
+
+    @staticmethod
+    async def _write(changes: Dict[int, PendingChange]):
+        """Apply the changes with one executemany UPDATE."""
+        table = PendingTimer.__table__
+        statement = (
+            table.update()
+            .where(
+                table.c.user_id == bindparam("b_user_id"),
+                table.c.phase == bindparam("b_phase"),
+                table.c.deadline == bindparam("b_persisted"),
+            )
+            .values(
+                deadline=bindparam("b_deadline"),
+                remaining_seconds=bindparam("b_remaining"),
+                updated_at=bindparam("b_updated_at"),
+            )
+        )
+        now = datetime.utcnow()
+        async with get_async_session() as session:
+            await session.execute(
+                statement,
+                [
+                    {
+                        "b_user_id": user_id,
+                        "b_phase": change.phase,
+                        "b_persisted": datetime.utcfromtimestamp(
+                            change.persisted_deadline
+                        ),
+                        "b_deadline": datetime.utcfromtimestamp(change.deadline),
+                        "b_remaining": change.remaining,
+                        "b_updated_at": now,
+                    }
+                    for user_id, change in changes.items()
+                ],
+            )
+            await session.commit()
@@ -0,0 +1,384 @@
+"""Database-backed persistence for user_data, chat_data and bot_data."""
+
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, delete, or_, select
+from telegram.ext import BasePersistence, PersistenceInput
+
+from app.db.models import PersistentData, dialect_insert, get_async_session
+
+logger = logging.getLogger(__name__)
+
+USER_SCOPE = "user"
+CHAT_SCOPE = "chat"
+BOT_SCOPE = "bot"
+
+# Bound parameters one statement may take: SQLite before 3.32 allows 999,
+# asyncpg 32767
+MAX_PARAMETERS = {"sqlite": 999, "postgresql": 32767}
+
+# (scope, owner_id)
+Owner = Tuple[str, int]
+
+
+class DatabasePersistence(BasePersistence):
+    """Keep ``context.user_data``, ``chat_data`` and ``bot_data`` in the database.
+
+    Each key is a row of ``persistent_data`` holding a JSON value, so no
+    pickle files are involved and values must be JSON-serializable.
+
+    Application hands over the data of the users and chats seen since the
+    previous run every ``update_interval`` seconds. Each dict is compared with
+    what was last written, only keys that changed or disappeared are staged,
+    and all owners handed over in the same run are written in one
+    transaction.
+
+    User and chat data are loaded on first use by ``refresh_*_data`` instead
+    of all at startup. With ``refresh_always`` they are reloaded before every
+    update, for workers behind a load balancer that may each see any user;
+    concurrent workers only overwrite the keys they changed.
+    """
+
+    def __init__(self, update_interval: float = 5, refresh_always: bool = False):
+        """Initialize the DatabasePersistence.
+
+        Args:
+            update_interval: Seconds between writes of changed data
+            refresh_always: Reload user and chat data before every update
+        """
+        super().__init__(
+            store_data=PersistenceInput(callback_data=False),
+            update_interval=update_interval,
+        )
+        self.refresh_always = refresh_always
+        # Values of each owner's keys as last loaded, written or staged
+        self._flushed: Dict[Owner, Dict[str, Any]] = {}
+        # Staged writes: owner -> changed keys, and owner -> removed keys
+        self._upserts: Dict[Owner, Dict[str, Any]] = {}
+        self._deletes: Dict[Owner, set] = {}
+        self._dropped: set = set()
+        self._flush_task: Optional[asyncio.Task] = None
+        # Whether the scheduled flush already took the staged changes
+        self._flush_started = False
+        self._lock = asyncio.Lock()
+
+        # Metrics
+        self.loads = 0
+        self.flushes = 0
+        self.flush_failures = 0
+        self.rows_written = 0
+        self.rows_deleted = 0
+        self.unchanged_owners = 0
+        self.last_flush_seconds = 0.0
+        self.max_flush_seconds = 0.0
+
+    @property
+    def metrics(self) -> dict:
+        """Snapshot of the persistence metrics."""
+        return {
+            "loads": self.loads,
+            "flushes": self.flushes,
+            "flush_failures": self.flush_failures,
+            "rows_written": self.rows_written,
+            "rows_deleted": self.rows_deleted,
+            "unchanged_owners": self.unchanged_owners,
+            "last_flush_seconds": self.last_flush_seconds,
+            "max_flush_seconds": self.max_flush_seconds,
+        }
+
+    async def _load(self, owner: Owner) -> Dict[str, Any]:
+        """Read an owner's keys and remember them as written."""
+        scope, owner_id = owner
+        async with get_async_session() as session:
+            rows = await session.execute(
+                select(PersistentData.key, PersistentData.value).where(
+                    PersistentData.scope == scope,
+                    PersistentData.owner_id == owner_id,
+                )
+            )
+            data = {key: value for key, value in rows}
+        self.loads += 1
+        self._flushed[owner] = dict(data)
+        return data
+
+    async def _refresh(self, owner: Owner, data: dict):
+        """Fill an owner's dict with its stored keys."""
+        if owner in self._flushed and not self.refresh_always:
+            return
+        previous = self._flushed.get(owner, {})
+        stored = await self._load(owner)
+        # Keys changed since the last write win over the stored ones
+        staged = self._upserts.get(owner, {})
+        for key, value in stored.items():
+            if key not in staged:
+                data[key] = value
+        # Keys another worker deleted
+        for key in previous.keys() - stored.keys() - staged.keys():
+            data.pop(key, None)
+
+    async def get_user_data(self) -> Dict[int, Dict[Any, Any]]:
+        """Start empty, users are loaded by refresh_user_data."""
+        return {}
+
+    async def get_chat_data(self) -> Dict[int, Dict[Any, Any]]:
+        """Start empty, chats are loaded by refresh_chat_data."""
+        return {}
+
+    async def get_bot_data(self) -> Dict[Any, Any]:
+        """Load the bot data."""
+        return await self._load((BOT_SCOPE, 0))
+
+    async def get_callback_data(self) -> None:
+        """Callback data is not stored."""
+        return None
+
+    async def get_conversations(self, name: str) -> dict:
+        """The bot has no persistent conversations."""
+        return {}
+
+    async def update_conversation(self, name: str, key: tuple, new_state: object):
+        """The bot has no persistent conversations."""
+
+    async def update_callback_data(self, data: object):
+        """Callback data is not stored."""
+
+    async def refresh_user_data(self, user_id: int, user_data: dict):
+        """Load a user's data the first time the user is seen."""
+        await self._refresh((USER_SCOPE, user_id), user_data)
+
+    async def refresh_chat_data(self, chat_id: int, chat_data: dict):
+        """Load a chat's data the first time the chat is seen."""
+        await self._refresh((CHAT_SCOPE, chat_id), chat_data)
+
+    async def refresh_bot_data(self, bot_data: dict):
+        """Bot data is loaded once at startup."""
+
+    async def update_user_data(self, user_id: int, data: dict):
+        """Write the keys of a user's data that changed."""
+        await self._update((USER_SCOPE, user_id), data)
+
+    async def update_chat_data(self, chat_id: int, data: dict):
+        """Write the keys of a chat's data that changed."""
+        await self._update((CHAT_SCOPE, chat_id), data)
+
+    async def update_bot_data(self, data: dict):
+        """Write the keys of the bot data that changed."""
+        await self._update((BOT_SCOPE, 0), data)
+
+    async def drop_user_data(self, user_id: int):
+        """Delete all data of a user."""
+        await self._drop((USER_SCOPE, user_id))
+
+    async def drop_chat_data(self, chat_id: int):
+        """Delete all data of a chat."""
+        await self._drop((CHAT_SCOPE, chat_id))
+
+    async def flush(self):
+        """Write everything still staged."""
+        await self._flush()
+
+    def _stage(self, owner: Owner, data: dict) -> bool:
+        """Stage the keys of an owner's data that differ from the last write.
+
+        Returns:
+            bool: True if anything was staged
+        """
+        data = {str(key): value for key, value in data.items()}
+        flushed = self._flushed.get(owner, {})
+        changed = {
+            key: value
+            for key, value in data.items()
+            if key not in flushed or flushed[key] != value
+        }
+        removed = flushed.keys() - data.keys()
+        self._flushed[owner] = data
+        if not changed and not removed:
+            return False
+        upserts = self._upserts.setdefault(owner, {})
+        deletes = self._deletes.setdefault(owner, set())
+        upserts.update(changed)
+        deletes.difference_update(changed)
+        for key in removed:
+            upserts.pop(key, None)
+            deletes.add(key)
+        return True
+
+    async def _update(self, owner: Owner, data: dict):
+        """Stage an owner's changes and wait for them to be written."""
+        if not self._stage(owner, data):
+            self.unchanged_owners += 1
+            return
+        await self._flush_soon()
+
+    async def _drop(self, owner: Owner):
+        """Stage deleting all keys of an owner."""
+        self._flushed.pop(owner, None)
+        self._upserts.pop(owner, None)
+        self._deletes.pop(owner, None)
+        self._dropped.add(owner)
+        await self._flush_soon()
+
+    async def _flush_soon(self):
+        """Write staged changes once everything staged in this run is in.
+
+        Application hands over all owners concurrently, so the first call
+        schedules one flush on the next loop iteration and the rest wait
+        for it.
+        """
+        if self._flush_task is None or self._flush_task.done() or self._flush_started:
+            self._flush_started = False
+            self._flush_task = asyncio.create_task(self._flush(yield_first=True))
+        await asyncio.shield(self._flush_task)
+
+    async def _flush(self, yield_first: bool = False):
+        """Write all staged changes in a single transaction."""
+        if yield_first:
+            await asyncio.sleep(0)
+        async with self._lock:
+            if yield_first:
+                self._flush_started = True
+            if not (self._upserts or self._deletes or self._dropped):
+                return
+            upserts, self._upserts = self._upserts, {}
+            deletes, self._deletes = self._deletes, {}
+            dropped, self._dropped = self._dropped, set()
+
+            started = time.perf_counter()
+            try:
+                written, deleted = await self._write(upserts, deletes, dropped)
+            except Exception as e:
+                self.flush_failures += 1
+                logger.error(f"Failed to write persistent data: {e}", exc_info=True)
+                self._requeue(upserts, deletes, dropped)
+                return
+
+            elapsed = time.perf_counter() - started
+            self.flushes += 1
+            self.rows_written += written
+            self.rows_deleted += deleted
+            self.last_flush_seconds = elapsed
+            self.max_flush_seconds = max(self.max_flush_seconds, elapsed)
+            logger.debug(
+                f"Wrote {written} and deleted {deleted} persistent keys "
+                f"in {elapsed * 1000:.1f} ms"
+            )
+
+    def _requeue(
+        self,
+        upserts: Dict[Owner, Dict[str, Any]],
+        deletes: Dict[Owner, set],
+        dropped: set,
+    ):
+        """Put the changes of a failed write back behind newer ones."""
+        for owner, changed in upserts.items():
+            newer = self._upserts.setdefault(owner, {})
+            newer_deletes = self._deletes.get(owner, set())
+            for key, value in changed.items():
+                if key not in newer and key not in newer_deletes:
+                    newer[key] = value
+        for owner, removed in deletes.items():
+            newer = self._upserts.get(owner, {})
+            self._deletes.setdefault(owner, set()).update(removed - newer.keys())
+        self._dropped |= dropped - self._upserts.keys()
+
+    @staticmethod
+    async def _write(
+        upserts: Dict[Owner, Dict[str, Any]],
+        deletes: Dict[Owner, set],
+        dropped: set,
+    ) -> Tuple[int, int]:
+        """Apply staged changes.
+
+        Returns:
+            Tuple[int, int]: Number of keys written and deleted
+        """
+        now = datetime.utcnow()
+        rows: List[dict] = [
+            {
+                "scope": scope,
+                "owner_id": owner_id,
+                "key": key,
+                "value": value,
+                "updated_at": now,
+            }
+            for (scope, owner_id), changed in upserts.items()
+            for key, value in changed.items()
+        ]
+        removed = [(owner, list(keys)) for owner, keys in deletes.items() if keys] + [
+            (owner, None) for owner in dropped
+        ]
+
+        deleted = 0
+        async with get_async_session() as session:
+            dialect_name = session.bind.dialect.name
+            max_parameters = MAX_PARAMETERS.get(dialect_name, 999)
+            # Drops come first, data written after a drop is kept
+            for conditions in _delete_batches(removed, max_parameters):
+                result = await session.execute(
+                    delete(PersistentData).where(or_(*conditions))
+                )
+                deleted += result.rowcount
+            insert = dialect_insert(dialect_name)
+            # Every column of a row is one bound parameter
+            rows_per_statement = max_parameters // len(PersistentData.__table__.c)
+            for start in range(0, len(rows), rows_per_statement):
+                stmt = insert(PersistentData).values(
+                    rows[start : start + rows_per_statement]
+                )
+                await session.execute(
+                    stmt.on_conflict_do_update(
+                        index_elements=[
+                            PersistentData.scope,
+                            PersistentData.owner_id,
+                            PersistentData.key,
+                        ],
+                        set_={
+                            "value": stmt.excluded.value,
+                            "updated_at": stmt.excluded.updated_at,
+                        },
+                    )
+                )
+            await session.commit()
+        return len(rows), deleted
+
+
+def _delete_batches(
+    removed: List[Tuple[Owner, Optional[List[str]]]], max_parameters: int
+) -> List[list]:
+    """Group the WHERE conditions of a flush's deletes into statements.
+
+    Each condition binds the scope, the owner and its keys, so an owner with
+    more keys than a statement takes is split over several conditions.
+
+    Args:
+        removed: Owners and their removed keys, None to remove all of them
+        max_parameters: Bound parameters one statement may take
+
+    Returns:
+        List[list]: Conditions of each DELETE
+    """
+    batches, batch, parameters = [], [], 0
+    for (scope, owner_id), keys in removed:
+        owner = and_(PersistentData.scope == scope, PersistentData.owner_id == owner_id)
+        if keys is None:
+            parts = [(owner, 2)]
+        else:
+            size = max_parameters - 2
+            chunks = [keys[i : i + size] for i in range(0, len(keys), size)]
+            parts = [
+                (and_(owner, PersistentData.key.in_(chunk)), 2 + len(chunk))
+                for chunk in chunks
+            ]
+        for condition, count in parts:
+            if batch and parameters + count > max_parameters:
+                batches.append(batch)
+                batch, parameters = [], 0
+            batch.append(condition)
+            parameters += count
+    if batch:
+        batches.append(batch)
+    return batches
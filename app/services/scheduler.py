@@ -0,0 +1,232 @@
+"""Deadline scheduler for Pomodoro timers."""
+
+import asyncio
+import heapq
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from app.services.metrics import TIMER_LATENESS_SECONDS
+
+logger = logging.getLogger(__name__)
+
+WORK_PHASE = "work"
+BREAK_PHASE = "break"
+
+# Dead heap entries tolerated before compacting, whatever the live count
+MIN_COMPACT_STALE = 1024
+
+
+@dataclass(order=True, slots=True)
+class TimerRecord:
+    """Compact deadline record for a single user's timer.
+
+    Holds only ids, the phase and durations, never the Update or context of
+    the command that started it: with its heap and index entries a live
+    timer costs about 260 bytes, against ~4.8 KB for a task holding the
+    Update (benchmarks/bench_timer_memory.py). Phases are the shared
+    constants above.
+    """
+
+    deadline: float
+    user_id: int = field(compare=False)
+    chat_id: int = field(compare=False)
+    phase: str = field(compare=False)
+    session_id: Optional[int] = field(default=None, compare=False)
+    break_minutes: int = field(default=0, compare=False)
+
+
+TimerHandler = Callable[[List[TimerRecord]], Awaitable[None]]
+
+
+class TimerScheduler:
+    """Single-task min-heap scheduler that fires due timers in batches.
+
+    Only one record per user is live at a time. Replaced or cancelled records
+    stay in the heap and are skipped when popped, so scheduling is O(log n)
+    without having to search the heap. Once they outnumber the live records
+    the heap is rebuilt, so restarted timers do not pile up.
+
+    Deadlines are wall-clock timestamps, shared with other processes through
+    pending_timers, while the event loop sleeps on the monotonic clock. The
+    loop never sleeps longer than ``max_sleep`` and compares the deadline
+    with the wall clock again on every wake-up, so a suspend or a clock step
+    delays a timer by at most ``max_sleep``. Records due within
+    ``coalesce_window`` of the earliest deadline fire in the same wake-up.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = 500,
+        coalesce_window: float = 0.25,
+        max_sleep: float = 1.0,
+    ):
+        """Initialize the TimerScheduler.
+
+        Args:
+            batch_size: Maximum number of records passed to the handler at once
+            coalesce_window: Seconds ahead of time a record may fire to share
+                a wake-up with an earlier one
+            max_sleep: Longest sleep before the deadline is checked again
+        """
+        self.batch_size = batch_size
+        self.coalesce_window = coalesce_window
+        self.max_sleep = max_sleep
+        self._heap: List[TimerRecord] = []
+        self._records: Dict[int, TimerRecord] = {}
+        # Replaced or cancelled records still in the heap
+        self._stale = 0
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self._handler: Optional[TimerHandler] = None
+
+        # Metrics
+        self.wakeups = 0
+        self.batches = 0
+        self.fired = 0
+        self.fired_early = 0
+
+    @property
+    def metrics(self) -> dict:
+        """Snapshot of the scheduler metrics."""
+        return {
+            "heap_size": len(self._heap),
+            "wakeups": self.wakeups,
+            "batches": self.batches,
+            "fired": self.fired,
+            "fired_early": self.fired_early,
+        }
+
+    def __len__(self) -> int:
+        """Return the number of live timers."""
+        return len(self._records)
+
+    def __contains__(self, user_id: int) -> bool:
+        """Check whether the user has a live timer."""
+        return user_id in self._records
+
+    def get(self, user_id: int) -> Optional[TimerRecord]:
+        """Get the live timer record for a user."""
+        return self._records.get(user_id)
+
+    def records(self) -> List[TimerRecord]:
+        """Get all live records."""
+        return list(self._records.values())
+
+    def schedule(self, record: TimerRecord) -> None:
+        """Schedule a record, replacing any live timer of the same user."""
+        if self._records.get(record.user_id) is not None:
+            self._add_stale()
+        self._records[record.user_id] = record
+        heapq.heappush(self._heap, record)
+        # Wake the loop only if the new record is now the earliest deadline
+        if self._wakeup is not None and self._heap[0] is record:
+            self._wakeup.set()
+
+    def cancel(self, user_id: int) -> Optional[TimerRecord]:
+        """Cancel the live timer of a user.
+
+        Returns:
+            TimerRecord: The cancelled record, or None if there was none
+        """
+        record = self._records.pop(user_id, None)
+        if record is not None:
+            self._add_stale()
+        return record
+
+    def _add_stale(self) -> None:
+        """Count a dead heap entry, compacting the heap when they dominate."""
+        self._stale += 1
+        if self._stale > max(len(self._records), MIN_COMPACT_STALE):
+            self._heap = list(self._records.values())
+            heapq.heapify(self._heap)
+            self._stale = 0
+
+    def start(self, handler: TimerHandler) -> None:
+        """Start the firing loop in the running event loop.
+
+        Args:
+            handler: Coroutine called with each batch of due records
+        """
+        if self._task is not None:
+            return
+        self._handler = handler
+        self._stopping = False
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the firing loop. Live records are kept.
+
+        A batch being fired is finished first, so its records are not left
+        half handled for the next process.
+        """
+        if self._task is None:
+            return
+        self._stopping = True
+        self._wakeup.set()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        self._wakeup = None
+
+    def pop_due(self, now: float) -> List[TimerRecord]:
+        """Remove and return up to ``batch_size`` live records due at ``now``."""
+        due: List[TimerRecord] = []
+        while self._heap and self._heap[0].deadline <= now:
+            record = heapq.heappop(self._heap)
+            # Skip records that were cancelled or replaced
+            if self._records.get(record.user_id) is not record:
+                self._stale -= 1
+                continue
+            del self._records[record.user_id]
+            due.append(record)
+            if len(due) >= self.batch_size:
+                break
+        return due
+
+    def _next_delay(self, now: float) -> Optional[float]:
+        """Get seconds until the earliest live deadline, dropping stale heads."""
+        while self._heap:
+            head = self._heap[0]
+            if self._records.get(head.user_id) is head:
+                return max(0.0, head.deadline - now)
+            heapq.heappop(self._heap)
+            self._stale -= 1
+        return None
+
+    async def _run(self):
+        """Sleep until the earliest deadline and fire due records."""
+        while not self._stopping:
+            self._wakeup.clear()
+            delay = self._next_delay(time.time())
+            if delay is None or delay > 0:
+                # Without timers only schedule() can make one due
+                timeout = None if delay is None else min(delay, self.max_sleep)
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+                except asyncio.TimeoutError:
+                    pass
+                self.wakeups += 1
+                continue
+
+            now = time.time()
+            batch = self.pop_due(now + self.coalesce_window)
+            if not batch:
+                continue
+            self.batches += 1
+            self.fired += len(batch)
+            for record in batch:
+                lateness = now - record.deadline
+                if lateness < 0:
+                    self.fired_early += 1
+                # Records coalesced into an earlier wake-up count as on time
+                TIMER_LATENESS_SECONDS.labels(record.phase).observe(max(0.0, lateness))
+            try:
+                await self._handler(batch)
+            except Exception as e:
+                logger.error(f"Error firing {len(batch)} timers: {e}", exc_info=True)
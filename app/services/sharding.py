@@ -0,0 +1,193 @@
+"""Timer sharding between bot worker processes."""
+
+import logging
+import zlib
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Iterable, Set
+
+from sqlalchemy import delete, or_, select, update
+
+from app.db.models import (
+    ShardLease,
+    WorkerHeartbeat,
+    dialect_insert,
+    get_async_session,
+)
+
+logger = logging.getLogger(__name__)
+
+ShardCallback = Callable[[Set[int]], Awaitable[None]]
+
+
+def shard_for_user(user_id: int, shard_count: int) -> int:
+    """Get the shard of a Telegram user.
+
+    Args:
+        user_id: Telegram user ID
+        shard_count: Total number of shards
+
+    Returns:
+        int: Shard ID in ``range(shard_count)``, 0 when sharding is disabled
+    """
+    if shard_count <= 1:
+        return 0
+    return zlib.crc32(str(user_id).encode()) % shard_count
+
+
+def preferred_owner(shard_id: int, workers: Iterable[str]) -> str:
+    """Pick the worker that should own a shard (rendezvous hashing).
+
+    Adding or removing a worker only moves the shards that worker gains or
+    loses; every other shard keeps its owner.
+    """
+    return max(workers, key=lambda worker: zlib.crc32(f"{worker}:{shard_id}".encode()))
+
+
+class ShardCoordinator:
+    """Keep this worker's shard leases in the database.
+
+    Every heartbeat the worker refreshes its own liveness row, works out
+    which shards it should own among the live workers, renews or claims
+    those leases and releases the rest. Leases of a dead worker expire and
+    are claimed by the new preferred owner of each shard.
+    """
+
+    def __init__(
+        self,
+        worker_id: str,
+        shard_count: int,
+        lease_seconds: int,
+        on_acquire: ShardCallback,
+        on_release: ShardCallback,
+    ):
+        """Initialize the ShardCoordinator.
+
+        Args:
+            worker_id: Unique name of this worker
+            shard_count: Total number of shards
+            lease_seconds: Lifetime of leases and heartbeats
+            on_acquire: Called with shards this worker has just claimed
+            on_release: Called with shards this worker no longer owns
+        """
+        self.worker_id = worker_id
+        self.shard_count = shard_count
+        self.lease_seconds = lease_seconds
+        self.on_acquire = on_acquire
+        self.on_release = on_release
+        self.owned: Set[int] = set()
+
+    def owns_user(self, user_id: int) -> bool:
+        """Check whether this worker arms the timers of a user."""
+        return shard_for_user(user_id, self.shard_count) in self.owned
+
+    async def heartbeat(self):
+        """Renew, claim and release shard leases."""
+        now = datetime.utcnow()
+        expires_at = now + timedelta(seconds=self.lease_seconds)
+
+        async with get_async_session() as session:
+            insert = dialect_insert(session.bind.dialect.name)
+            # Make sure every shard has a lease row to claim
+            await session.execute(
+                insert(ShardLease)
+                .values(
+                    [
+                        {"shard_id": shard_id, "owner": None, "expires_at": now}
+                        for shard_id in range(self.shard_count)
+                    ]
+                )
+                .on_conflict_do_nothing(index_elements=[ShardLease.shard_id])
+            )
+            stmt = insert(WorkerHeartbeat).values(
+                worker_id=self.worker_id, expires_at=expires_at
+            )
+            await session.execute(
+                stmt.on_conflict_do_update(
+                    index_elements=[WorkerHeartbeat.worker_id],
+                    set_={"expires_at": stmt.excluded.expires_at},
+                )
+            )
+
+            workers = set(
+                await session.scalars(
+                    select(WorkerHeartbeat.worker_id).where(
+                        WorkerHeartbeat.expires_at > now
+                    )
+                )
+            )
+            workers.add(self.worker_id)
+            target = {
+                shard_id
+                for shard_id in range(self.shard_count)
+                if preferred_owner(shard_id, workers) == self.worker_id
+            }
+
+            # Stop arming timers of shards we hand over before the new owner
+            # can claim them
+            handed_over = self.owned - target
+            if handed_over:
+                self.owned -= handed_over
+                logger.info(
+                    f"Worker {self.worker_id} released shards {sorted(handed_over)}"
+                )
+                await self.on_release(handed_over)
+
+            # Hand shards over to their preferred owners
+            await session.execute(
+                update(ShardLease)
+                .where(
+                    ShardLease.owner == self.worker_id,
+                    ShardLease.shard_id.notin_(target),
+                )
+                .values(expires_at=now)
+            )
+            # Renew our leases and claim free or expired ones
+            await session.execute(
+                update(ShardLease)
+                .where(
+                    ShardLease.shard_id.in_(target),
+                    or_(
+                        ShardLease.owner == self.worker_id,
+                        ShardLease.expires_at <= now,
+                    ),
+                )
+                .values(owner=self.worker_id, expires_at=expires_at)
+            )
+            owned = set(
+                await session.scalars(
+                    select(ShardLease.shard_id).where(
+                        ShardLease.owner == self.worker_id,
+                        ShardLease.expires_at > now,
+                    )
+                )
+            )
+            await session.commit()
+
+        acquired = owned - self.owned
+        released = self.owned - owned
+        self.owned = owned
+        if released:
+            logger.info(f"Worker {self.worker_id} released shards {sorted(released)}")
+            await self.on_release(released)
+        if acquired:
+            logger.info(f"Worker {self.worker_id} acquired shards {sorted(acquired)}")
+            await self.on_acquire(acquired)
+
+    async def release_all(self):
+        """Give up all leases so other workers can take over immediately."""
+        now = datetime.utcnow()
+        async with get_async_session() as session:
+            await session.execute(
+                update(ShardLease)
+                .where(ShardLease.owner == self.worker_id)
+                .values(expires_at=now)
+            )
+            await session.execute(
+                delete(WorkerHeartbeat).where(
+                    WorkerHeartbeat.worker_id == self.worker_id
+                )
+            )
+            await session.commit()
+        released, self.owned = self.owned, set()
+        if released:
+            await self.on_release(released)
@@ -0,0 +1,334 @@
+"""Shared state for counters and rate limits.
+
+Replicas share low-latency state through a ``StateStore``: integer counters
+with an expiry and fixed-window rate limits. ``RedisStateStore`` keeps it in
+Redis for multi-replica deployments, ``MemoryStateStore`` in the process for
+tests and single-node mode, with the same semantics. The database stays the
+durable record of completed pomodoros; the store only mirrors their counts.
+"""
+
+import asyncio
+import logging
+import math
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+MEMORY_URL = "memory://"
+
+# INCRBY only if the key exists, so a counter is never started from zero
+# while its value is still only known to the database
+_INCR_IF_EXISTS = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    return redis.call('INCRBY', KEYS[1], ARGV[1])
+end
+return false
+"""
+
+
+class StateStore(ABC):
+    """Interface of the shared state store.
+
+    Counters are integers that may expire, like Redis strings changed with
+    INCRBY. Methods taking several keys perform all their
+    operations in one round trip.
+    """
+
+    # Whether other processes see the same state
+    shared = False
+
+    def __init__(self):
+        """Initialize the StateStore."""
+        self.round_trips = 0
+        self.errors = 0
+
+    @property
+    def metrics(self) -> dict:
+        """Snapshot of the store metrics."""
+        return {"round_trips": self.round_trips, "errors": self.errors}
+
+    @abstractmethod
+    async def incr_many(
+        self,
+        amounts: Dict[str, int],
+        ttl: Optional[float] = None,
+        existing_only: bool = False,
+    ) -> Dict[str, Optional[int]]:
+        """Increment several counters.
+
+        Args:
+            amounts: Counter key -> amount to add
+            ttl: Seconds until the incremented counters expire; applies to
+                counters created or incremented without ``existing_only``
+            existing_only: Skip counters that do not exist, keeping their TTL
+
+        Returns:
+            Dict[str, Optional[int]]: New values, None for skipped counters
+        """
+
+    @abstractmethod
+    async def get_counters(self, keys: Iterable[str]) -> Dict[str, Optional[int]]:
+        """Get several counters.
+
+        Returns:
+            Dict[str, Optional[int]]: Values, None for missing counters
+        """
+
+    @abstractmethod
+    async def set_counter_if_absent(
+        self, key: str, value: int, ttl: Optional[float] = None
+    ) -> int:
+        """Set a counter unless it exists.
+
+        Returns:
+            int: The counter value, whichever process set it
+        """
+
+    async def close(self):
+        """Release connections."""
+
+
+class MemoryStateStore(StateStore):
+    """State kept in this process, with the semantics of RedisStateStore.
+
+    Expired counters are removed when they are next read or written.
+    """
+
+    shared = False
+
+    def __init__(self):
+        """Initialize the MemoryStateStore."""
+        super().__init__()
+        self._counters: Dict[str, int] = {}
+        # Counter key -> time.monotonic() at which it expires
+        self._expires: Dict[str, float] = {}
+
+    def _counter(self, key: str, now: float) -> Optional[int]:
+        """Get a counter, dropping it if it expired."""
+        expires = self._expires.get(key)
+        if expires is not None and expires <= now:
+            del self._expires[key]
+            self._counters.pop(key, None)
+            return None
+        return self._counters.get(key)
+
+    def _expire(self, key: str, ttl: Optional[float], now: float):
+        """Set the expiry of a counter; without a TTL it keeps its expiry."""
+        if ttl is not None:
+            self._expires[key] = now + ttl
+
+    async def incr_many(
+        self,
+        amounts: Dict[str, int],
+        ttl: Optional[float] = None,
+        existing_only: bool = False,
+    ) -> Dict[str, Optional[int]]:
+        """Increment several counters."""
+        self.round_trips += 1
+        now = time.monotonic()
+        values: Dict[str, Optional[int]] = {}
+        for key, amount in amounts.items():
+            value = self._counter(key, now)
+            if value is None and existing_only:
+                values[key] = None
+                continue
+            value = (value or 0) + amount
+            self._counters[key] = value
+            if not existing_only:
+                self._expire(key, ttl, now)
+            values[key] = value
+        return values
+
+    async def get_counters(self, keys: Iterable[str]) -> Dict[str, Optional[int]]:
+        """Get several counters."""
+        self.round_trips += 1
+        now = time.monotonic()
+        return {key: self._counter(key, now) for key in keys}
+
+    async def set_counter_if_absent(
+        self, key: str, value: int, ttl: Optional[float] = None
+    ) -> int:
+        """Set a counter unless it exists."""
+        self.round_trips += 1
+        now = time.monotonic()
+        current = self._counter(key, now)
+        if current is not None:
+            return current
+        self._counters[key] = value
+        self._expire(key, ttl, now)
+        return value
+
+
+class RedisStateStore(StateStore):
+    """State kept in Redis and shared by all replicas.
+
+    Counters are strings changed with INCRBY; calls touching several keys
+    are sent as one non-transactional pipeline.
+    Requires the ``redis`` package (``poetry install -E redis``).
+    """
+
+    shared = True
+
+    def __init__(self, url: str, prefix: str = "pomodoro:"):
+        """Initialize the RedisStateStore.
+
+        Args:
+            url: Redis URL, e.g. ``redis://localhost:6379/0``
+            prefix: Prepended to every key
+        """
+        super().__init__()
+        try:
+            import redis.asyncio as redis
+        except ImportError as e:
+            raise RuntimeError(
+                "STATE_STORE_URL points to Redis but the redis package is not "
+                "installed, install it with `poetry install -E redis`"
+            ) from e
+        self.prefix = prefix
+        self.client = redis.Redis.from_url(url, decode_responses=True)
+        self._incr_if_exists = self.client.register_script(_INCR_IF_EXISTS)
+
+    def _key(self, key: str) -> str:
+        """Get the Redis key of a store key."""
+        return self.prefix + key
+
+    async def _call(self, call):
+        """Await one round trip, counting it and its failures."""
+        self.round_trips += 1
+        try:
+            return await call
+        except Exception:
+            self.errors += 1
+            raise
+
+    async def incr_many(
+        self,
+        amounts: Dict[str, int],
+        ttl: Optional[float] = None,
+        existing_only: bool = False,
+    ) -> Dict[str, Optional[int]]:
+        """Increment several counters."""
+        if not amounts:
+            return {}
+        async with self.client.pipeline(transaction=False) as pipe:
+            for key, amount in amounts.items():
+                if existing_only:
+                    await self._incr_if_exists(
+                        keys=[self._key(key)], args=[amount], client=pipe
+                    )
+                    continue
+                pipe.incrby(self._key(key), amount)
+                if ttl is not None:
+                    pipe.expire(self._key(key), math.ceil(ttl))
+            results = await self._call(pipe.execute())
+        if not existing_only and ttl is not None:
+            # Drop the EXPIRE replies
+            results = results[::2]
+        return {
+            key: None if value is None else int(value)
+            for key, value in zip(amounts, results)
+        }
+
+    async def get_counters(self, keys: Iterable[str]) -> Dict[str, Optional[int]]:
+        """Get several counters."""
+        keys = list(keys)
+        if not keys:
+            return {}
+        values = await self._call(self.client.mget([self._key(key) for key in keys]))
+        return {
+            key: None if value is None else int(value)
+            for key, value in zip(keys, values)
+        }
+
+    async def set_counter_if_absent(
+        self, key: str, value: int, ttl: Optional[float] = None
+    ) -> int:
+        """Set a counter unless it exists."""
+        async with self.client.pipeline(transaction=False) as pipe:
+            pipe.set(
+                self._key(key),
+                value,
+                nx=True,
+                ex=None if ttl is None else math.ceil(ttl),
+            )
+            pipe.get(self._key(key))
+            _, current = await self._call(pipe.execute())
+        return int(current)
+
+    async def close(self):
+        """Close the connection pool."""
+        await self.client.aclose()
+
+
+class SharedRateLimit:
+    """Fixed one-second window rate limit shared through a StateStore.
+
+    Every process increments the counter of the current second; a call is
+    allowed while the count stays within ``rate``.
+    """
+
+    def __init__(self, store: StateStore, rate: float, key: str = "rate"):
+        """Initialize the SharedRateLimit.
+
+        Args:
+            store: Store holding the window counters
+            rate: Calls allowed per second across all processes
+            key: Prefix of the window counter keys
+        """
+        self.store = store
+        self.rate = rate
+        self.key = key
+
+    async def take(self, now: float = None) -> float:
+        """Take one call from the current window.
+
+        Returns:
+            float: 0 if the call may be made, otherwise seconds until the
+                next window
+        """
+        now = time.time() if now is None else now
+        window = int(now)
+        values = await self.store.incr_many({f"{self.key}:{window}": 1}, ttl=2)
+        if values[f"{self.key}:{window}"] <= self.rate:
+            return 0.0
+        return window + 1 - now
+
+
+def create_state_store(url: str) -> StateStore:
+    """Create the state store for a URL.
+
+    Args:
+        url: ``memory://`` or a ``redis://``, ``rediss://`` or ``unix://`` URL
+
+    Returns:
+        StateStore: The store
+    """
+    if not url or url == MEMORY_URL:
+        return MemoryStateStore()
+    if url.split("://", 1)[0] in ("redis", "rediss", "unix"):
+        return RedisStateStore(url)
+    raise ValueError(f"Unsupported STATE_STORE_URL: {url}")
+
+
+async def best_effort(call, what: str):
+    """Await a state store call, logging instead of raising on failure.
+
+    The database holds the durable state, so a store outage only delays
+    what the store speeds up.
+
+    Args:
+        call: Awaitable store call
+        what: Description used in the log message
+
+    Returns:
+        The call result, or None if it failed
+    """
+    try:
+        return await call
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        logger.warning(f"State store: failed to {what}: {e}")
+        return None
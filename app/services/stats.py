@@ -0,0 +1,399 @@
+"""Statistics helpers for the Pomodoro bot.
+
+Completed pomodoros are rolled up per user into hourly, daily and weekly
+counters as they are written, keyed on the local time of the completion.
+Summaries only read the rollups and aggregate them in SQL.
+"""
+
+import logging
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Iterable, NamedTuple, Optional, Tuple
+
+import pytz
+from sqlalchemy import Integer, case, cast, delete, func, insert, select
+
+from app.db.models import (
+    DailyStats,
+    HourlyStats,
+    PomodoroSession,
+    User,
+    WeeklyStats,
+    dialect_insert,
+)
+
+logger = logging.getLogger(__name__)
+
+# (user_id, local date) -> (completed, focus_minutes)
+DailyIncrements = Dict[Tuple[int, date], Tuple[int, int]]
+# (user_id, local date, local hour) -> (completed, focus_minutes)
+HourlyIncrements = Dict[Tuple[int, date, int], Tuple[int, int]]
+# (user_id, local Monday) -> (completed, focus_minutes)
+WeeklyIncrements = Dict[Tuple[int, date], Tuple[int, int]]
+
+
+class PeriodSummary(NamedTuple):
+    """Pomodoro statistics of a user over a period."""
+
+    completed: int
+    focus_minutes: int
+    active_days: int
+    best_hour: Optional[int]
+    current_streak: int
+    longest_streak: int
+
+
+def get_timezone(timezone: str):
+    """Get a pytz timezone, falling back to UTC for unknown names."""
+    try:
+        return pytz.timezone(timezone or "UTC")
+    except pytz.UnknownTimeZoneError:
+        return pytz.utc
+
+
+def local_datetime(timezone: str, moment: datetime) -> datetime:
+    """Get the local time of a UTC moment in the given timezone.
+
+    Args:
+        timezone: IANA timezone name; unknown names fall back to UTC
+        moment: Naive UTC datetime
+
+    Returns:
+        datetime: Aware local datetime
+    """
+    return pytz.utc.localize(moment).astimezone(get_timezone(timezone))
+
+
+def local_date(timezone: str, moment: datetime) -> date:
+    """Get the calendar date of a UTC moment in the given timezone.
+
+    Args:
+        timezone: IANA timezone name; unknown names fall back to UTC
+        moment: Naive UTC datetime
+
+    Returns:
+        date: Local date
+    """
+    return local_datetime(timezone, moment).date()
+
+
+def local_midnight(timezone: str, moment: datetime) -> datetime:
+    """Get the start of the local day containing a UTC moment.
+
+    Args:
+        timezone: IANA timezone name; unknown names fall back to UTC
+        moment: Naive UTC datetime
+
+    Returns:
+        datetime: Naive UTC time of the latest local midnight
+    """
+    tz = get_timezone(timezone)
+    day = pytz.utc.localize(moment).astimezone(tz).date()
+    midnight = tz.localize(datetime.combine(day, time()))
+    return midnight.astimezone(pytz.utc).replace(tzinfo=None)
+
+
+def week_start(day: date) -> date:
+    """Get the Monday of the week containing a day."""
+    return day - timedelta(days=day.weekday())
+
+
+def add_increment(increments: dict, key: tuple, focus_minutes: int, completed: int = 1):
+    """Count completed pomodoros in an increments mapping."""
+    total, minutes = increments.get(key, (0, 0))
+    increments[key] = (total + completed, minutes + completed * focus_minutes)
+
+
+class RollupIncrements:
+    """Increments of the hourly, daily and weekly counters."""
+
+    def __init__(self):
+        """Initialize the RollupIncrements."""
+        self.hourly: HourlyIncrements = {}
+        self.daily: DailyIncrements = {}
+        self.weekly: WeeklyIncrements = {}
+
+    def __bool__(self) -> bool:
+        """Check whether anything was counted."""
+        return bool(self.daily)
+
+    def add(
+        self,
+        user_id: int,
+        timezone: str,
+        completed_at: datetime,
+        focus_minutes: int,
+        completed: int = 1,
+    ):
+        """Count completed pomodoros in every rollup.
+
+        Args:
+            user_id: Internal user ID
+            timezone: User's timezone
+            completed_at: Naive UTC completion time
+            focus_minutes: Work minutes of one pomodoro
+            completed: Number of pomodoros
+        """
+        moment = local_datetime(timezone, completed_at)
+        day = moment.date()
+        minutes = focus_minutes or 0
+        add_increment(self.hourly, (user_id, day, moment.hour), minutes, completed)
+        add_increment(self.daily, (user_id, day), minutes, completed)
+        add_increment(self.weekly, (user_id, week_start(day)), minutes, completed)
+
+    def upserts(self, dialect_name: str) -> list:
+        """Build one upsert per non-empty rollup."""
+        statements = []
+        if self.hourly:
+            statements.append(
+                rollup_upsert(
+                    dialect_name, HourlyStats, ("user_id", "date", "hour"), self.hourly
+                )
+            )
+        if self.daily:
+            statements.append(daily_stats_upsert(dialect_name, self.daily))
+        if self.weekly:
+            statements.append(
+                rollup_upsert(
+                    dialect_name, WeeklyStats, ("user_id", "week_start"), self.weekly
+                )
+            )
+        return statements
+
+
+def rollup_upsert(dialect_name: str, model, key_columns: Tuple[str, ...], increments):
+    """Build one statement adding increments to a rollup table.
+
+    The statement inserts missing rows and atomically adds to existing ones,
+    so concurrent completions for the same bucket never lose an update.
+
+    Args:
+        dialect_name: Name of the database dialect
+        model: Rollup model with ``completed`` and ``focus_minutes`` columns
+        key_columns: Primary key columns, in the order of the increment keys
+        increments: Completed pomodoros and focus minutes per bucket
+
+    Returns:
+        Insert: Upsert statement
+    """
+    stmt = dialect_insert(dialect_name)(model).values(
+        [
+            {
+                **dict(zip(key_columns, key)),
+                "completed": completed,
+                "focus_minutes": focus_minutes,
+            }
+            for key, (completed, focus_minutes) in increments.items()
+        ]
+    )
+    return stmt.on_conflict_do_update(
+        index_elements=[getattr(model, column) for column in key_columns],
+        set_={
+            "completed": model.completed + stmt.excluded.completed,
+            "focus_minutes": model.focus_minutes + stmt.excluded.focus_minutes,
+        },
+    )
+
+
+def daily_stats_upsert(dialect_name: str, increments: DailyIncrements):
+    """Build one statement adding the increments to the daily counters.
+
+    Args:
+        dialect_name: Name of the database dialect
+        increments: Completed pomodoros and focus minutes per user and day
+
+    Returns:
+        Insert: Upsert statement
+    """
+    return rollup_upsert(dialect_name, DailyStats, ("user_id", "date"), increments)
+
+
+def _day_number(dialect_name: str, column):
+    """Build an expression numbering days consecutively.
+
+    Config rejects a DATABASE_URL of any other dialect at startup.
+    """
+    if dialect_name == "sqlite":
+        return cast(func.julianday(column), Integer)
+    if dialect_name == "postgresql":
+        # date - date is an integer number of days
+        return column - date(1970, 1, 1)
+    raise NotImplementedError(f"Streaks are not supported for {dialect_name}")
+
+
+async def get_streaks(session, user_id: int, today: date) -> Tuple[int, int]:
+    """Get the current and the longest run of days with a completed pomodoro.
+
+    Consecutive days share the same day number minus row number, so each
+    run is one group. The current streak is the run that ends today or
+    yesterday, as today may not have a pomodoro yet.
+
+    Args:
+        session: Async database session
+        user_id: Internal user ID
+        today: Today in the user's timezone
+
+    Returns:
+        tuple: (current_streak, longest_streak)
+    """
+    day_number = _day_number(session.bind.dialect.name, DailyStats.date)
+    days = (
+        select(
+            DailyStats.date.label("date"),
+            (day_number - func.row_number().over(order_by=DailyStats.date)).label(
+                "run"
+            ),
+        )
+        .where(DailyStats.user_id == user_id, DailyStats.completed > 0)
+        .subquery()
+    )
+    runs = (
+        select(
+            func.count().label("length"),
+            func.max(days.c.date).label("last_day"),
+        )
+        .group_by(days.c.run)
+        .subquery()
+    )
+    yesterday = today - timedelta(days=1)
+    row = (
+        await session.execute(
+            select(
+                func.max(case((runs.c.last_day >= yesterday, runs.c.length), else_=0)),
+                func.max(runs.c.length),
+            )
+        )
+    ).first()
+    return row[0] or 0, row[1] or 0
+
+
+async def get_best_hour(session, user_id: int, start: date, end: date) -> Optional[int]:
+    """Get the local hour with the most completed pomodoros in a date range.
+
+    Args:
+        session: Async database session
+        user_id: Internal user ID
+        start: First local date, inclusive
+        end: Last local date, inclusive
+
+    Returns:
+        int: Hour of the day, or None if nothing was completed
+    """
+    return await session.scalar(
+        select(HourlyStats.hour)
+        .where(
+            HourlyStats.user_id == user_id,
+            HourlyStats.date >= start,
+            HourlyStats.date <= end,
+        )
+        .group_by(HourlyStats.hour)
+        .order_by(func.sum(HourlyStats.completed).desc(), HourlyStats.hour)
+        .limit(1)
+    )
+
+
+async def get_period_summary(
+    session, user_id: int, start: date, end: date, today: date
+) -> PeriodSummary:
+    """Summarize a user's pomodoros between two local dates.
+
+    The totals of a period that is exactly one week are read from its
+    weekly rollup row, those of anything else are summed over the daily
+    rollups in SQL. Active days are always counted from the daily rollups.
+
+    Args:
+        session: Async database session
+        user_id: Internal user ID
+        start: First local date, inclusive
+        end: Last local date, inclusive
+        today: Today in the user's timezone, for the current streak
+
+    Returns:
+        PeriodSummary: Statistics of the period
+    """
+    active = (
+        DailyStats.user_id == user_id,
+        DailyStats.date >= start,
+        DailyStats.date <= end,
+        DailyStats.completed > 0,
+    )
+    if start == week_start(start) and end == start + timedelta(days=6):
+        weekly = await session.get(WeeklyStats, (user_id, start))
+        completed = weekly.completed if weekly else 0
+        focus_minutes = weekly.focus_minutes if weekly else 0
+        active_days = await session.scalar(select(func.count()).where(*active))
+    else:
+        completed, focus_minutes, active_days = (
+            await session.execute(
+                select(
+                    func.coalesce(func.sum(DailyStats.completed), 0),
+                    func.coalesce(func.sum(DailyStats.focus_minutes), 0),
+                    func.count(),
+                ).where(*active)
+            )
+        ).first()
+
+    best_hour = await get_best_hour(session, user_id, start, end)
+    current_streak, longest_streak = await get_streaks(session, user_id, today)
+    return PeriodSummary(
+        completed=completed,
+        focus_minutes=focus_minutes,
+        active_days=active_days,
+        best_hour=best_hour,
+        current_streak=current_streak,
+        longest_streak=longest_streak,
+    )
+
+
+def backfill_daily_stats(session, batch_size: int = 10_000) -> int:
+    """Rebuild the hourly, daily and weekly rollups from pomodoro sessions.
+
+    Sessions are attributed to the local time of their start, which matches
+    how /today counted them before daily_stats existed.
+
+    Args:
+        session: Synchronous database session
+        batch_size: Number of session rows fetched per round trip
+
+    Returns:
+        int: Number of daily_stats rows written
+    """
+    rollups = RollupIncrements()
+    rows: Iterable = session.execute(
+        select(
+            PomodoroSession.user_id,
+            User.timezone,
+            PomodoroSession.start_time,
+            PomodoroSession.completed,
+            PomodoroSession.work_minutes,
+        )
+        .join(User, User.id == PomodoroSession.user_id)
+        .where(PomodoroSession.completed > 0)
+        .execution_options(yield_per=batch_size)
+    )
+    for user_id, timezone, start_time, completed, work_minutes in rows:
+        rollups.add(user_id, timezone, start_time, work_minutes, completed)
+
+    tables = (
+        (HourlyStats, ("user_id", "date", "hour"), rollups.hourly),
+        (DailyStats, ("user_id", "date"), rollups.daily),
+        (WeeklyStats, ("user_id", "week_start"), rollups.weekly),
+    )
+    for model, key_columns, increments in tables:
+        session.execute(delete(model))
+        values = [
+            {
+                **dict(zip(key_columns, key)),
+                "completed": completed,
+                "focus_minutes": focus_minutes,
+            }
+            for key, (completed, focus_minutes) in increments.items()
+        ]
+        for start in range(0, len(values), batch_size):
+            session.execute(insert(model), values[start : start + batch_size])
+    session.commit()
+
+    logger.info(
+        f"Backfilled {len(rollups.hourly)} hourly, {len(rollups.daily)} daily "
+        f"and {len(rollups.weekly)} weekly rows"
+    )
+    return len(rollups.daily)
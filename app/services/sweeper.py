@@ -0,0 +1,179 @@
+"""Incremental closing of stale pomodoro sessions."""
+
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy import Select, exists, select, update
+
+from app.db.models import (
+    PendingTimer,
+    PomodoroSession,
+    TeamMember,
+    User,
+    get_async_session,
+)
+from app.services.stats import local_midnight
+
+logger = logging.getLogger(__name__)
+
+
+def stale_sessions_query(
+    timezone: Optional[str], cutoff: datetime, last_id: int, limit: int
+) -> Select:
+    """Select the next page of open sessions started before a cutoff.
+
+    Pages walk the partial ix_pomodoro_sessions_open from ``last_id`` in
+    ID order, so no sort is needed and a page stops at ``limit`` rows;
+    users are checked with ix_users_timezone, armed and team sessions with
+    ix_pending_timers_session_id and ix_team_members_session_id.
+
+    Args:
+        timezone: Timezone of the users
+        cutoff: Naive UTC time sessions must have started before
+        last_id: Last session ID of the previous page
+        limit: Page size
+
+    Returns:
+        Select: Query of session IDs in ascending order
+    """
+    same_timezone = (
+        User.timezone.is_(None) if timezone is None else User.timezone == timezone
+    )
+    return (
+        select(PomodoroSession.id)
+        .join(User, User.id == PomodoroSession.user_id)
+        .where(
+            same_timezone,
+            PomodoroSession.end_time.is_(None),
+            PomodoroSession.start_time < cutoff,
+            PomodoroSession.id > last_id,
+            ~exists().where(PendingTimer.session_id == PomodoroSession.id),
+            ~exists().where(TeamMember.session_id == PomodoroSession.id),
+        )
+        .order_by(PomodoroSession.id)
+        .limit(limit)
+    )
+
+
+class SessionSweeper:
+    """Close sessions left open past their user's local midnight.
+
+    Users are swept one timezone at a time, each against the latest local
+    midnight of its own timezone, so running the sweep every few minutes
+    closes sessions shortly after each timezone's day ends. Sessions are
+    paged by primary key and closed in small transactions, yielding to the
+    event loop between batches. Sessions that still have a pending timer
+    or belong to a team member are left open.
+    """
+
+    def __init__(self, batch_size: int = 500):
+        """Initialize the SessionSweeper.
+
+        Args:
+            batch_size: Maximum number of sessions closed per transaction
+        """
+        self.batch_size = batch_size
+        self._lock = asyncio.Lock()
+
+        # Metrics
+        self.sweeps = 0
+        self.closed = 0
+        self.batches = 0
+        self.last_closed = 0
+        self.last_sweep_seconds = 0.0
+        self.last_rows_per_second = 0.0
+
+    @property
+    def metrics(self) -> dict:
+        """Snapshot of the sweeper metrics."""
+        return {
+            "sweeps": self.sweeps,
+            "closed": self.closed,
+            "batches": self.batches,
+            "last_closed": self.last_closed,
+            "last_sweep_seconds": self.last_sweep_seconds,
+            "last_rows_per_second": self.last_rows_per_second,
+        }
+
+    async def sweep(self, now: Optional[datetime] = None) -> int:
+        """Close the stale sessions of all timezones.
+
+        Args:
+            now: Naive UTC time of the sweep, defaults to the current time
+
+        Returns:
+            int: Number of sessions closed
+        """
+        # Overlapping sweeps would only contend for the same rows
+        if self._lock.locked():
+            return 0
+        async with self._lock:
+            now = now or datetime.utcnow()
+            started = time.perf_counter()
+            async with get_async_session() as session:
+                result = await session.scalars(select(User.timezone).distinct())
+                timezones = list(result)
+
+            closed = 0
+            for timezone in timezones:
+                cutoff = local_midnight(timezone, now)
+                closed += await self._sweep_timezone(timezone, cutoff, now)
+
+            elapsed = time.perf_counter() - started
+            self.sweeps += 1
+            self.closed += closed
+            self.last_closed = closed
+            self.last_sweep_seconds = elapsed
+            self.last_rows_per_second = closed / elapsed if elapsed else 0.0
+            if closed:
+                logger.info(
+                    f"Closed {closed} stale sessions in {elapsed:.2f}s "
+                    f"({self.last_rows_per_second:.0f} rows/s)"
+                )
+            return closed
+
+    async def _sweep_timezone(
+        self, timezone: Optional[str], cutoff: datetime, now: datetime
+    ) -> int:
+        """Close the sessions of one timezone started before its midnight.
+
+        Args:
+            timezone: Timezone shared by the swept users
+            cutoff: Naive UTC time of the timezone's latest midnight
+            now: End time written to the closed sessions
+
+        Returns:
+            int: Number of sessions closed
+        """
+        closed = 0
+        last_id = 0
+        while True:
+            async with get_async_session() as session:
+                ids: List[int] = list(
+                    await session.scalars(
+                        stale_sessions_query(timezone, cutoff, last_id, self.batch_size)
+                    )
+                )
+                if not ids:
+                    return closed
+                # A session may have ended meanwhile, keep its own end time
+                result = await session.execute(
+                    update(PomodoroSession)
+                    .where(
+                        PomodoroSession.id.in_(ids),
+                        PomodoroSession.end_time.is_(None),
+                    )
+                    .values(end_time=now)
+                    .execution_options(synchronize_session=False)
+                )
+                await session.commit()
+            closed += result.rowcount
+            self.batches += 1
+            last_id = ids[-1]
+            if len(ids) < self.batch_size:
+                return closed
+            # Let handlers and timers run between batches
+            await asyncio.sleep(0)
@@ -0,0 +1,71 @@
+"""Team timers shared by the members of a group chat."""
+
+from datetime import datetime
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+from sqlalchemy import select
+
+from app.db.models import Team, TeamMember
+
+GROUP_NOTIFY = "group"
+DM_NOTIFY = "dm"
+
+GROUP_CHAT_TYPES = ("group", "supergroup")
+
+
+class TeamMemberInfo(NamedTuple):
+    """Member of a team and the session counting their pomodoros."""
+
+    user_id: int
+    session_id: int
+    # Rounds ending at or before this are not credited to the member
+    joined_at: Optional[datetime] = None
+
+
+class TeamInfo(NamedTuple):
+    """Team settings and members needed when its timer fires."""
+
+    notify: str
+    members: List[TeamMemberInfo]
+
+
+def is_team_key(user_id: int) -> bool:
+    """Check whether a timer key is a team's group chat ID.
+
+    Team timers are keyed by the chat ID in place of a user ID. Telegram
+    group chat IDs are negative and user IDs positive, so both kinds of
+    timers share the scheduler and pending_timers without clashing.
+    """
+    return user_id < 0
+
+
+async def load_teams(session, chat_ids: Iterable[int]) -> Dict[int, TeamInfo]:
+    """Load the settings and members of several teams in one query.
+
+    Args:
+        session: Async database session
+        chat_ids: Group chat IDs of the teams
+
+    Returns:
+        Dict[int, TeamInfo]: Teams by chat ID, missing teams are left out
+    """
+    chat_ids = list(chat_ids)
+    if not chat_ids:
+        return {}
+    rows = await session.execute(
+        select(
+            Team.chat_id,
+            Team.notify,
+            TeamMember.user_id,
+            TeamMember.session_id,
+            TeamMember.joined_at,
+        )
+        .outerjoin(TeamMember, TeamMember.chat_id == Team.chat_id)
+        .where(Team.chat_id.in_(chat_ids))
+    )
+    teams: Dict[int, TeamInfo] = {}
+    for chat_id, notify, user_id, session_id, joined_at in rows:
+        team = teams.setdefault(chat_id, TeamInfo(notify or GROUP_NOTIFY, []))
+        if user_id is not None:
+            team.members.append(TeamMemberInfo(user_id, session_id, joined_at))
+    return teams
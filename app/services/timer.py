@@ -1,24 +1,148 @@
 """Timer service for the Pomodoro bot."""
 
 import asyncio
+import calendar
 import logging
-from datetime import datetime, time
-from typing import Dict, Optional, Tuple
+import time as time_module
+from dataclasses import replace
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Set, Tuple
 
-import pytz
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from apscheduler.triggers.cron import CronTrigger
-from sqlalchemy.orm import Session
-from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Update
+from sqlalchemy import delete, func, select, tuple_
+from telegram import Bot, InlineKeyboardButton, InlineKeyboardMarkup, Update
 from telegram.ext import CallbackContext
 
 from app.config import config
-from app.db.models import PomodoroSession, User, get_db_session
+from app.db.models import (
+    DailyStats,
+    PendingTimer,
+    PomodoroSession,
+    ShardLease,
+    Team,
+    TeamMember,
+    User,
+    dialect_insert,
+    get_async_session,
+)
+from app.services.cache import LRUCache, SessionInfo, UserInfo
+from app.services.countdown import LiveCountdown, format_remaining
+from app.services.dispatcher import TIMER_PRIORITY, dispatcher
+from app.services.metrics import ACTIVE_TIMERS, registry
+from app.services.pauses import PauseBuffer, PausedTimer
+from app.services.scheduler import (
+    BREAK_PHASE,
+    WORK_PHASE,
+    TimerRecord,
+    TimerScheduler,
+)
+from app.services.sharding import ShardCoordinator, shard_for_user
+from app.services.state import SharedRateLimit, best_effort, create_state_store
+from app.services.stats import (
+    PeriodSummary,
+    get_period_summary,
+    local_date,
+    week_start,
+)
+from app.services.sweeper import SessionSweeper
+from app.services.teams import (
+    DM_NOTIFY,
+    GROUP_CHAT_TYPES,
+    GROUP_NOTIFY,
+    TeamInfo,
+    is_team_key,
+    load_teams,
+)
+from app.services.write_behind import CompletionBuffer
 
 logger = logging.getLogger(__name__)
 
-# Store active timers in memory (telegram_id -> (work_job, break_job))
-active_timers: Dict[int, Tuple[Optional[asyncio.Task], Optional[asyncio.Task]]] = {}
+# Overlap between timer syncs, covering clock skew between processes
+TIMER_SYNC_SLACK_SECONDS = 5
+
+# Lateness of a work period that its break still absorbs: the break ends as
+# if the work period had been noticed on time. Later timers, e.g. fired after
+# downtime, give the full break from the moment they fire
+MAX_DRIFT_CORRECTION_SECONDS = 5
+
+# Work minutes a team round must have left for a member joining it to work
+# in it; later joiners are enrolled from the next round
+MIN_TEAM_JOIN_MINUTES = 1
+
+
+def _today_key(user_id: int, today: date, version: int) -> str:
+    """Get the state store counter of a user's pomodoros on a local date.
+
+    The key holds the day's version, so a count read from the database
+    before a later flush is never read back once that flush bumps it.
+    """
+    return f"today:{user_id}:{today.isoformat()}:{version}"
+
+
+def _today_version_key(user_id: int, today: date) -> str:
+    """Get the state store counter bumped when a user's day changes."""
+    return f"today_version:{user_id}:{today.isoformat()}"
+
+
+def _break_keyboard() -> InlineKeyboardMarkup:
+    """Build the keyboard shown with the break message."""
+    keyboard = [
+        [
+            InlineKeyboardButton("Пропустить ⏭", callback_data="skip_break"),
+        ]
+    ]
+    return InlineKeyboardMarkup(keyboard)
+
+
+def _next_round_keyboard() -> InlineKeyboardMarkup:
+    """Build the keyboard shown with the next round prompt."""
+    keyboard = [
+        [
+            InlineKeyboardButton("Да ✅", callback_data="next_round_yes"),
+            InlineKeyboardButton("Нет ❌", callback_data="next_round_no"),
+        ]
+    ]
+    return InlineKeyboardMarkup(keyboard)
+
+
+def _team_keyboard() -> InlineKeyboardMarkup:
+    """Build the keyboard shown with a team timer."""
+    keyboard = [
+        [
+            InlineKeyboardButton("Присоединиться 🙋", callback_data="team_join"),
+            InlineKeyboardButton("Выйти 👋", callback_data="team_leave"),
+        ]
+    ]
+    return InlineKeyboardMarkup(keyboard)
+
+
+def _team_next_round_keyboard() -> InlineKeyboardMarkup:
+    """Build the keyboard shown with a team's next round prompt."""
+    keyboard = [
+        [
+            InlineKeyboardButton("Да ✅", callback_data="team_next_yes"),
+            InlineKeyboardButton("Стоп ⏹", callback_data="team_stop"),
+        ]
+    ]
+    return InlineKeyboardMarkup(keyboard)
+
+
+# Timer messages, also kept above a live countdown
+WORK_STARTED = "⏱ Время работать!"
+BREAK_STARTED = "✅ Пора на перерыв!"
+
+# Phase -> "until the end of" wording of timer messages
+PHASE_ENDS = {WORK_PHASE: "работы", BREAK_PHASE: "перерыва"}
+
+
+def _to_timestamp(value: datetime) -> float:
+    """Convert a naive UTC datetime to a Unix timestamp."""
+    return (value - datetime(1970, 1, 1)).total_seconds()
+
+
+def _from_timestamp(value: float) -> datetime:
+    """Convert a Unix timestamp to a naive UTC datetime."""
+    return datetime.utcfromtimestamp(value)
 
 
 class TimerService:
@@ -27,37 +151,415 @@ class TimerService:
     def __init__(self):
         """Initialize the TimerService."""
         self.scheduler = AsyncIOScheduler()
+        self.timers = TimerScheduler(
+            batch_size=config.TIMER_BATCH_SIZE,
+            coalesce_window=config.TIMER_COALESCE_MS / 1000,
+            max_sleep=config.TIMER_MAX_SLEEP_SECONDS,
+        )
+        self.completions = CompletionBuffer(
+            flush_interval_ms=config.WRITE_BEHIND_FLUSH_MS,
+            max_events=config.WRITE_BEHIND_MAX_EVENTS,
+        )
+        # Pauses and resumes reach pending_timers lazily
+        self.pauses = PauseBuffer(flush_interval_ms=config.WRITE_BEHIND_FLUSH_MS)
+        # Telegram user ID -> timer taken off the scheduler by /pause
+        self.paused: Dict[int, PausedTimer] = {}
+        self.dispatcher = dispatcher
+        # Timer messages of opted-in users edited into a live countdown
+        self.countdown = LiveCountdown(
+            self.dispatcher,
+            self._local_timer,
+            edits_per_second=config.LIVE_EDITS_PER_SECOND,
+            tick_interval=config.LIVE_TICK_SECONDS,
+        )
+        self.sweeper = SessionSweeper(batch_size=config.SESSION_SWEEP_BATCH_SIZE)
+        # telegram_id -> UserInfo and session_id -> SessionInfo
+        self.users = LRUCache(config.CACHE_MAX_SIZE, config.CACHE_TTL_SECONDS)
+        self.sessions = LRUCache(config.CACHE_MAX_SIZE, config.CACHE_TTL_SECONDS)
+        self.bot: Optional[Bot] = None
+        # Daily counts and rate limits shared with the other replicas
+        self.state = create_state_store(config.STATE_STORE_URL)
+        # Other shards' flushes never reach a store local to this process
+        self.cache_today = self.state.shared or not config.SHARD_COUNT
+        if self.cache_today:
+            self.completions.on_flush = self._invalidate_today
+        if self.state.shared:
+            self.dispatcher.shared_limit = SharedRateLimit(
+                self.state, config.TELEGRAM_RATE_LIMIT
+            )
+            self.countdown.shared_limit = SharedRateLimit(
+                self.state, config.LIVE_EDITS_PER_SECOND, key="live_edits"
+            )
+        self.shards: Optional[ShardCoordinator] = None
+        if config.SHARD_COUNT:
+            self.shards = ShardCoordinator(
+                worker_id=config.WORKER_ID,
+                shard_count=config.SHARD_COUNT,
+                lease_seconds=config.SHARD_LEASE_SECONDS,
+                on_acquire=self._load_shards,
+                on_release=self._drop_shards,
+            )
+        self._synced_until = datetime.utcnow()
+        self._restore_task: Optional[asyncio.Task] = None
+        # Users whose expired timers are being fired; a sync reading their
+        # rows before the claim must not arm them again
+        self._firing: Set[int] = set()
+        self._fire_lock = asyncio.Lock()
+        ACTIVE_TIMERS.set_function(self.timers.__len__)
+        registry.add_collector("pomodoro_timer_scheduler", lambda: self.timers.metrics)
+        registry.add_collector("pomodoro_dispatcher", lambda: self.dispatcher.metrics)
+        registry.add_collector(
+            "pomodoro_write_behind", lambda: self.completions.metrics
+        )
+        registry.add_collector("pomodoro_timer_pauses", lambda: self.pauses.metrics)
+        registry.add_collector(
+            "pomodoro_live_countdown", lambda: self.countdown.metrics
+        )
+        registry.add_collector("pomodoro_session_sweeper", lambda: self.sweeper.metrics)
+        registry.add_collector("pomodoro_user_cache", lambda: self.users.metrics)
+        registry.add_collector("pomodoro_session_cache", lambda: self.sessions.metrics)
+        registry.add_collector("pomodoro_state_store", lambda: self.state.metrics)
         # Откладываем запуск планировщика до старта event loop
         self.is_scheduler_started = False
-        
-    def start_scheduler(self):
-        """Start the scheduler when event loop is running."""
+
+    def start_scheduler(self, bot: Bot):
+        """Start the scheduler when event loop is running.
+
+        Args:
+            bot: Bot used to send timer notifications
+        """
+        self.bot = bot
         if not self.is_scheduler_started:
             self.scheduler.start()
-            # Schedule daily reset at midnight for each user's timezone
-            self._schedule_daily_reset()
+            # Close stale sessions after each timezone's midnight
+            self._schedule_session_sweep()
+            self.timers.start(self._fire_timers)
+            self.completions.start()
+            self.pauses.start()
+            self.countdown.start()
+            self.dispatcher.start(bot)
+            if self.shards is not None:
+                self._schedule_shard_jobs()
+            elif config.TIMER_SYNC_SECONDS:
+                # Timers the previous replica arms while handing over
+                self._schedule_timer_sync()
             self.is_scheduler_started = True
 
-    def _schedule_daily_reset(self):
-        """Schedule daily reset for all users at their midnight."""
-        trigger = CronTrigger(hour=0, minute=0)  # Midnight
+    async def shutdown(self):
+        """Stop firing timers and write all buffered updates.
+
+        Deadlines are written through on every change, so the database
+        already holds every pending timer: the next replica restores them,
+        or picks them up with its timer sync if it is already running, and
+        fires each at its original deadline. Timers this process still had
+        armed are only dropped from memory.
+        """
+        if not self.is_scheduler_started:
+            return
+        if self._restore_task is not None and not self._restore_task.done():
+            self._restore_task.cancel()
+        await self.timers.stop()
+        await self.pauses.stop()
+        await self.countdown.stop()
+        logger.info(f"Handing off {len(self.timers)} pending timers")
+        if self.shards is not None:
+            await self.shards.release_all()
+        await self.completions.stop()
+        await self.dispatcher.stop()
+        await self.state.close()
+        self.scheduler.shutdown(wait=False)
+        self.is_scheduler_started = False
+
+    async def restore_timers(self) -> int:
+        """Re-arm timers persisted by a previous run.
+
+        Timers whose deadline passed while the bot was down fire on the next
+        iteration of the scheduler loop.
+
+        Returns:
+            int: Number of restored timers
+        """
+        if self.shards is not None:
+            # Only the timers of the shards this worker claims are armed
+            await self.shards.heartbeat()
+            return len(self.timers)
+
+        restored = []
+        await self.pauses.flush()
+        async with get_async_session() as session:
+            result = await session.scalars(select(PendingTimer))
+            for pending in result:
+                # A timer started or paused while restoring is newer than its row
+                if (
+                    pending.user_id in self.timers
+                    or pending.user_id in self.paused
+                    or pending.user_id in self.pauses
+                ):
+                    continue
+                record = self._arm(pending)
+                if record is not None:
+                    restored.append(record)
+        logger.info(f"Restored {len(restored)} pending timers")
+        return len(restored)
+
+    def start_restore(self) -> asyncio.Task:
+        """Re-arm persisted timers in the background.
+
+        Updates are accepted while the timers load, so startup does not wait
+        for the pending_timers table to be read.
+
+        Returns:
+            asyncio.Task: Task of restore_timers
+        """
+        self._restore_task = asyncio.create_task(self.restore_timers())
+        self._restore_task.add_done_callback(self._log_restore_error)
+        return self._restore_task
+
+    @staticmethod
+    def _log_restore_error(task: asyncio.Task):
+        """Log a failed background restore."""
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("Failed to restore pending timers", exc_info=task.exception())
+
+    def _schedule_shard_jobs(self):
+        """Schedule shard lease renewal and timer sync with other workers."""
+        self.scheduler.add_job(
+            self.shards.heartbeat,
+            "interval",
+            seconds=max(1, config.SHARD_LEASE_SECONDS // 3),
+            id="shard_heartbeat",
+        )
+        self._schedule_timer_sync()
+
+    def _schedule_timer_sync(self):
+        """Schedule arming timers that other processes started or changed."""
         self.scheduler.add_job(
-            self._reset_daily_counters, trigger, id="daily_reset"
+            self._sync_timers,
+            "interval",
+            seconds=config.TIMER_SYNC_SECONDS,
+            id="timer_sync",
+            coalesce=True,
+            max_instances=1,
         )
 
-    async def _reset_daily_counters(self):
-        """Reset daily pomodoro counters for all users."""
-        logger.info("Resetting daily pomodoro counters")
-        for session in get_db_session():
-            # Close all active sessions from yesterday
-            yesterday_sessions = (
-                session.query(PomodoroSession)
-                .filter(PomodoroSession.end_time.is_(None))
-                .all()
+    def _owns(self, user_id: int) -> bool:
+        """Check whether this worker arms the timers of a user."""
+        return self.shards is None or self.shards.owns_user(user_id)
+
+    async def _load_shards(self, shard_ids: Set[int]):
+        """Arm the persisted timers of newly acquired shards."""
+        await self.pauses.flush()
+        async with get_async_session() as session:
+            result = await session.scalars(
+                select(PendingTimer).where(PendingTimer.shard_id.in_(shard_ids))
+            )
+            rows = list(result)
+        for pending in rows:
+            self._arm(pending)
+
+    async def _drop_shards(self, shard_ids: Set[int]):
+        """Forget in-memory timers of shards another worker now owns."""
+        for record in self.timers.records():
+            if shard_for_user(record.user_id, config.SHARD_COUNT) in shard_ids:
+                self.timers.cancel(record.user_id)
+        for user_id in list(self.paused):
+            if shard_for_user(user_id, config.SHARD_COUNT) in shard_ids:
+                del self.paused[user_id]
+
+    async def _sync_timers(self):
+        """Arm timers that other processes started or changed.
+
+        These are other workers' timers in our shards or, unsharded, timers
+        of a replica running side by side with this one during a deploy.
+        Rows are found by ix_pending_timers_updated_at.
+        """
+        query = select(PendingTimer)
+        if self.shards is not None:
+            if not self.shards.owned:
+                return
+            query = query.where(PendingTimer.shard_id.in_(self.shards.owned))
+        started = datetime.utcnow()
+        since = self._synced_until - timedelta(seconds=TIMER_SYNC_SLACK_SECONDS)
+        # Rows must show this process's own pauses and resumes
+        await self.pauses.flush()
+        async with self._fire_lock, get_async_session() as session:
+            result = await session.scalars(
+                query.where(PendingTimer.updated_at >= since)
+            )
+            for pending in result:
+                # Pauses queued since the flush are newer than the row
+                if pending.user_id in self._firing or pending.user_id in self.pauses:
+                    continue
+                if pending.remaining_seconds is not None or not self._same_timer(
+                    self.timers.get(pending.user_id), pending
+                ):
+                    self._arm(pending)
+        self._synced_until = started
+
+    @staticmethod
+    def _same_timer(
+        record: Optional[TimerRecord], pending: Optional[PendingTimer]
+    ) -> bool:
+        """Check whether an in-memory record matches a persisted row."""
+        return (
+            record is not None
+            and pending is not None
+            and record.phase == pending.phase
+            and abs(record.deadline - _to_timestamp(pending.deadline)) < 0.001
+        )
+
+    async def _claim(
+        self,
+        session,
+        records: List[TimerRecord],
+        owned_only: bool = True,
+        paused: bool = False,
+    ) -> Set[int]:
+        """Atomically take the persisted rows of expired timers.
+
+        A record is claimed only if its row still holds the same phase and
+        deadline, so a timer replaced, cancelled or already fired by another
+        worker is skipped. In sharded mode the row must also belong to a
+        shard whose lease this worker holds, unless ``owned_only`` is False.
+        Rows of paused timers are skipped unless ``paused`` is True.
+
+        Args:
+            session: Async database session
+            records: Timer records about to fire or be cancelled
+            owned_only: Only claim rows of shards leased by this worker
+            paused: Also claim rows of paused timers
+
+        Returns:
+            Set[int]: Telegram user IDs of the claimed records
+        """
+        stmt = delete(PendingTimer).where(
+            tuple_(PendingTimer.user_id, PendingTimer.phase, PendingTimer.deadline).in_(
+                [
+                    (record.user_id, record.phase, _from_timestamp(record.deadline))
+                    for record in records
+                ]
             )
-            for pomodoro in yesterday_sessions:
-                pomodoro.end_time = datetime.utcnow()
-            session.commit()
+        )
+        if not paused:
+            stmt = stmt.where(PendingTimer.remaining_seconds.is_(None))
+        if self.shards is not None and owned_only:
+            stmt = stmt.where(
+                PendingTimer.shard_id.in_(
+                    select(ShardLease.shard_id).where(
+                        ShardLease.owner == self.shards.worker_id,
+                        ShardLease.expires_at > datetime.utcnow(),
+                    )
+                )
+            )
+        result = await session.execute(stmt.returning(PendingTimer.user_id))
+        return set(result.scalars())
+
+    async def _get_pending(self, user_id: int) -> Optional[TimerRecord]:
+        """Load a user's persisted timer, whichever worker arms it."""
+        async with get_async_session() as session:
+            pending = await session.get(PendingTimer, user_id)
+            return self._record_from_pending(pending) if pending else None
+
+    def _schedule_session_sweep(self):
+        """Schedule closing sessions left open past each user's midnight."""
+        self.scheduler.add_job(
+            self.sweeper.sweep,
+            "interval",
+            minutes=config.SESSION_SWEEP_MINUTES,
+            id="session_sweep",
+            coalesce=True,
+            max_instances=1,
+        )
+
+    async def _lookup_timer(
+        self, user_id: int
+    ) -> Tuple[Optional[TimerRecord], Optional[float]]:
+        """Find a user's timer and, if it is paused, the seconds it has left.
+
+        Timers this worker arms are found in memory without a query. Only
+        timers of other workers' shards, or of a restore still loading, are
+        read from pending_timers.
+
+        Args:
+            user_id: Telegram user ID
+
+        Returns:
+            tuple: Timer record or None, and seconds left or None if running
+        """
+        record, remaining = self._local_timer(user_id)
+        if record is not None:
+            return record, remaining
+        restoring = self._restore_task is not None and not self._restore_task.done()
+        if self._owns(user_id) and not restoring:
+            return None, None
+        async with get_async_session() as session:
+            pending = await session.get(PendingTimer, user_id)
+        if pending is None:
+            return None, None
+        return self._record_from_pending(pending), pending.remaining_seconds
+
+    def _local_timer(
+        self, user_id: int
+    ) -> Tuple[Optional[TimerRecord], Optional[float]]:
+        """Find a timer this worker arms or holds paused, without a query."""
+        record = self.timers.get(user_id)
+        if record is not None:
+            return record, None
+        paused = self.paused.get(user_id)
+        if paused is not None:
+            return paused.record, paused.remaining
+        return None, None
+
+    def _arm(self, pending: PendingTimer) -> Optional[TimerRecord]:
+        """Arm a persisted timer, or keep it aside if it is paused.
+
+        Returns:
+            TimerRecord: The armed record, None for a paused timer
+        """
+        record = self._record_from_pending(pending)
+        if pending.remaining_seconds is not None:
+            self.timers.cancel(record.user_id)
+            self.paused[record.user_id] = PausedTimer(record, pending.remaining_seconds)
+            return None
+        self.paused.pop(record.user_id, None)
+        self.timers.schedule(record)
+        return record
+
+    def _drop_pause(self, user_id: int):
+        """Forget the pause of a timer that is being replaced or stopped."""
+        self.paused.pop(user_id, None)
+        self.pauses.discard(user_id)
+
+    @staticmethod
+    def _record_from_pending(pending: PendingTimer) -> TimerRecord:
+        """Build an in-memory record from a persisted row."""
+        return TimerRecord(
+            deadline=_to_timestamp(pending.deadline),
+            user_id=pending.user_id,
+            chat_id=pending.chat_id,
+            phase=pending.phase,
+            session_id=pending.session_id,
+            break_minutes=pending.break_minutes,
+        )
+
+    @staticmethod
+    def _pending_values(record: TimerRecord) -> dict:
+        """Get the persisted column values of a record."""
+        return {
+            "user_id": record.user_id,
+            "chat_id": record.chat_id,
+            "phase": record.phase,
+            "deadline": _from_timestamp(record.deadline),
+            "session_id": record.session_id,
+            "break_minutes": record.break_minutes,
+            "shard_id": shard_for_user(record.user_id, config.SHARD_COUNT),
+            "updated_at": datetime.utcnow(),
+            "remaining_seconds": None,
+        }
+
+    async def _save_pending(self, session, record: TimerRecord):
+        """Persist a record, replacing the user's previous deadline."""
+        await session.merge(PendingTimer(**self._pending_values(record)))
 
     async def start_timer(
         self,
@@ -77,27 +579,21 @@ class TimerService:
         user_id = update.effective_user.id
 
         # Cancel existing timer if any
-        if user_id in active_timers:
-            work_job, break_job = active_timers[user_id]
-            if work_job and not work_job.done():
-                work_job.cancel()
-            if break_job and not break_job.done():
-                break_job.cancel()
+        self.timers.cancel(user_id)
+        self._drop_pause(user_id)
+
+        record = TimerRecord(
+            deadline=time_module.time()
+            + work_minutes * config.TIMER_SECONDS_PER_MINUTE,
+            user_id=user_id,
+            chat_id=update.effective_chat.id,
+            phase=WORK_PHASE,
+            break_minutes=break_minutes,
+        )
 
         # Create a new session in DB
-        for session in get_db_session():
-            user = session.query(User).filter(User.telegram_id == user_id).first()
-            if not user:
-                # Create user if not exists
-                user = User(
-                    telegram_id=user_id,
-                    username=update.effective_user.username,
-                    first_name=update.effective_user.first_name,
-                    last_name=update.effective_user.last_name,
-                )
-                session.add(user)
-                session.commit()
-                session.refresh(user)
+        async with get_async_session() as session:
+            user = await self._get_or_create_user(session, update.effective_user)
 
             # Create new pomodoro session
             pomodoro = PomodoroSession(
@@ -106,100 +602,567 @@ class TimerService:
                 break_minutes=break_minutes,
             )
             session.add(pomodoro)
-            session.commit()
+            await session.flush()
+            record.session_id = pomodoro.id
+            await self._save_pending(session, record)
+            await session.commit()
+            self.users.set(user_id, user)
+            self.sessions.set(pomodoro.id, SessionInfo(work_minutes, break_minutes))
             # Store session id in context
             context.user_data["session_id"] = pomodoro.id
 
-        # Send start message
-        await update.effective_message.reply_text("⏱ Время работать!")
+        # Timers of other workers' shards are armed by their owners
+        owned = self._owns(user_id)
+        if owned:
+            self.timers.schedule(record)
 
-        # Schedule work and break tasks
-        work_job = asyncio.create_task(
-            self._work_timer(update, context, work_minutes, break_minutes)
-        )
-        active_timers[user_id] = (work_job, None)
+        # Send start message, counting down in it if the user opted in
+        message = await update.effective_message.reply_text(WORK_STARTED)
+        if user.live_countdown and owned:
+            self.countdown.track(
+                user_id, record.chat_id, message.message_id, WORK_STARTED, WORK_PHASE
+            )
+        else:
+            self.countdown.untrack(user_id)
 
-    async def _work_timer(
+    async def _get_or_create_user(self, session, telegram_user) -> UserInfo:
+        """Look up a Telegram user, adding them on first use."""
+        user = await self._get_user_info(session, telegram_user.id)
+        if not user:
+            new_user = User(
+                telegram_id=telegram_user.id,
+                username=telegram_user.username,
+                first_name=telegram_user.first_name,
+                last_name=telegram_user.last_name,
+                timezone="UTC",
+            )
+            session.add(new_user)
+            await session.flush()
+            user = UserInfo(new_user.id, new_user.timezone)
+        return user
+
+    async def start_team_timer(
         self,
         update: Update,
-        context: CallbackContext,
         work_minutes: int,
         break_minutes: int,
+        notify: Optional[str] = None,
     ):
-        """Work timer task.
+        """Start the shared timer of a group chat.
+
+        The team keeps one timer whatever its size. The user starting it
+        joins the team, the others join with the keyboard of the message.
 
         Args:
-            update: Telegram update
-            context: Callback context
+            update: Telegram update from a group chat
             work_minutes: Duration of work period in minutes
             break_minutes: Duration of break period in minutes
+            notify: GROUP_NOTIFY or DM_NOTIFY, None keeps the team's setting
         """
-        user_id = update.effective_user.id
-        # Wait for work period to finish
-        await asyncio.sleep(work_minutes * 60)
-
-        # Increment completed pomodoro count
-        session_id = context.user_data.get("session_id")
-        if session_id:
-            for session in get_db_session():
-                pomodoro = session.query(PomodoroSession).get(session_id)
-                if pomodoro:
-                    pomodoro.completed += 1
-                    session.commit()
-
-        # Send break message with keyboard
-        keyboard = [
-            [
-                InlineKeyboardButton("Пропустить ⏭", callback_data="skip_break"),
-            ]
-        ]
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        message = await update.effective_message.reply_text(
-            "✅ Пора на перерыв!", reply_markup=reply_markup
+        chat_id = update.effective_chat.id
+        if not await self._require_group(update):
+            return
+
+        self.timers.cancel(chat_id)
+        record = TimerRecord(
+            deadline=time_module.time()
+            + work_minutes * config.TIMER_SECONDS_PER_MINUTE,
+            user_id=chat_id,
+            chat_id=chat_id,
+            phase=WORK_PHASE,
+            break_minutes=break_minutes,
         )
 
-        # Schedule break timer
-        break_job = asyncio.create_task(
-            self._break_timer(update, context, message.message_id, break_minutes)
+        # Pomodoros of the last round are credited with its own durations
+        await self.completions.flush()
+        async with get_async_session() as session:
+            team = await session.get(Team, chat_id)
+            if team is None:
+                team = Team(chat_id=chat_id)
+                session.add(team)
+            team.work_minutes = work_minutes
+            team.break_minutes = break_minutes
+            team.notify = notify or team.notify or GROUP_NOTIFY
+            # Members present from the start work the whole round
+            sessions = await session.scalars(
+                select(PomodoroSession)
+                .join(TeamMember, TeamMember.session_id == PomodoroSession.id)
+                .where(TeamMember.chat_id == chat_id)
+            )
+            for pomodoro in sessions:
+                pomodoro.work_minutes = work_minutes
+                pomodoro.break_minutes = break_minutes
+                self.sessions.invalidate(pomodoro.id)
+            await self._add_member(session, team, update.effective_user, work_minutes)
+            await self._save_pending(session, record)
+            await session.commit()
+            members = await session.scalar(
+                select(func.count())
+                .select_from(TeamMember)
+                .where(TeamMember.chat_id == chat_id)
+            )
+
+        if self._owns(chat_id):
+            self.timers.schedule(record)
+
+        await update.effective_message.reply_text(
+            f"⏱ Командный помидор: {work_minutes} мин работы, "
+            f"{break_minutes} мин перерыва. Участников: {members}",
+            reply_markup=_team_keyboard(),
         )
-        active_timers[user_id] = (None, break_job)
 
-    async def _break_timer(
+    @staticmethod
+    async def _require_group(update: Update) -> bool:
+        """Check that an update comes from a group chat, telling the user if not.
+
+        In a private chat the chat ID is the user's own ID, the key of their
+        personal timer, so team commands must never act on it.
+        """
+        if update.effective_chat.type in GROUP_CHAT_TYPES:
+            return True
+        await update.effective_message.reply_text(
+            "👥 Командный таймер работает только в группах."
+        )
+        return False
+
+    async def _add_member(
         self,
-        update: Update,
-        context: CallbackContext,
-        message_id: int,
-        break_minutes: int,
-    ):
-        """Break timer task.
+        session,
+        team: Team,
+        telegram_user,
+        work_minutes: int,
+        joined_at: Optional[datetime] = None,
+    ) -> bool:
+        """Add a user to a team with a session collecting their pomodoros.
 
         Args:
-            update: Telegram update
-            context: Callback context
-            message_id: ID of the break message
-            break_minutes: Duration of break period in minutes
+            session: Async database session
+            team: Team to join
+            telegram_user: Telegram user joining it
+            work_minutes: Minutes of the current round the user works
+            joined_at: Naive UTC time the membership counts from, now if None
+
+        Returns:
+            bool: False if the user already was a member
         """
-        user_id = update.effective_user.id
-        # Wait for break period to finish
-        await asyncio.sleep(break_minutes * 60)
+        if await session.get(TeamMember, (team.chat_id, telegram_user.id)):
+            return False
+        user = await self._get_or_create_user(session, telegram_user)
+        pomodoro = PomodoroSession(
+            user_id=user.id,
+            work_minutes=work_minutes,
+            break_minutes=team.break_minutes,
+        )
+        session.add(pomodoro)
+        await session.flush()
+        session.add(
+            TeamMember(
+                chat_id=team.chat_id,
+                user_id=telegram_user.id,
+                session_id=pomodoro.id,
+                joined_at=joined_at or datetime.utcnow(),
+            )
+        )
+        self.users.set(telegram_user.id, user)
+        return True
 
-        # Send next round prompt
-        keyboard = [
-            [
-                InlineKeyboardButton("Да ✅", callback_data="next_round_yes"),
-                InlineKeyboardButton("Нет ❌", callback_data="next_round_no"),
+    async def join_team(self, update: Update) -> str:
+        """Add the user of an update to the team of its chat.
+
+        Args:
+            update: Telegram update from a group chat
+
+        Returns:
+            str: Answer shown to the user
+        """
+        async with get_async_session() as session:
+            team = await session.get(Team, update.effective_chat.id)
+            if team is None:
+                return "Командный таймер не запущен."
+            work_minutes, round_end = await self._join_round(team)
+            joined = await self._add_member(
+                session, team, update.effective_user, work_minutes, round_end
+            )
+            await session.commit()
+        if not joined:
+            return "Ты уже в команде."
+        if round_end is not None:
+            return "Раунд почти закончен — ты в команде со следующего! 🍅"
+        return "Ты в команде! 🍅"
+
+    async def _join_round(self, team: Team) -> Tuple[int, Optional[datetime]]:
+        """Get the work minutes of a member joining a team now.
+
+        Between rounds this is the whole work period: each new round sets
+        the durations of all members' sessions again. Less than
+        MIN_TEAM_JOIN_MINUTES before the end of a work period the member
+        joins from the next round instead.
+
+        Returns:
+            tuple: Work minutes, and the naive UTC end of the current round
+                if the member joins from the next one, otherwise None
+        """
+        record, _ = await self._lookup_timer(team.chat_id)
+        if record is None or record.phase != WORK_PHASE:
+            return team.work_minutes, None
+        # Team timers are never paused, so their deadline is current
+        remaining = record.deadline - time_module.time()
+        if remaining < MIN_TEAM_JOIN_MINUTES * config.TIMER_SECONDS_PER_MINUTE:
+            return team.work_minutes, _from_timestamp(record.deadline)
+        minutes = round(remaining / config.TIMER_SECONDS_PER_MINUTE)
+        return min(team.work_minutes, minutes), None
+
+    async def leave_team(self, update: Update) -> str:
+        """Remove the user of an update from the team of its chat.
+
+        Args:
+            update: Telegram update from a group chat
+
+        Returns:
+            str: Answer shown to the user
+        """
+        async with get_async_session() as session:
+            result = await session.execute(
+                delete(TeamMember)
+                .where(
+                    TeamMember.chat_id == update.effective_chat.id,
+                    TeamMember.user_id == update.effective_user.id,
+                )
+                .returning(TeamMember.session_id)
+            )
+            session_ids = list(result.scalars())
+            await session.commit()
+        for session_id in session_ids:
+            if session_id:
+                self.completions.end_session(session_id)
+        return "Ты вышел из команды." if session_ids else "Ты не в команде."
+
+    async def stop_team(self, update: Update):
+        """Stop the team timer of a chat and disband the team.
+
+        Args:
+            update: Telegram update from a group chat
+        """
+        if not await self._require_group(update):
+            return
+        chat_id = update.effective_chat.id
+        record = self.timers.cancel(chat_id) or await self._get_pending(chat_id)
+        async with get_async_session() as session:
+            if record is not None:
+                await self._claim(session, [record], owned_only=False)
+            result = await session.execute(
+                delete(TeamMember)
+                .where(TeamMember.chat_id == chat_id)
+                .returning(TeamMember.session_id)
+            )
+            session_ids = [session_id for session_id in result.scalars() if session_id]
+            await session.execute(delete(Team).where(Team.chat_id == chat_id))
+            await session.commit()
+        for session_id in session_ids:
+            self.completions.end_session(session_id)
+
+        self.dispatcher.send_message(
+            chat_id, "⏹ Командный таймер остановлен.", priority=TIMER_PRIORITY
+        )
+
+    async def next_team_round(self, update: Update):
+        """Start the next round of a team with its previous durations.
+
+        Args:
+            update: Telegram update from a group chat
+        """
+        async with get_async_session() as session:
+            team = await session.get(Team, update.effective_chat.id)
+        if team is None:
+            await update.effective_message.reply_text("Командный таймер не запущен.")
+            return
+        await self.start_team_timer(update, team.work_minutes, team.break_minutes)
+
+    async def _fire_timers(self, records: List[TimerRecord]):
+        """Handle a batch of expired timers.
+
+        Timer syncs wait until the batch is handled, so they neither see the
+        rows before the claim nor replace the break timers started for them.
+
+        Args:
+            records: Expired timer records
+        """
+        user_ids = {record.user_id for record in records}
+        self._firing |= user_ids
+        try:
+            async with self._fire_lock:
+                await self._fire_batch(records)
+        finally:
+            self._firing -= user_ids
+
+    async def _fire_batch(self, records: List[TimerRecord]):
+        """Claim expired timers, start their breaks and send the messages.
+
+        Args:
+            records: Expired timer records
+        """
+        now = time_module.time()
+        break_records = []
+        # A resume still waiting to be written holds the deadline claimed here
+        await self.pauses.flush()
+        async with get_async_session() as session:
+            claimed = await self._claim(session, records)
+            records = [record for record in records if record.user_id in claimed]
+            teams = await load_teams(
+                session, (r.user_id for r in records if is_team_key(r.user_id))
+            )
+            completed_by = [
+                record.user_id
+                for record in records
+                if record.phase == WORK_PHASE and record.session_id
+            ] + [
+                member.user_id
+                for record in records
+                if record.phase == WORK_PHASE and record.user_id in teams
+                for member in teams[record.user_id].members
             ]
-        ]
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        await context.bot.send_message(
-            chat_id=update.effective_chat.id,
-            text="🚀 Следующий раунд?",
-            reply_markup=reply_markup,
+            users = await self._get_user_infos(session, completed_by)
+            for record in records:
+                # The user may have started a new timer in the meantime
+                if record.phase != WORK_PHASE or record.user_id in self.timers:
+                    continue
+                # Coalesced or slightly late firing does not move the break
+                started = record.deadline
+                if now - record.deadline > MAX_DRIFT_CORRECTION_SECONDS:
+                    started = now
+                break_records.append(
+                    TimerRecord(
+                        deadline=started
+                        + record.break_minutes * config.TIMER_SECONDS_PER_MINUTE,
+                        user_id=record.user_id,
+                        chat_id=record.chat_id,
+                        phase=BREAK_PHASE,
+                        session_id=record.session_id,
+                        break_minutes=record.break_minutes,
+                    )
+                )
+            if break_records:
+                # A timer restarted meanwhile keeps its newer row
+                insert = dialect_insert(session.bind.dialect.name)
+                await session.execute(
+                    insert(PendingTimer)
+                    .values([self._pending_values(r) for r in break_records])
+                    .on_conflict_do_nothing(index_elements=[PendingTimer.user_id])
+                )
+            await session.commit()
+
+        for record in break_records:
+            if record.user_id not in self.timers:
+                self.timers.schedule(record)
+
+        team_records = [r for r in records if is_team_key(r.user_id)]
+        if team_records:
+            self._team_timer(team_records, break_records, teams)
+            records = [r for r in records if not is_team_key(r.user_id)]
+            break_records = [r for r in break_records if not is_team_key(r.user_id)]
+        work_records = [r for r in records if r.phase == WORK_PHASE]
+        if work_records:
+            self._work_timer(work_records, break_records, users)
+        finished = [r for r in records if r.phase == BREAK_PHASE]
+        if finished:
+            self._break_timer(finished)
+
+    def _work_timer(
+        self,
+        records: List[TimerRecord],
+        break_records: List[TimerRecord],
+        users: Dict[int, UserInfo],
+    ):
+        """Finish work periods and announce the breaks.
+
+        Args:
+            records: Claimed work-phase records
+            break_records: Break records started for them
+            users: Users of the records, for their live countdown setting
+        """
+        # Queue completed pomodoro counts for the next bulk write
+        completed_at = datetime.utcnow()
+        for record in records:
+            if record.session_id:
+                self.completions.add_completion(record.session_id, completed_at)
+
+        for record in break_records:
+            # Send break message with keyboard
+            keyboard = _break_keyboard()
+            sent = self.dispatcher.send_message(
+                record.chat_id, BREAK_STARTED, keyboard, priority=TIMER_PRIORITY
+            )
+            user = users.get(record.user_id)
+            if user is not None and user.live_countdown:
+                self.countdown.track_sent(
+                    sent,
+                    record.user_id,
+                    record.chat_id,
+                    BREAK_STARTED,
+                    BREAK_PHASE,
+                    keyboard,
+                )
+
+    def _break_timer(self, records: List[TimerRecord]):
+        """Finish breaks and prompt for the next round.
+
+        Args:
+            records: Claimed break-phase records
+        """
+        for record in records:
+            if record.session_id:
+                self.completions.end_session(record.session_id)
+
+            # Send next round prompt
+            self.dispatcher.send_message(
+                record.chat_id,
+                "🚀 Следующий раунд?",
+                _next_round_keyboard(),
+                priority=TIMER_PRIORITY,
+            )
+
+    def _team_timer(
+        self,
+        records: List[TimerRecord],
+        break_records: List[TimerRecord],
+        teams: Dict[int, TeamInfo],
+    ):
+        """Finish team work periods and breaks and notify the members.
+
+        Each member's pomodoro is queued for the same bulk write. A team
+        notified in the group gets one message whatever its size; with
+        DM_NOTIFY each member gets a message through the rate-limited
+        dispatcher, and the next round prompt still goes to the group.
+
+        Args:
+            records: Claimed team records
+            break_records: Break records started for any claimed records
+            teams: Settings and members of the claimed teams
+        """
+        breaks = {record.user_id for record in break_records}
+        completed_at = datetime.utcnow()
+        for record in records:
+            team = teams.get(record.user_id, TeamInfo(GROUP_NOTIFY, []))
+            if record.phase == WORK_PHASE:
+                # Members who joined as the round ended work from the next one
+                round_end = _from_timestamp(record.deadline)
+                credited = [
+                    member
+                    for member in team.members
+                    if member.joined_at is None or member.joined_at < round_end
+                ]
+                for member in credited:
+                    if member.session_id:
+                        self.completions.add_completion(member.session_id, completed_at)
+                # The team may have started a new round in the meantime
+                if record.user_id not in breaks:
+                    continue
+                if team.notify == DM_NOTIFY:
+                    self._notify_members(team, "✅ Пора на перерыв!")
+                else:
+                    self.dispatcher.send_message(
+                        record.chat_id,
+                        "✅ Пора на перерыв! Помидор засчитан участникам: "
+                        f"{len(credited)}",
+                        priority=TIMER_PRIORITY,
+                    )
+            else:
+                if team.notify == DM_NOTIFY:
+                    self._notify_members(team, "🚀 Перерыв окончен!")
+                self.dispatcher.send_message(
+                    record.chat_id,
+                    "🚀 Следующий командный раунд?",
+                    _team_next_round_keyboard(),
+                    priority=TIMER_PRIORITY,
+                )
+
+    def _notify_members(self, team: TeamInfo, text: str):
+        """Queue a direct message to every member of a team."""
+        for member in team.members:
+            self.dispatcher.send_message(member.user_id, text, priority=TIMER_PRIORITY)
+
+    async def _invalidate_today(self, days: List[Tuple[int, date]]):
+        """Bump the versions of days whose daily counters were committed."""
+        await best_effort(
+            self.state.incr_many(
+                {_today_version_key(user_id, day): 1 for user_id, day in days},
+                ttl=config.STATE_COUNTER_TTL_SECONDS,
+            ),
+            "invalidate daily counts",
         )
 
-        # Remove from active timers
-        if user_id in active_timers:
-            active_timers.pop(user_id)
+    async def _get_user_infos(
+        self, session, telegram_ids: List[int]
+    ) -> Dict[int, UserInfo]:
+        """Look up several users, querying only the ones not cached."""
+        users = {}
+        missing = []
+        for telegram_id in telegram_ids:
+            user = self.users.get(telegram_id)
+            if user is None:
+                missing.append(telegram_id)
+            else:
+                users[telegram_id] = user
+        if missing:
+            rows = await session.execute(
+                select(
+                    User.telegram_id, User.id, User.timezone, User.live_countdown
+                ).where(User.telegram_id.in_(missing))
+            )
+            for telegram_id, user_id, timezone, live_countdown in rows:
+                users[telegram_id] = UserInfo(user_id, timezone, live_countdown)
+                self.users.set(telegram_id, users[telegram_id])
+        return users
+
+    async def _get_user_info(self, session, telegram_id: int) -> Optional[UserInfo]:
+        """Look up a user's id, timezone and settings, trying the cache first."""
+        user = self.users.get(telegram_id)
+        if user is None:
+            row = (
+                await session.execute(
+                    select(User.id, User.timezone, User.live_countdown).where(
+                        User.telegram_id == telegram_id
+                    )
+                )
+            ).first()
+            if row is None:
+                return None
+            user = UserInfo(row.id, row.timezone, row.live_countdown)
+            self.users.set(telegram_id, user)
+        return user
+
+    def invalidate_user(self, telegram_id: int):
+        """Drop cached user fields after the user row changes.
+
+        Args:
+            telegram_id: Telegram user ID
+        """
+        self.users.invalidate(telegram_id)
+
+    async def get_session_info(self, session_id: int) -> Optional[SessionInfo]:
+        """Get the work and break durations of a pomodoro session.
+
+        Args:
+            session_id: Pomodoro session ID
+
+        Returns:
+            SessionInfo: Session durations, or None if the session does not exist
+        """
+        info = self.sessions.get(session_id)
+        if info is None:
+            async with get_async_session() as session:
+                row = (
+                    await session.execute(
+                        select(
+                            PomodoroSession.work_minutes, PomodoroSession.break_minutes
+                        ).where(PomodoroSession.id == session_id)
+                    )
+                ).first()
+            if row is None:
+                return None
+            info = SessionInfo(row.work_minutes, row.break_minutes)
+            self.sessions.set(session_id, info)
+        return info
 
     async def get_today_count(self, user_id: int) -> int:
         """Get the number of completed pomodoros for today.
@@ -210,29 +1173,170 @@ class TimerService:
         Returns:
             int: Number of completed pomodoros today
         """
-        today = datetime.utcnow().date()
-        today_start = datetime.combine(today, time.min)
-        today_end = datetime.combine(today, time.max)
-
-        count = 0
-        for session in get_db_session():
-            user = session.query(User).filter(User.telegram_id == user_id).first()
+        async with get_async_session() as session:
+            user = await self._get_user_info(session, user_id)
             if not user:
                 return 0
 
-            # Get completed pomodoros for today
-            pomodoros = (
-                session.query(PomodoroSession)
-                .filter(
-                    PomodoroSession.user_id == user.id,
-                    PomodoroSession.start_time >= today_start,
-                    PomodoroSession.start_time <= today_end,
+            # "Today" starts at midnight in the user's timezone
+            today = local_date(user.timezone, datetime.utcnow())
+            # Completions still buffered here are not in daily_stats yet
+            await self.completions.flush()
+            key = None
+            if self.cache_today:
+                version_key = _today_version_key(user.id, today)
+                versions = await best_effort(
+                    self.state.get_counters([version_key]), "read a daily count"
                 )
-                .all()
+                if versions is not None:
+                    key = _today_key(user.id, today, versions[version_key] or 0)
+                    counters = await best_effort(
+                        self.state.get_counters([key]), "read a daily count"
+                    )
+                    if counters and counters[key] is not None:
+                        return counters[key]
+
+            stats = await session.get(DailyStats, (user.id, today))
+
+        completed = stats.completed if stats else 0
+        if key is None:
+            return completed
+        counted = await best_effort(
+            self.state.set_counter_if_absent(
+                key, completed, ttl=config.STATE_COUNTER_TTL_SECONDS
+            ),
+            "store a daily count",
+        )
+        return completed if counted is None else counted
+
+    async def get_summary(self, user_id: int, period: str) -> Optional[PeriodSummary]:
+        """Get a user's statistics for the current week or month.
+
+        Args:
+            user_id: Telegram user ID
+            period: "week" or "month", in the user's timezone
+
+        Returns:
+            PeriodSummary: Period statistics, or None for unknown users
+        """
+        async with get_async_session() as session:
+            user = await self._get_user_info(session, user_id)
+            if not user:
+                return None
+
+            today = local_date(user.timezone, datetime.utcnow())
+            if period == "week":
+                start = week_start(today)
+                end = start + timedelta(days=6)
+            else:
+                start = today.replace(day=1)
+                end = today.replace(day=calendar.monthrange(today.year, today.month)[1])
+            return await get_period_summary(session, user.id, start, end, today)
+
+    async def pause_timer(self, update: Update):
+        """Pause the user's work period or break, keeping the time it has left.
+
+        Args:
+            update: Telegram update
+        """
+        user_id = update.effective_user.id
+        record, remaining = await self._lookup_timer(user_id)
+        if record is None:
+            await update.effective_message.reply_text(
+                "Нет запущенного таймера. /pomodoro — начать."
             )
-            count = sum(p.completed for p in pomodoros)
+            return
+        if remaining is not None:
+            await update.effective_message.reply_text(
+                "⏸ Таймер уже на паузе. /resume — продолжить."
+            )
+            return
 
-        return count
+        remaining = max(0.0, record.deadline - time_module.time())
+        self.timers.cancel(user_id)
+        # Other workers' timers are paused by their owners' timer sync
+        if self._owns(user_id):
+            self.paused[user_id] = PausedTimer(record, remaining)
+        self.pauses.pause(record, remaining)
+
+        await update.effective_message.reply_text(
+            f"⏸ Пауза. До конца {PHASE_ENDS[record.phase]} осталось "
+            f"{format_remaining(remaining)}. /resume — продолжить."
+        )
+
+    async def resume_timer(self, update: Update):
+        """Resume a paused timer with the time it had left.
+
+        Args:
+            update: Telegram update
+        """
+        user_id = update.effective_user.id
+        record, remaining = await self._lookup_timer(user_id)
+        if remaining is None:
+            await update.effective_message.reply_text("Таймер не на паузе.")
+            return
+
+        resumed = replace(record, deadline=time_module.time() + remaining)
+        self.paused.pop(user_id, None)
+        self.pauses.resume(record, resumed.deadline)
+        if self._owns(user_id):
+            self.timers.schedule(resumed)
+
+        await update.effective_message.reply_text(
+            f"▶️ Продолжаем! До конца {PHASE_ENDS[record.phase]} осталось "
+            f"{format_remaining(remaining)}."
+        )
+
+    async def send_status(self, update: Update):
+        """Tell the user how much time the current period has left.
+
+        Args:
+            update: Telegram update
+        """
+        record, remaining = await self._lookup_timer(update.effective_user.id)
+        if record is None:
+            text = "Нет запущенного таймера. /pomodoro — начать."
+        elif remaining is None:
+            left = max(0.0, record.deadline - time_module.time())
+            text = (
+                f"⏱ До конца {PHASE_ENDS[record.phase]} осталось "
+                f"{format_remaining(left)}."
+            )
+        else:
+            text = (
+                f"⏸ На паузе: до конца {PHASE_ENDS[record.phase]} осталось "
+                f"{format_remaining(remaining)}. /resume — продолжить."
+            )
+        await update.effective_message.reply_text(text)
+
+    async def toggle_live(self, update: Update):
+        """Turn the live countdown in the user's timer messages on or off.
+
+        Turning it on while a timer runs counts down in the reply.
+
+        Args:
+            update: Telegram update
+        """
+        user_id = update.effective_user.id
+        async with get_async_session() as session:
+            user = await self._get_or_create_user(session, update.effective_user)
+            # The cached setting may predate a toggle on another replica
+            row = await session.get(User, user.id)
+            row.live_countdown = enabled = not row.live_countdown
+            await session.commit()
+        self.users.set(user_id, user._replace(live_countdown=enabled))
+
+        if not enabled:
+            self.countdown.untrack(user_id)
+            await update.effective_message.reply_text("Живой отсчёт выключен.")
+            return
+        text = "📡 Живой отсчёт включён. /live — выключить."
+        message = await update.effective_message.reply_text(text)
+        record, _ = self._local_timer(user_id)
+        if record is not None:
+            self.countdown.track(
+                user_id, record.chat_id, message.message_id, text, record.phase
+            )
 
     async def skip_break(self, update: Update, context: CallbackContext):
         """Skip the break period and prompt for next round.
@@ -242,34 +1346,46 @@ class TimerService:
             context: Callback context
         """
         user_id = update.effective_user.id
-        
-        # Cancel break timer if active
-        if user_id in active_timers:
-            _, break_job = active_timers[user_id]
-            if break_job and not break_job.done():
-                break_job.cancel()
+
+        # Cancel break timer if active, even a paused one
+        record = self.timers.get(user_id)
+        if record is None and user_id in self.paused:
+            record = self.paused[user_id].record
+        elif record is None and self.shards is not None:
+            # Another worker may be arming this user's timer
+            record = await self._get_pending(user_id)
+        if record and record.phase == BREAK_PHASE:
+            self.timers.cancel(user_id)
+            self.paused.pop(user_id, None)
+            # The row must hold the deadline of the record being claimed
+            await self.pauses.flush()
+            async with get_async_session() as session:
+                claimed = await self._claim(
+                    session, [record], owned_only=False, paused=True
+                )
+                await session.commit()
+            # The break may have just ended on its own
+            if claimed and record.session_id:
+                self.completions.end_session(record.session_id)
+
+        chat_id = update.effective_chat.id
+        query = update.callback_query
 
         # Remove inline keyboard
-        await update.callback_query.edit_message_reply_markup(None)
-        
+        self.dispatcher.submit(
+            chat_id,
+            lambda: query.edit_message_reply_markup(None),
+            priority=TIMER_PRIORITY,
+        )
+
         # Send next round prompt
-        keyboard = [
-            [
-                InlineKeyboardButton("Да ✅", callback_data="next_round_yes"),
-                InlineKeyboardButton("Нет ❌", callback_data="next_round_no"),
-            ]
-        ]
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        await context.bot.send_message(
-            chat_id=update.effective_chat.id,
-            text="🚀 Следующий раунд?",
-            reply_markup=reply_markup,
+        self.dispatcher.send_message(
+            chat_id,
+            "🚀 Следующий раунд?",
+            _next_round_keyboard(),
+            priority=TIMER_PRIORITY,
         )
-        
-        # Remove from active timers
-        if user_id in active_timers:
-            active_timers.pop(user_id)
 
 
 # Create a singleton instance
-timer_service = TimerService() 
\ No newline at end of file
+timer_service = TimerService()
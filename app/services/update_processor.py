@@ -0,0 +1,78 @@
+"""Concurrent update processing for the Pomodoro bot."""
+
+import asyncio
+from contextlib import nullcontext
+from typing import Any, Awaitable, Dict, Optional
+
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor
+
+
+def update_user_id(update: object) -> Optional[int]:
+    """Get the key updates are serialized on: the user, else the chat."""
+    if not isinstance(update, Update):
+        return None
+    if update.effective_user is not None:
+        return update.effective_user.id
+    if update.effective_chat is not None:
+        return update.effective_chat.id
+    return None
+
+
+class PerUserUpdateProcessor(BaseUpdateProcessor):
+    """Process updates of different users concurrently, one user at a time.
+
+    Updates of the same user wait on a per-user lock in arrival order, so a
+    double click on a preset or on "next round" cannot run two
+    ``start_timer`` calls for the same user side by side. Locks are dropped
+    as soon as no update of the user is waiting for them.
+
+    ``process_update`` would hold one of the ``max_concurrent_updates``
+    slots for the whole call, waiting on the lock included, so a burst of
+    one user could take every slot while only one of its updates runs. An
+    update takes its slot here instead, once it is the user's turn.
+    """
+
+    def __init__(self, max_concurrent_updates: int):
+        """Initialize the PerUserUpdateProcessor.
+
+        Args:
+            max_concurrent_updates: Maximum number of updates in flight
+        """
+        super().__init__(max_concurrent_updates)
+        self._slots = self._semaphore
+        self._semaphore = nullcontext()
+        self._locks: Dict[int, asyncio.Lock] = {}
+        self._users: Dict[int, int] = {}
+
+    @property
+    def active_users(self) -> int:
+        """Number of users with an update in flight or waiting."""
+        return len(self._locks)
+
+    async def do_process_update(self, update: object, coroutine: Awaitable[Any]):
+        """Run the update once earlier updates of the same user are done."""
+        user_id = update_user_id(update)
+        if user_id is None:
+            async with self._slots:
+                await coroutine
+            return
+
+        lock = self._locks.get(user_id)
+        if lock is None:
+            lock = self._locks[user_id] = asyncio.Lock()
+        self._users[user_id] = self._users.get(user_id, 0) + 1
+        try:
+            async with lock, self._slots:
+                await coroutine
+        finally:
+            self._users[user_id] -= 1
+            if not self._users[user_id]:
+                del self._users[user_id]
+                del self._locks[user_id]
+
+    async def initialize(self):
+        """Nothing to set up."""
+
+    async def shutdown(self):
+        """Nothing to release."""
@@ -0,0 +1,223 @@
+"""Write-behind buffer for pomodoro completion updates."""
+
+import asyncio
+import logging
+import time
+from datetime import date, datetime
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import case, select, update
+
+from app.db.models import PomodoroSession, User, get_async_session
+from app.services.stats import RollupIncrements
+
+logger = logging.getLogger(__name__)
+
+
+class CompletionBuffer:
+    """Collect completion increments and session ends, then write them in bulk.
+
+    Events are flushed every ``flush_interval_ms`` milliseconds, as soon as
+    ``max_events`` events are waiting, and when the buffer is stopped. Each
+    flush is one transaction with one ``UPDATE ... CASE`` per column and one
+    upsert per hourly, daily and weekly rollup, no matter how many sessions
+    it covers.
+    """
+
+    def __init__(self, flush_interval_ms: int = 500, max_events: int = 1000):
+        """Initialize the CompletionBuffer.
+
+        Args:
+            flush_interval_ms: Maximum time an event waits before it is written
+            max_events: Number of waiting events that triggers an early flush
+        """
+        self.flush_interval = flush_interval_ms / 1000
+        self.max_events = max_events
+        # session_id -> UTC completion times
+        self._completions: Dict[int, List[datetime]] = {}
+        # session_id -> UTC end time
+        self._session_ends: Dict[int, datetime] = {}
+        self._queue_depth = 0
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+        # Called with the (user ID, local date) days whose daily counters a
+        # flush committed, before the flush lock is released; set by the
+        # timer service
+        self.on_flush: Optional[Callable[[List[Tuple[int, date]]], Awaitable[None]]] = (
+            None
+        )
+
+        # Metrics
+        self.flushes = 0
+        self.flush_failures = 0
+        self.flushed_events = 0
+        self.last_flush_seconds = 0.0
+        self.max_flush_seconds = 0.0
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of events waiting to be written."""
+        return self._queue_depth
+
+    @property
+    def metrics(self) -> dict:
+        """Snapshot of the buffer metrics."""
+        return {
+            "queue_depth": self.queue_depth,
+            "flushes": self.flushes,
+            "flush_failures": self.flush_failures,
+            "flushed_events": self.flushed_events,
+            "last_flush_seconds": self.last_flush_seconds,
+            "max_flush_seconds": self.max_flush_seconds,
+        }
+
+    def add_completion(self, session_id: int, completed_at: datetime = None):
+        """Queue one completed pomodoro for a session."""
+        completed_at = completed_at or datetime.utcnow()
+        self._completions.setdefault(session_id, []).append(completed_at)
+        self._queued()
+
+    def end_session(self, session_id: int, ended_at: datetime = None):
+        """Queue setting the end time of a session."""
+        self._session_ends[session_id] = ended_at or datetime.utcnow()
+        self._queued()
+
+    def _queued(self):
+        """Account for a new event and wake the flusher when full."""
+        self._queue_depth += 1
+        if self._wakeup is not None and self._queue_depth >= self.max_events:
+            self._wakeup.set()
+
+    def start(self):
+        """Start the periodic flusher in the running event loop."""
+        if self._task is not None:
+            return
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the periodic flusher and write everything still queued."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            self._wakeup = None
+        await self.flush()
+
+    async def _run(self):
+        """Flush on a fixed interval or when the buffer fills up."""
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    async def flush(self):
+        """Write all queued events in a single transaction."""
+        async with self._lock:
+            if not self._queue_depth:
+                return
+            completions, self._completions = self._completions, {}
+            session_ends, self._session_ends = self._session_ends, {}
+            events, self._queue_depth = self._queue_depth, 0
+
+            started = time.perf_counter()
+            try:
+                days = await self._write(completions, session_ends)
+            except Exception as e:
+                self.flush_failures += 1
+                logger.error(f"Failed to flush {events} events: {e}", exc_info=True)
+                self._requeue(completions, session_ends)
+                return
+
+            elapsed = time.perf_counter() - started
+            self.flushes += 1
+            self.flushed_events += events
+            self.last_flush_seconds = elapsed
+            self.max_flush_seconds = max(self.max_flush_seconds, elapsed)
+            logger.debug(f"Flushed {events} events in {elapsed * 1000:.1f} ms")
+            if days and self.on_flush is not None:
+                await self.on_flush(days)
+
+    def _requeue(
+        self,
+        completions: Dict[int, List[datetime]],
+        session_ends: Dict[int, datetime],
+    ):
+        """Put events from a failed flush back in front of newer ones."""
+        for session_id, times in completions.items():
+            self._completions[session_id] = times + self._completions.get(
+                session_id, []
+            )
+        for session_id, ended_at in session_ends.items():
+            self._session_ends.setdefault(session_id, ended_at)
+        self._queue_depth = sum(map(len, self._completions.values())) + len(
+            self._session_ends
+        )
+
+    @staticmethod
+    async def _write(
+        completions: Dict[int, List[datetime]],
+        session_ends: Dict[int, datetime],
+    ) -> List[Tuple[int, date]]:
+        """Apply completions, daily counters and session ends.
+
+        Returns:
+            List[Tuple[int, date]]: Days whose daily counters changed
+        """
+        days = []
+        async with get_async_session() as session:
+            if completions:
+                rows = await session.execute(
+                    select(
+                        PomodoroSession.id,
+                        PomodoroSession.user_id,
+                        PomodoroSession.work_minutes,
+                        User.timezone,
+                    )
+                    .join(User, User.id == PomodoroSession.user_id)
+                    .where(PomodoroSession.id.in_(completions))
+                )
+                rollups = RollupIncrements()
+                for session_id, user_id, work_minutes, timezone in rows:
+                    for completed_at in completions[session_id]:
+                        rollups.add(user_id, timezone, completed_at, work_minutes)
+
+                counts = {
+                    session_id: len(times) for session_id, times in completions.items()
+                }
+                await session.execute(
+                    update(PomodoroSession)
+                    .where(PomodoroSession.id.in_(counts))
+                    .values(
+                        completed=PomodoroSession.completed
+                        + case(counts, value=PomodoroSession.id, else_=0)
+                    )
+                    .execution_options(synchronize_session=False)
+                )
+                for statement in rollups.upserts(session.bind.dialect.name):
+                    await session.execute(statement)
+                days = list(rollups.daily)
+
+            if session_ends:
+                await session.execute(
+                    update(PomodoroSession)
+                    .where(PomodoroSession.id.in_(session_ends))
+                    .values(
+                        end_time=case(
+                            session_ends,
+                            value=PomodoroSession.id,
+                            else_=PomodoroSession.end_time,
+                        )
+                    )
+                    .execution_options(synchronize_session=False)
+                )
+
+            await session.commit()
+        return days
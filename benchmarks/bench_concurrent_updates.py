@@ -0,0 +1,144 @@
+"""Compare sequential and concurrent update processing.
+
+Feeds the same burst of updates through three update processors of the real
+application, talking to a fake Bot API that answers after a fixed latency:
+
+    sequential  one update at a time (python-telegram-bot's default)
+    concurrent  SimpleUpdateProcessor, no ordering between updates
+    per-user    PerUserUpdateProcessor, concurrent across users only
+
+Every user sends /start, double-clicks a preset and asks /today. The report
+shows throughput and latency, handler errors and users whose live timer does
+not belong to their latest session, which is what racing start_timer calls
+leave behind.
+
+Usage:
+    python -m benchmarks.bench_concurrent_updates --users 500 --api-latency 0.02
+
+Set DATABASE_URL to benchmark against Postgres instead of a temporary SQLite
+file.
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import time
+
+from benchmarks.common import percentile
+from benchmarks.fake_bot_api import FakeBotAPI, UpdateFactory
+
+
+async def stale_timers(user_ids) -> int:
+    """Count users whose live timer is not from their latest session."""
+    from sqlalchemy import func, select
+
+    from app.db.models import PomodoroSession, User, get_async_session
+    from app.services.timer import timer_service
+
+    async with get_async_session() as session:
+        rows = await session.execute(
+            select(User.telegram_id, func.max(PomodoroSession.id))
+            .join(PomodoroSession, PomodoroSession.user_id == User.id)
+            .where(User.telegram_id.in_(user_ids))
+            .group_by(User.telegram_id)
+        )
+        latest = dict(rows.all())
+    stale = 0
+    for user_id in user_ids:
+        record = timer_service.timers.get(user_id)
+        if record is None or record.session_id != latest.get(user_id):
+            stale += 1
+    return stale
+
+
+async def run_mode(name: str, processor, application, args, offset: int, errors):
+    """Process a burst of updates through one processor and print the results."""
+    from telegram import Update
+
+    factory = UpdateFactory()
+    user_ids = [offset + index for index in range(args.users)]
+    # Users interleave, each user's own updates keep their order
+    updates = []
+    for step in ("/start", "preset_25_5", "preset_25_5", "/today"):
+        for user_id in user_ids:
+            if step.startswith("/"):
+                data = factory.command(user_id, step)
+            else:
+                data = factory.callback(user_id, step)
+            updates.append(Update.de_json(data, application.bot))
+
+    latencies = []
+
+    async def one(update):
+        started = time.perf_counter()
+        await processor.process_update(update, application.process_update(update))
+        latencies.append(time.perf_counter() - started)
+
+    errors.clear()
+    await processor.initialize()
+    started = time.perf_counter()
+    await asyncio.gather(*(asyncio.create_task(one(update)) for update in updates))
+    elapsed = time.perf_counter() - started
+    await processor.shutdown()
+
+    print(
+        f"{name:>10}: {len(updates) / elapsed:8.1f} updates/s, "
+        f"p50 {percentile(latencies, 0.5) * 1000:8.1f} ms, "
+        f"p99 {percentile(latencies, 0.99) * 1000:8.1f} ms, "
+        f"errors {len(errors)}, stale timers {await stale_timers(user_ids)}"
+    )
+
+
+async def main(args, api: FakeBotAPI):
+    """Run all modes against one application."""
+    from telegram.ext import SimpleUpdateProcessor
+
+    from app.bot import create_application
+    from app.db.models import async_engine
+    from app.services.timer import timer_service
+    from app.services.update_processor import PerUserUpdateProcessor
+
+    logging.getLogger().setLevel(logging.CRITICAL)
+    api.start()
+    application = await create_application()
+    errors = []
+
+    async def record_error(update, context):
+        errors.append(context.error)
+
+    application.add_error_handler(record_error)
+    modes = [
+        ("sequential", SimpleUpdateProcessor(1)),
+        ("concurrent", SimpleUpdateProcessor(args.concurrency)),
+        ("per-user", PerUserUpdateProcessor(args.concurrency)),
+    ]
+    try:
+        for index, (name, processor) in enumerate(modes):
+            offset = 3_000_000 + index * 1_000_000
+            await run_mode(name, processor, application, args, offset, errors)
+    finally:
+        await timer_service.shutdown()
+        await application.shutdown()
+        await api.stop()
+        await async_engine.dispose()
+
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument(
+        "--api-latency", type=float, default=0.02, help="Seconds per Bot API call"
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    arguments = parse_args()
+    fake_api = FakeBotAPI(latency=arguments.api_latency)
+    fake_api.bind()
+    # app.config reads this at import time
+    os.environ["TELEGRAM_API_URL"] = fake_api.base_url
+    asyncio.run(main(arguments, fake_api))
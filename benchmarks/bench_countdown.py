@@ -0,0 +1,106 @@
+"""Benchmark the edit volume of live countdowns as more users opt in.
+
+Simulates ``--users`` opted-in work timers with deadlines spread evenly
+from ``--minutes`` minutes to ``--spread`` seconds later, and runs the
+countdown ticker once per simulated second until they all end. Edits are
+counted instead of sent. Compares editing every message every 5 seconds
+with the adaptive cadence, without a budget and with ``--budget`` edits per
+second. The lag is how long the most overdue edit has waited at the end of
+a tick.
+
+Usage:
+    python -m benchmarks.bench_countdown --users 10000 --minutes 25
+"""
+
+import argparse
+import asyncio
+from unittest.mock import patch
+
+import benchmarks.common  # noqa: F401
+
+# isort: split
+from app.services.countdown import CADENCE, LiveCountdown
+from app.services.scheduler import WORK_PHASE, TimerRecord
+
+
+class CountingDispatcher:
+    """Stand-in dispatcher counting the edits of each second."""
+
+    def __init__(self):
+        """Initialize the CountingDispatcher."""
+        self.now = 0
+        self.per_second = {}
+
+    def submit(self, chat_id, call, priority):
+        """Count an edit and resolve it at once."""
+        self.per_second[self.now] = self.per_second.get(self.now, 0) + 1
+        future = asyncio.get_running_loop().create_future()
+        future.set_result(True)
+        return future
+
+
+async def run(args, budget: float) -> tuple:
+    """Count down every timer to its end and get the edit counts and lag."""
+    dispatcher = CountingDispatcher()
+    duration = args.minutes * 60
+    timers = {
+        user_id: TimerRecord(
+            deadline=args.spread * user_id / args.users + duration,
+            user_id=user_id,
+            chat_id=user_id,
+            phase=WORK_PHASE,
+        )
+        for user_id in range(args.users)
+    }
+    countdown = LiveCountdown(
+        dispatcher,
+        lambda user_id: (timers.get(user_id), None),
+        edits_per_second=budget,
+    )
+    for user_id in timers:
+        countdown.track(user_id, user_id, user_id, "⏱", WORK_PHASE)
+
+    lag = 0.0
+    now = 0
+    while len(countdown):
+        now += 1
+        dispatcher.now = now
+        for user_id in [u for u, r in timers.items() if r.deadline <= now]:
+            del timers[user_id]
+        await countdown.tick(float(now), float(now))
+        overdue = [
+            now - message.next_edit
+            for message in countdown._messages.values()
+            if message.next_edit <= now
+        ]
+        lag = max([lag, *overdue])
+    return dispatcher.per_second, lag, now
+
+
+def main():
+    """Run the benchmark and print the results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--minutes", type=float, default=25.0)
+    parser.add_argument("--spread", type=float, default=600.0)
+    parser.add_argument("--budget", type=float, default=5.0)
+    args = parser.parse_args()
+
+    unlimited = float(args.users)
+    for name, cadence, budget in (
+        ("every 5 s", ((0, 5),), unlimited),
+        ("adaptive", CADENCE, unlimited),
+        ("adaptive, budget", CADENCE, args.budget),
+    ):
+        with patch("app.services.countdown.CADENCE", cadence):
+            per_second, lag, seconds = asyncio.run(run(args, budget))
+        edits = sum(per_second.values())
+        print(
+            f"{name:>16}: {edits:9d} edits, {edits / args.users:6.1f} per timer, "
+            f"peak {max(per_second.values()):6d}/s, "
+            f"mean {edits / seconds:8.1f}/s, max lag {lag:6.0f} s"
+        )
+
+
+if __name__ == "__main__":
+    main()
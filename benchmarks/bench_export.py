@@ -0,0 +1,130 @@
+"""Benchmark the analytics export of a large pomodoro_sessions table.
+
+Fills the table with ``--rows`` synthetic sessions, then exports it in full
+to Parquet and to CSV and reports the rows per second, the size of the files
+and the peak resident memory of each run. Each format is exported in a child
+process so that the peak memory of one run does not hide the other's. Each
+full export is followed by an incremental one with nothing changed.
+
+Usage:
+    python -m benchmarks.bench_export --rows 10000000
+
+Set DATABASE_URL to benchmark against Postgres instead of a temporary SQLite
+file.
+"""
+
+import argparse
+import multiprocessing
+import os
+import resource
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import benchmarks.common  # noqa: F401
+
+# isort: split
+from sqlalchemy import func, insert, select
+
+from app.db.models import PomodoroSession, User, engine, get_db_session, init_db
+from app.services.export import CSV, PARQUET, export_table, resolve_format
+
+INSERT_BATCH = 50_000
+
+
+def fill(rows: int):
+    """Insert synthetic sessions of 1000 users with executemany batches."""
+    start = datetime.utcnow() - timedelta(days=365)
+    with engine.begin() as connection:
+        connection.execute(
+            insert(User),
+            [
+                {"telegram_id": 10_000_000 + index, "first_name": "Bench"}
+                for index in range(1000)
+            ],
+        )
+        first_user = connection.scalar(select(func.min(User.id)))
+        for offset in range(0, rows, INSERT_BATCH):
+            batch = []
+            for index in range(offset, min(rows, offset + INSERT_BATCH)):
+                started = start + timedelta(seconds=index * 3)
+                batch.append(
+                    {
+                        "user_id": first_user + index % 1000,
+                        "work_minutes": 25,
+                        "break_minutes": 5,
+                        "start_time": started,
+                        "end_time": started + timedelta(minutes=30),
+                        "completed": index % 4,
+                        "updated_at": started + timedelta(minutes=30),
+                    }
+                )
+            connection.execute(insert(PomodoroSession), batch)
+
+
+def directory_size(path: str) -> int:
+    """Get the total size of the files under a directory."""
+    return sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _, names in os.walk(path)
+        for name in names
+    )
+
+
+def run_export(fmt: str, output: str, page_size: int, full: bool, results):
+    """Export the sessions in a child process and send back what it cost."""
+    started = time.perf_counter()
+    for session in get_db_session():
+        result = export_table(
+            session, "sessions", output, fmt=fmt, page_size=page_size, full=full
+        )
+    elapsed = time.perf_counter() - started
+    # ru_maxrss is in kilobytes on Linux
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    results.put((result.rows, elapsed, peak))
+
+
+def measure(name: str, fmt: str, output: str, page_size: int, full: bool = True):
+    """Run one export and print its throughput, file size and peak memory."""
+    context = multiprocessing.get_context("fork")
+    results = context.Queue()
+    process = context.Process(
+        target=run_export, args=(fmt, output, page_size, full, results)
+    )
+    process.start()
+    rows, elapsed, peak = results.get()
+    process.join()
+    print(
+        f"{name:>14}: {rows:10d} rows in {elapsed:7.2f} s "
+        f"({rows / max(elapsed, 1e-9):10.0f} rows/s), "
+        f"{directory_size(output) / 2**20:8.1f} MB, "
+        f"peak RSS {peak / 2**20:6.1f} MB"
+    )
+
+
+def main():
+    """Run the benchmark and print the results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--page-size", type=int, default=50_000)
+    args = parser.parse_args()
+
+    init_db()
+    started = time.perf_counter()
+    fill(args.rows)
+    print(f"Inserted {args.rows} sessions in {time.perf_counter() - started:.1f} s")
+    # Release the filling connections before the children fork
+    engine.dispose()
+
+    base = tempfile.mkdtemp()
+    formats = [CSV]
+    if resolve_format(PARQUET) == PARQUET:
+        formats.insert(0, PARQUET)
+    for fmt in formats:
+        output = os.path.join(base, fmt)
+        measure(fmt, fmt, output, args.page_size)
+        measure(f"{fmt}, again", fmt, output, args.page_size, full=False)
+
+
+if __name__ == "__main__":
+    main()
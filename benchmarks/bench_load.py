@@ -0,0 +1,260 @@
+"""Load-test the whole bot against a fake Telegram Bot API server.
+
+Builds the real application with ``create_application`` pointed at a local
+fake Bot API and drives synthetic users through /start, a preset, the work
+timer, an optional skip of the break and the next-round prompt. Timer minutes
+are compressed with TIMER_SECONDS_PER_MINUTE, so a 25/5 pomodoro takes a few
+seconds.
+
+Reports:
+    - p50/p99 handler latency per update type
+    - timer firing skew: delivery of the notification minus the deadline
+    - database queries per update type
+    - RSS growth per active timer
+
+Usage:
+    python -m benchmarks.bench_load --users 10000 --seconds-per-minute 0.2
+
+Set DATABASE_URL to load-test Postgres instead of a temporary SQLite file.
+"""
+
+import argparse
+import asyncio
+import contextvars
+import logging
+import os
+import random
+import resource
+import time
+from collections import defaultdict
+
+from benchmarks.common import percentile
+from benchmarks.fake_bot_api import FakeBotAPI, UpdateFactory
+
+# Query counter of the update being processed
+_update_queries = contextvars.ContextVar("update_queries", default=None)
+
+
+def current_rss() -> int:
+    """Get the resident set size of this process in bytes."""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        # Peak RSS is the closest portable approximation
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class LoadTest:
+    """Synthetic users talking to the bot through real Update objects."""
+
+    def __init__(self, application, api: FakeBotAPI, args):
+        """Initialize the LoadTest.
+
+        Args:
+            application: Application built by ``create_application``
+            api: Fake Bot API the application talks to
+            args: Parsed command line arguments
+        """
+        self.application = application
+        self.api = api
+        self.args = args
+        self.random = random.Random(args.seed)
+        self.semaphore = asyncio.Semaphore(args.concurrency)
+        self.updates = UpdateFactory()
+        self.latencies = defaultdict(list)
+        self.queries = defaultdict(list)
+        self.skews = defaultdict(list)
+        self.lost = 0
+        self.peak_timers = 0
+        self.peak_rss = 0
+
+    async def send(self, kind: str, data: dict):
+        """Process one update, recording its latency and query count."""
+        from telegram import Update
+
+        update = Update.de_json(data, self.application.bot)
+        async with self.semaphore:
+            counter = [0]
+            token = _update_queries.set(counter)
+            started = time.perf_counter()
+            try:
+                await self.application.process_update(update)
+            finally:
+                self.latencies[kind].append(time.perf_counter() - started)
+                self.queries[kind].append(counter[0])
+                _update_queries.reset(token)
+
+    async def arrival(self, user_id: int, marker: str):
+        """Wait for a message to reach a user's chat.
+
+        Returns:
+            float: Delivery time, or None after the timeout
+        """
+        try:
+            return await asyncio.wait_for(
+                asyncio.shield(self.api.expect(user_id, marker)), self.args.timeout
+            )
+        except asyncio.TimeoutError:
+            self.lost += 1
+            return None
+
+    def deadline(self, user_id: int, phase: str):
+        """Get the deadline of a user's live timer in the given phase."""
+        from app.services.timer import timer_service
+
+        record = timer_service.timers.get(user_id)
+        return record.deadline if record and record.phase == phase else None
+
+    async def user(self, user_id: int):
+        """Run one user through a full pomodoro."""
+        await self.send("/start", self.updates.command(user_id, "/start"))
+        await self.send("preset", self.updates.callback(user_id, self.args.preset))
+        work_deadline = self.deadline(user_id, "work")
+
+        delivered = await self.arrival(user_id, "✅")
+        if delivered is None:
+            return
+        if work_deadline is not None:
+            self.skews["work"].append(delivered - work_deadline)
+        break_deadline = self.deadline(user_id, "break")
+
+        if self.random.random() < self.args.skip_fraction:
+            await self.send("skip_break", self.updates.callback(user_id, "skip_break"))
+            break_deadline = None
+        delivered = await self.arrival(user_id, "🚀")
+        if delivered is None:
+            return
+        if break_deadline is not None:
+            self.skews["break"].append(delivered - break_deadline)
+
+        await self.send(
+            "next_round_no", self.updates.callback(user_id, "next_round_no")
+        )
+
+    async def sample(self, baseline: int):
+        """Track the peak number of active timers and the RSS at that moment."""
+        from app.services.timer import timer_service
+
+        while True:
+            active = len(timer_service.timers)
+            if active > self.peak_timers:
+                self.peak_timers = active
+                self.peak_rss = current_rss() - baseline
+            await asyncio.sleep(0.05)
+
+    async def run(self):
+        """Run all users, starting them evenly over the ramp-up period."""
+        started = time.perf_counter()
+        baseline = current_rss()
+        sampler = asyncio.create_task(self.sample(baseline))
+        delay = self.args.ramp / self.args.users if self.args.users else 0
+        tasks = []
+        for user_id in range(1, self.args.users + 1):
+            tasks.append(asyncio.create_task(self.user(1_000_000 + user_id)))
+            if delay:
+                await asyncio.sleep(delay)
+        await asyncio.gather(*tasks)
+        sampler.cancel()
+        return time.perf_counter() - started
+
+    def report(self, elapsed: float):
+        """Print the collected measurements."""
+        print(f"Users: {self.args.users}, finished in {elapsed:.1f} s")
+        print(f"Lost notifications: {self.lost}, injected 429s: {self.api.throttled}")
+        print("Handler latency and DB queries per update:")
+        for kind, values in self.latencies.items():
+            queries = self.queries[kind]
+            print(
+                f"  {kind:>14}: n={len(values):6d} "
+                f"p50={percentile(values, 0.5) * 1000:8.1f} ms "
+                f"p99={percentile(values, 0.99) * 1000:8.1f} ms "
+                f"queries avg={sum(queries) / len(queries):.2f} max={max(queries)}"
+            )
+        print("Timer firing skew (delivery minus deadline):")
+        for phase, values in self.skews.items():
+            print(
+                f"  {phase:>14}: n={len(values):6d} "
+                f"p50={percentile(values, 0.5) * 1000:8.1f} ms "
+                f"p99={percentile(values, 0.99) * 1000:8.1f} ms "
+                f"max={max(values) * 1000:8.1f} ms"
+            )
+        if self.peak_timers:
+            print(
+                f"Peak active timers: {self.peak_timers}, RSS growth "
+                f"{self.peak_rss / 2**20:.1f} MiB, "
+                f"{self.peak_rss / self.peak_timers / 1024:.2f} KiB per timer"
+            )
+        print(f"Bot API calls: {dict(self.api.calls)}")
+
+
+async def main(args, api: FakeBotAPI):
+    """Start the fake API and the bot, run the load and print the report."""
+    from sqlalchemy import event
+
+    from app.bot import create_application
+    from app.db.models import async_engine
+    from app.services.timer import timer_service
+
+    @event.listens_for(async_engine.sync_engine, "before_cursor_execute")
+    def count_query(*_):
+        counter = _update_queries.get()
+        if counter is not None:
+            counter[0] += 1
+
+    # Per-request logs of the bot, httpx and tornado drown the report
+    logging.getLogger().setLevel(logging.WARNING)
+    api.start()
+    application = await create_application()
+    try:
+        load = LoadTest(application, api, args)
+        elapsed = await load.run()
+    finally:
+        await timer_service.shutdown()
+        await application.shutdown()
+        await api.stop()
+        await async_engine.dispose()
+    load.report(elapsed)
+
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument(
+        "--ramp", type=float, default=5.0, help="Seconds to start all users over"
+    )
+    parser.add_argument("--preset", default="preset_25_5")
+    parser.add_argument(
+        "--seconds-per-minute",
+        type=float,
+        default=0.2,
+        help="Real seconds per timer minute (60 is real time)",
+    )
+    parser.add_argument(
+        "--skip-fraction", type=float, default=0.3, help="Share of users skipping"
+    )
+    parser.add_argument(
+        "--error-429", type=float, default=0.0, help="Share of sends answered 429"
+    )
+    parser.add_argument(
+        "--rate-limit", type=float, help="Override TELEGRAM_RATE_LIMIT (msg/s)"
+    )
+    parser.add_argument(
+        "--timeout", type=float, default=300.0, help="Seconds to wait per message"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    arguments = parse_args()
+    fake_api = FakeBotAPI(error_fraction=arguments.error_429, seed=arguments.seed)
+    fake_api.bind()
+    # app.config reads these at import time
+    os.environ["TELEGRAM_API_URL"] = fake_api.base_url
+    os.environ["TIMER_SECONDS_PER_MINUTE"] = str(arguments.seconds_per_minute)
+    if arguments.rate_limit:
+        os.environ["TELEGRAM_RATE_LIMIT"] = str(arguments.rate_limit)
+    asyncio.run(main(arguments, fake_api))
@@ -0,0 +1,138 @@
+"""Benchmark the hot model queries as pomodoro_sessions grows.
+
+Grows the database to each of ``--sizes`` sessions with the synthetic data
+generator (scripts/generate_data.py) and times at every size:
+
+- ``today``: /today of a random user with cold caches, so the user row and
+  daily_stats are read from the database
+- ``today, warm``: /today again, served by the user cache and state store
+- ``next round``: the lookup of the previous session behind the
+  ``next_round_yes`` button, with an empty session cache
+- ``sweep``: the session sweeper that replaced the midnight counter reset,
+  closing the stale sessions of the rows just added
+- ``sweep, idle``: the sweeper again with nothing left to close
+
+Usage:
+    python -m benchmarks.bench_models --sizes 10000 1000000 10000000
+
+Set DATABASE_URL to benchmark against Postgres instead of a temporary SQLite
+file; rows are appended, so start from an empty database.
+"""
+
+import argparse
+import asyncio
+import time
+
+import benchmarks.common  # noqa: F401
+
+# isort: split
+import numpy as np
+from sqlalchemy import func, select
+
+from app.db.models import (
+    PomodoroSession,
+    User,
+    async_engine,
+    engine,
+    get_async_session,
+    init_db,
+)
+from app.services.state import MemoryStateStore
+from app.services.timer import TimerService
+from benchmarks.common import percentile
+from scripts.generate_data import load_synthetic_data
+
+
+async def sample_ids(rng, lookups: int) -> tuple:
+    """Draw random Telegram user IDs and session IDs to look up."""
+    async with get_async_session() as session:
+        users = (
+            await session.execute(select(func.min(User.id), func.max(User.id)))
+        ).one()
+        sessions = (
+            await session.execute(
+                select(func.min(PomodoroSession.id), func.max(PomodoroSession.id))
+            )
+        ).one()
+        user_ids = rng.integers(users[0], users[1] + 1, lookups).tolist()
+        rows = await session.execute(
+            select(User.telegram_id).where(User.id.in_(user_ids))
+        )
+        telegram_ids = [telegram_id for (telegram_id,) in rows]
+    session_ids = rng.integers(sessions[0], sessions[1] + 1, lookups).tolist()
+    return telegram_ids, session_ids
+
+
+async def time_calls(name: str, call, keys: list, before=None):
+    """Await ``call`` for each key and print the latency percentiles."""
+    latencies = []
+    for key in keys:
+        if before:
+            before()
+        started = time.perf_counter()
+        await call(key)
+        latencies.append(time.perf_counter() - started)
+    print(
+        f"{name:>14}: p50 {percentile(latencies, 0.5) * 1000:7.2f} ms, "
+        f"p99 {percentile(latencies, 0.99) * 1000:7.2f} ms"
+    )
+
+
+async def time_sweep(name: str, service: TimerService):
+    """Run one sweep and print how long it took and what it closed."""
+    started = time.perf_counter()
+    closed = await service.sweeper.sweep()
+    elapsed = time.perf_counter() - started
+    print(f"{name:>14}: {elapsed * 1000:9.1f} ms, {closed} sessions closed")
+
+
+async def run(rng, lookups: int):
+    """Time the queries against the current database."""
+    service = TimerService()
+    telegram_ids, session_ids = await sample_ids(rng, lookups)
+
+    def forget():
+        service.users.clear()
+        service.state = MemoryStateStore()
+
+    await time_calls("today", service.get_today_count, telegram_ids, before=forget)
+    for telegram_id in telegram_ids:
+        await service.get_today_count(telegram_id)
+    await time_calls("today, warm", service.get_today_count, telegram_ids)
+    await time_calls(
+        "next round",
+        service.get_session_info,
+        session_ids,
+        before=service.sessions.clear,
+    )
+    await time_sweep("sweep", service)
+    await time_sweep("sweep, idle", service)
+    await async_engine.dispose()
+
+
+def main():
+    """Run the benchmark and print the results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[10_000, 1_000_000, 10_000_000]
+    )
+    parser.add_argument("--lookups", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    init_db()
+    rng = np.random.default_rng(args.seed)
+    loaded = 0
+    for size in sorted(args.sizes):
+        started = time.perf_counter()
+        load_synthetic_data(engine, size - loaded, seed=args.seed + size)
+        loaded = size
+        print(
+            f"{size} sessions ({engine.dialect.name}), "
+            f"loaded in {time.perf_counter() - started:.1f} s"
+        )
+        asyncio.run(run(rng, args.lookups))
+
+
+if __name__ == "__main__":
+    main()
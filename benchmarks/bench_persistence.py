@@ -0,0 +1,69 @@
+"""Benchmark the cost of writing user_data through DatabasePersistence.
+
+Hands ``--users`` users' data to the persistence the way Application does
+every update interval, then repeats with only ``--changed`` of them having
+a new session and with nothing changed. Reports the duration of each run
+and the rows it wrote.
+
+Usage:
+    python -m benchmarks.bench_persistence --users 10000 --changed 0.1
+
+Set DATABASE_URL to benchmark against Postgres instead of a temporary SQLite
+file.
+"""
+
+import argparse
+import asyncio
+import random
+import time
+
+import benchmarks.common  # noqa: F401
+
+# isort: split
+from app.db.models import async_engine, init_db
+from app.services.persistence import DatabasePersistence
+
+
+async def persistence_run(persistence: DatabasePersistence, user_data: dict, name: str):
+    """Hand all users over at once and print what it cost."""
+    written = persistence.rows_written
+    flushes = persistence.flushes
+    started = time.perf_counter()
+    await asyncio.gather(
+        *(
+            persistence.update_user_data(user_id, dict(data))
+            for user_id, data in user_data.items()
+        )
+    )
+    elapsed = time.perf_counter() - started
+    print(
+        f"{name:>9}: {elapsed * 1000:8.1f} ms, "
+        f"{persistence.rows_written - written:6d} rows in "
+        f"{persistence.flushes - flushes} flushes"
+    )
+
+
+async def main():
+    """Run the benchmark and print the results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--changed", type=float, default=0.1)
+    args = parser.parse_args()
+
+    init_db()
+    persistence = DatabasePersistence()
+    user_data = {
+        user_id: {"session_id": user_id, "preset": "25/5"}
+        for user_id in range(1, args.users + 1)
+    }
+
+    await persistence_run(persistence, user_data, "all new")
+    for user_id in random.sample(list(user_data), int(args.users * args.changed)):
+        user_data[user_id]["session_id"] += args.users
+    await persistence_run(persistence, user_data, "changed")
+    await persistence_run(persistence, user_data, "unchanged")
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,81 @@
+"""Benchmark concurrent start_timer calls on the sync and async DB paths.
+
+The sync path reproduces the previous blocking implementation through
+``SessionLocal``; the async path calls ``TimerService.start_timer``. Both
+report calls per second and the worst event loop stall observed meanwhile.
+
+Usage:
+    python -m benchmarks.bench_start_timer --calls 2000 --concurrency 100
+
+Set DATABASE_URL to benchmark against Postgres instead of a temporary SQLite
+file.
+"""
+
+import argparse
+import asyncio
+import time
+
+from benchmarks.common import LoopLagMonitor, fake_context, fake_update
+
+# isort: split
+from app.db.models import PomodoroSession, User, get_db_session, init_db
+from app.services.timer import TimerService
+
+
+async def sync_start_timer(user_id: int, work_minutes: int, break_minutes: int):
+    """Create the user and session rows through the blocking sync engine."""
+    for session in get_db_session():
+        user = session.query(User).filter(User.telegram_id == user_id).first()
+        if not user:
+            user = User(telegram_id=user_id, first_name="Bench")
+            session.add(user)
+            session.commit()
+            session.refresh(user)
+        pomodoro = PomodoroSession(
+            user_id=user.id, work_minutes=work_minutes, break_minutes=break_minutes
+        )
+        session.add(pomodoro)
+        session.commit()
+
+
+async def run_path(name: str, start, calls: int, concurrency: int, offset: int):
+    """Run ``calls`` start requests with at most ``concurrency`` in flight."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(index: int):
+        async with semaphore:
+            await start(offset + index % 1000)
+
+    with LoopLagMonitor() as monitor:
+        started = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(calls)))
+        elapsed = time.perf_counter() - started
+
+    print(
+        f"{name:>5}: {calls / elapsed:8.1f} calls/s, "
+        f"max loop stall {monitor.max_lag * 1000:.1f} ms"
+    )
+
+
+async def main():
+    """Run both paths and print the results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    args = parser.parse_args()
+
+    init_db()
+    service = TimerService()
+
+    async def async_start(user_id: int):
+        await service.start_timer(fake_update(user_id), fake_context(), 25, 5)
+
+    async def blocking_start(user_id: int):
+        await sync_start_timer(user_id, 25, 5)
+
+    await run_path("sync", blocking_start, args.calls, args.concurrency, 1_000_000)
+    await run_path("async", async_start, args.calls, args.concurrency, 2_000_000)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,116 @@
+"""Measure end-to-end startup of the bot against a fake Telegram Bot API.
+
+Each run starts a fresh interpreter that imports ``app.main``, then
+``app.bot`` (Telegram, SQLAlchemy and APScheduler), and builds the real
+application with ``create_application``: schema check, getMe and
+``application.initialize()``. The first run migrates an empty SQLite file,
+later runs find the schema current.
+
+Reports per run, in seconds:
+    - process: spawn to ready, interpreter startup included
+    - app.main: importing the entry point
+    - app.bot: importing the rest of the bot
+    - the startup phases the bot logs (schema, get_me, initialize)
+
+Usage:
+    python -m benchmarks.bench_startup --runs 5
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+
+async def child():
+    """Start the bot once, print the timings and shut it down."""
+    started = time.perf_counter()
+    import app.main  # noqa: F401
+
+    main_imported = time.perf_counter()
+    from app.bot import create_application
+    from app.db.models import async_engine
+    from app.services.timer import timer_service
+    from app.startup import startup
+
+    bot_imported = time.perf_counter()
+    application = await create_application()
+    ready = time.perf_counter()
+    timings = {
+        "app.main": main_imported - started,
+        "app.bot": bot_imported - main_imported,
+        **{
+            name: seconds
+            for name, seconds in startup.phases.items()
+            if name != "imports"
+        },
+        "in process": ready - started,
+    }
+    print(json.dumps(timings), flush=True)
+    await timer_service.shutdown()
+    await application.shutdown()
+    await async_engine.dispose()
+
+
+async def run_once() -> dict:
+    """Spawn one bot process and time it until it reports ready."""
+    spawned = time.perf_counter()
+    process = await asyncio.create_subprocess_exec(
+        sys.executable,
+        "-m",
+        "benchmarks.bench_startup",
+        "--child",
+        stdout=asyncio.subprocess.PIPE,
+    )
+    line = await process.stdout.readline()
+    timings = {"process": time.perf_counter() - spawned, **json.loads(line)}
+    await process.wait()
+    return timings
+
+
+async def main(args):
+    """Serve the fake API, start the bot ``args.runs`` times and report."""
+    from benchmarks.fake_bot_api import FakeBotAPI
+
+    api = FakeBotAPI()
+    api.bind()
+    os.environ["TELEGRAM_API_URL"] = api.base_url
+    os.environ.setdefault("TELEGRAM_TOKEN", "123456:benchmark-token")
+    os.environ.setdefault(
+        "DATABASE_URL",
+        f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'pomodoro_bench.sqlite3')}",
+    )
+    api.start()
+    try:
+        runs = [await run_once() for _ in range(args.runs)]
+    finally:
+        await api.stop()
+
+    for number, timings in enumerate(runs, 1):
+        parts = ", ".join(f"{name} {seconds:.3f}" for name, seconds in timings.items())
+        print(f"Run {number}: {parts}")
+    if len(runs) > 1:
+        print("Median of the runs after the first:")
+        for name in runs[0]:
+            seconds = statistics.median(timings[name] for timings in runs[1:])
+            print(f"  {name:>12}: {seconds:.3f} s")
+
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    arguments = parse_args()
+    if arguments.child:
+        asyncio.run(child())
+    else:
+        asyncio.run(main(arguments))
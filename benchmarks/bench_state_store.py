@@ -0,0 +1,99 @@
+"""Benchmark the state stores on the operations the timer service performs.
+
+Runs each operation for ``--users`` users against MemoryStateStore and, if
+``--redis-url`` or REDIS_URL is set, RedisStateStore:
+
+- ``incr x1``: one counter per call
+- ``incr pipelined``: counters of ``--batch`` users per pipeline
+- ``mget``: counters of ``--batch`` users per call
+
+Usage:
+    python -m benchmarks.bench_state_store --users 10000 --redis-url redis://localhost
+"""
+
+import argparse
+import asyncio
+import os
+import time
+
+import benchmarks.common  # noqa: F401
+
+# isort: split
+from app.services.state import MemoryStateStore, RedisStateStore, StateStore
+
+
+def chunks(items: list, size: int):
+    """Split a list into consecutive chunks."""
+    return [items[start : start + size] for start in range(0, len(items), size)]
+
+
+async def timed(store: StateStore, name: str, calls, operations: int):
+    """Await calls one after another and print their rate and round trips."""
+    round_trips = store.round_trips
+    started = time.perf_counter()
+    for call in calls:
+        await call()
+    elapsed = time.perf_counter() - started
+    print(
+        f"{name:>16}: {elapsed * 1000:9.1f} ms, "
+        f"{operations / elapsed:10.0f} ops/s, "
+        f"{store.round_trips - round_trips:6d} round trips"
+    )
+
+
+async def run(store: StateStore, users: int, batch: int):
+    """Benchmark one store."""
+    members = [str(1_000_000_000 + user_id) for user_id in range(users)]
+    keys = [f"today:{member}" for member in members]
+    await timed(
+        store,
+        "incr x1",
+        [lambda key=key: store.incr_many({key: 1}, ttl=300) for key in keys],
+        users,
+    )
+    await timed(
+        store,
+        "incr pipelined",
+        [
+            lambda chunk=chunk: store.incr_many(dict.fromkeys(chunk, 1), ttl=300)
+            for chunk in chunks(keys, batch)
+        ],
+        users,
+    )
+    await timed(
+        store,
+        "mget",
+        [
+            lambda chunk=chunk: store.get_counters(chunk)
+            for chunk in chunks(keys, batch)
+        ],
+        users,
+    )
+
+
+async def main():
+    """Run the benchmark and print the results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--batch", type=int, default=500)
+    parser.add_argument("--redis-url", default=os.getenv("REDIS_URL"))
+    args = parser.parse_args()
+
+    print("memory")
+    await run(MemoryStateStore(), args.users, args.batch)
+    if not args.redis_url:
+        print("redis: skipped, set --redis-url or REDIS_URL")
+        return
+    print("redis")
+    store = RedisStateStore(args.redis_url, prefix=f"bench:{os.getpid()}:")
+    try:
+        await run(store, args.users, args.batch)
+    finally:
+        keys = [key async for key in store.client.scan_iter(f"{store.prefix}*")]
+        for chunk in chunks(keys, 1000):
+            await store.client.delete(*chunk)
+        await store.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
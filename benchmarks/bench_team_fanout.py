@@ -0,0 +1,164 @@
+"""Benchmark firing a team timer against one timer per member.
+
+Fires the end of a work period for ``--members`` users twice: as one timer
+per user, the way a team had to run before, and as a single team timer the
+users joined. Reports the time spent firing and writing the completions,
+the SQL statements executed and the messages queued for Telegram, in both
+notification modes of the team.
+
+Usage:
+    python -m benchmarks.bench_team_fanout --members 1000
+
+Set DATABASE_URL to benchmark against Postgres instead of a temporary SQLite
+file.
+"""
+
+import argparse
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+import benchmarks.common  # noqa: F401
+
+# isort: split
+from sqlalchemy import event
+
+from app.db.models import (
+    PendingTimer,
+    PomodoroSession,
+    Team,
+    TeamMember,
+    User,
+    async_engine,
+    get_async_session,
+    init_db,
+)
+from app.services.dispatcher import MessageDispatcher
+from app.services.scheduler import WORK_PHASE, TimerRecord
+from app.services.teams import DM_NOTIFY, GROUP_NOTIFY
+from app.services.timer import TimerService
+
+
+class StatementCounter:
+    """Count the SQL statements run on the async engine."""
+
+    def __init__(self):
+        """Initialize the StatementCounter."""
+        self.count = 0
+        event.listen(async_engine.sync_engine, "before_cursor_execute", self._count)
+
+    def _count(self, *args):
+        """Count one statement."""
+        self.count += 1
+
+
+async def create_users(first_id: int, count: int) -> list:
+    """Create users with an open session each.
+
+    Returns:
+        list: (telegram_id, session_id) pairs
+    """
+    async with get_async_session() as session:
+        users = [
+            User(telegram_id=first_id + index, first_name="Bench", timezone="UTC")
+            for index in range(count)
+        ]
+        session.add_all(users)
+        await session.flush()
+        sessions = [
+            PomodoroSession(user_id=user.id, work_minutes=25, break_minutes=5)
+            for user in users
+        ]
+        session.add_all(sessions)
+        await session.commit()
+        return [(user.telegram_id, s.id) for user, s in zip(users, sessions)]
+
+
+async def save_due(records: list):
+    """Persist due timer records as their starts did."""
+    async with get_async_session() as session:
+        for record in records:
+            session.add(PendingTimer(**TimerService._pending_values(record)))
+        await session.commit()
+
+
+async def fire(name: str, records: list, counter: StatementCounter):
+    """Fire due records with a fresh service and print what it cost."""
+    service = TimerService()
+    service.dispatcher = MessageDispatcher()
+    statements = counter.count
+    started = time.perf_counter()
+    await service._fire_batch(records)
+    await service.completions.flush()
+    elapsed = time.perf_counter() - started
+    print(
+        f"{name:>14}: {elapsed * 1000:8.1f} ms, "
+        f"{counter.count - statements:5d} statements, "
+        f"{service.dispatcher.queue_depth:5d} messages queued"
+    )
+
+
+async def run_team(chat_id: int, first_id: int, members: int, notify: str):
+    """Create a team of new users and get its due timer record."""
+    users = await create_users(first_id, members)
+    async with get_async_session() as session:
+        session.add(
+            Team(chat_id=chat_id, work_minutes=25, break_minutes=5, notify=notify)
+        )
+        # Members joined before the round that is about to fire
+        joined_at = datetime.utcnow() - timedelta(minutes=25)
+        session.add_all(
+            TeamMember(
+                chat_id=chat_id,
+                user_id=user_id,
+                session_id=session_id,
+                joined_at=joined_at,
+            )
+            for user_id, session_id in users
+        )
+        await session.commit()
+    record = TimerRecord(
+        deadline=time.time() - 1,
+        user_id=chat_id,
+        chat_id=chat_id,
+        phase=WORK_PHASE,
+        break_minutes=5,
+    )
+    await save_due([record])
+    return [record]
+
+
+async def main():
+    """Run the benchmark and print the results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--members", type=int, default=1000)
+    args = parser.parse_args()
+
+    init_db()
+    counter = StatementCounter()
+    deadline = time.time() - 1
+
+    users = await create_users(1, args.members)
+    records = [
+        TimerRecord(
+            deadline=deadline,
+            user_id=user_id,
+            chat_id=user_id,
+            phase=WORK_PHASE,
+            session_id=session_id,
+            break_minutes=5,
+        )
+        for user_id, session_id in users
+    ]
+    await save_due(records)
+    await fire("per member", records, counter)
+
+    records = await run_team(-1001, 1_000_001, args.members, GROUP_NOTIFY)
+    await fire("team, group", records, counter)
+    records = await run_team(-1002, 2_000_001, args.members, DM_NOTIFY)
+    await fire("team, dm", records, counter)
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,151 @@
+"""Benchmark the memory held per active timer.
+
+Arms ``--users`` timers three ways and reports the bytes allocated per timer,
+measured with tracemalloc:
+
+- ``task``: one sleeping asyncio task per user whose coroutine captures the
+  update and context of the command, as the bot originally kept its timers;
+  the update is a real ``telegram.Update`` of a ``/pomodoro`` message
+- ``dataclass``: TimerScheduler records without ``__slots__``
+- ``slots``: TimerScheduler with the current TimerRecord
+
+Usage:
+    python -m benchmarks.bench_timer_memory --users 100000
+"""
+
+import argparse
+import asyncio
+import gc
+import tracemalloc
+from dataclasses import dataclass, field
+from types import SimpleNamespace
+from typing import Callable, Optional
+
+import benchmarks.common  # noqa: F401
+
+# isort: split
+from telegram import Update
+
+from app.services.scheduler import WORK_PHASE, TimerRecord, TimerScheduler
+
+
+@dataclass(order=True)
+class DictTimerRecord:
+    """TimerRecord as it was before ``__slots__``."""
+
+    deadline: float
+    user_id: int = field(compare=False)
+    chat_id: int = field(compare=False)
+    phase: str = field(compare=False)
+    session_id: Optional[int] = field(default=None, compare=False)
+    break_minutes: int = field(default=0, compare=False)
+
+
+def measure(arm: Callable[[], object]) -> int:
+    """Get the bytes still allocated by ``arm`` while its result is alive."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = arm()
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+    return after - before
+
+
+def arm_records(record_class, users: int) -> TimerScheduler:
+    """Schedule one record per user."""
+    scheduler = TimerScheduler()
+    for user_id in range(users):
+        scheduler.schedule(
+            record_class(
+                deadline=1_700_000_000.0 + user_id,
+                user_id=1_000_000_000 + user_id,
+                chat_id=1_000_000_000 + user_id,
+                phase=WORK_PHASE,
+                session_id=user_id,
+                break_minutes=5,
+            )
+        )
+    return scheduler
+
+
+async def legacy_timer(update, context, work_minutes: int, break_minutes: int):
+    """Sleep through a pomodoro holding the update and context, as before."""
+    await asyncio.sleep(work_minutes * 60)
+    await context.bot.send_message(update.effective_chat.id, "✅")
+
+
+def pomodoro_update(user_id: int) -> Update:
+    """Build the Update of a ``/pomodoro`` command in a private chat."""
+    user = {
+        "id": user_id,
+        "is_bot": False,
+        "first_name": "Bench",
+        "username": f"user{user_id}",
+        "language_code": "ru",
+    }
+    return Update.de_json(
+        {
+            "update_id": user_id,
+            "message": {
+                "message_id": 1,
+                "date": 1_700_000_000,
+                "from": user,
+                "chat": {**user, "type": "private"},
+                "text": "/pomodoro 25 5",
+                "entities": [{"type": "bot_command", "offset": 0, "length": 9}],
+            },
+        },
+        None,
+    )
+
+
+def arm_tasks(users: int) -> dict:
+    """Start one sleeping task per user, keyed like ``active_timers`` was."""
+    loop = asyncio.get_event_loop()
+    tasks = {}
+    for user_id in range(users):
+        update = pomodoro_update(1_000_000_000 + user_id)
+        # What a CallbackContext holds per user besides the shared application
+        context = SimpleNamespace(
+            user_data={"session_id": user_id}, chat_data={}, args=["25", "5"]
+        )
+        coroutine = legacy_timer(update, context, 25, 5)
+        tasks[user_id] = loop.create_task(coroutine)
+    # Let every task reach its sleep
+    loop.run_until_complete(asyncio.sleep(0))
+    return tasks
+
+
+def main():
+    """Run the benchmark and print the results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument(
+        "--skip-tasks", action="store_true", help="skip the task variant"
+    )
+    args = parser.parse_args()
+
+    results = {}
+    if not args.skip_tasks:
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        results["task"] = measure(lambda: arm_tasks(args.users))
+        for task in asyncio.all_tasks(loop):
+            task.cancel()
+        loop.run_until_complete(asyncio.sleep(0))
+        loop.close()
+    results["dataclass"] = measure(lambda: arm_records(DictTimerRecord, args.users))
+    results["slots"] = measure(lambda: arm_records(TimerRecord, args.users))
+
+    for name, total in results.items():
+        print(
+            f"{name:>9}: {total / args.users:8.0f} bytes/timer, "
+            f"{total / 2**20:7.1f} MiB for {args.users} users"
+        )
+
+
+if __name__ == "__main__":
+    main()
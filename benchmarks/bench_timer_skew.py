@@ -0,0 +1,95 @@
+"""Benchmark timer firing skew with many active timers.
+
+Arms ``--timers`` timers with deadlines spread evenly over ``--spread``
+seconds and fires them with a handler that takes as long as a database
+round trip per batch. A background task blocks the event loop for
+``--stall-ms`` every ``--stall-every`` seconds, standing in for slow
+handlers. The skew of each timer is the time its handler call started minus
+its deadline, so it includes waiting behind earlier batches; negative skew
+is firing early to share a wake-up. Runs once without coalescing and once
+with the ``--coalesce-ms`` window.
+
+Usage:
+    python -m benchmarks.bench_timer_skew --timers 50000 --spread 30
+"""
+
+import argparse
+import asyncio
+import time
+
+import benchmarks.common  # noqa: F401
+
+# isort: split
+from app.services.scheduler import WORK_PHASE, TimerRecord, TimerScheduler
+from benchmarks.common import percentile
+
+
+async def stall_loop(stall: float, every: float):
+    """Block the event loop for ``stall`` seconds every ``every`` seconds."""
+    while True:
+        await asyncio.sleep(every)
+        time.sleep(stall)
+
+
+async def run(args, coalesce_window: float) -> tuple:
+    """Fire all timers once and get their skews and the scheduler."""
+    skews = []
+    done = asyncio.Event()
+
+    async def handler(records):
+        started = time.time()
+        skews.extend(started - record.deadline for record in records)
+        # One round trip per batch plus the rows it writes
+        await asyncio.sleep(args.batch_ms / 1000 + len(records) * args.record_us / 1e6)
+        if len(skews) >= args.timers:
+            done.set()
+
+    scheduler = TimerScheduler(coalesce_window=coalesce_window)
+    first = time.time() + 1
+    for user_id in range(args.timers):
+        scheduler.schedule(
+            TimerRecord(
+                deadline=first + args.spread * user_id / args.timers,
+                user_id=user_id,
+                chat_id=user_id,
+                phase=WORK_PHASE,
+            )
+        )
+    stalls = asyncio.create_task(stall_loop(args.stall_ms / 1000, args.stall_every))
+    scheduler.start(handler)
+    await done.wait()
+    await scheduler.stop()
+    stalls.cancel()
+    return skews, scheduler
+
+
+def main():
+    """Run the benchmark and print the results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--timers", type=int, default=50_000)
+    parser.add_argument("--spread", type=float, default=30.0)
+    parser.add_argument("--coalesce-ms", type=float, default=250.0)
+    parser.add_argument("--batch-ms", type=float, default=10.0)
+    parser.add_argument("--record-us", type=float, default=50.0)
+    parser.add_argument("--stall-ms", type=float, default=100.0)
+    parser.add_argument("--stall-every", type=float, default=2.0)
+    args = parser.parse_args()
+
+    for name, window in (
+        ("no coalescing", 0.0),
+        ("coalesced", args.coalesce_ms / 1000),
+    ):
+        skews, scheduler = asyncio.run(run(args, window))
+        within = sum(abs(skew) <= 1.0 for skew in skews) / len(skews)
+        metrics = scheduler.metrics
+        print(
+            f"{name:>14}: skew p50 {percentile(skews, 0.5) * 1000:7.1f} ms, "
+            f"p99 {percentile(skews, 0.99) * 1000:7.1f} ms, "
+            f"max {max(skews) * 1000:7.1f} ms, "
+            f"min {min(skews) * 1000:7.1f} ms, {within:.2%} within 1 s, "
+            f"{metrics['wakeups']} wake-ups, {metrics['batches']} batches"
+        )
+
+
+if __name__ == "__main__":
+    main()
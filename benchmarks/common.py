@@ -0,0 +1,87 @@
+"""Shared helpers for the Pomodoro bot benchmarks.
+
+Import this module before any ``app`` module: it fills in the environment
+that ``app.config`` reads at import time.
+"""
+
+import asyncio
+import os
+import tempfile
+import time
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+os.environ.setdefault("TELEGRAM_TOKEN", "123456:benchmark-token")
+os.environ.setdefault(
+    "DATABASE_URL",
+    f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'pomodoro_bench.sqlite3')}",
+)
+
+
+def fake_update(user_id: int, callback_data: str = None) -> SimpleNamespace:
+    """Build a minimal stand-in for a Telegram update from a private chat."""
+    message = SimpleNamespace(reply_text=AsyncMock(), message_id=1)
+    return SimpleNamespace(
+        effective_user=SimpleNamespace(
+            id=user_id, username=f"user{user_id}", first_name="Bench", last_name=None
+        ),
+        effective_chat=SimpleNamespace(id=user_id),
+        effective_message=message,
+        callback_query=SimpleNamespace(
+            data=callback_data,
+            answer=AsyncMock(),
+            edit_message_reply_markup=AsyncMock(),
+            edit_message_text=AsyncMock(),
+        ),
+    )
+
+
+def fake_context() -> SimpleNamespace:
+    """Build a minimal stand-in for a handler callback context."""
+    return SimpleNamespace(
+        user_data={}, args=[], bot=SimpleNamespace(send_message=AsyncMock())
+    )
+
+
+def percentile(values: list, fraction: float) -> float:
+    """Get a percentile from a list of numbers (nearest rank)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(fraction * len(ordered))) - 1))
+    return ordered[index]
+
+
+class LoopLagMonitor:
+    """Measure how long the event loop is blocked while a benchmark runs."""
+
+    def __init__(self, interval: float = 0.01):
+        """Initialize the LoopLagMonitor.
+
+        Args:
+            interval: Seconds between heartbeats
+        """
+        self.interval = interval
+        self.max_lag = 0.0
+        self._expected = 0.0
+        self._task = None
+
+    async def _run(self):
+        """Record how late each heartbeat wakes up."""
+        while True:
+            self._expected = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = time.perf_counter() - self._expected
+            self.max_lag = max(self.max_lag, lag)
+
+    def __enter__(self):
+        """Start the heartbeat task."""
+        self._task = asyncio.get_running_loop().create_task(self._run())
+        return self
+
+    def __exit__(self, *exc_info):
+        """Stop the heartbeat task, counting a heartbeat that is still late."""
+        if self._expected:
+            lag = time.perf_counter() - self._expected
+            self.max_lag = max(self.max_lag, lag)
+        self._task.cancel()
@@ -0,0 +1,226 @@
+"""Local stand-in for the Telegram Bot API used by the load tests.
+
+Serves ``/bot<token>/<method>`` on 127.0.0.1 with tornado (installed with the
+``webhooks`` extra of python-telegram-bot), answers the methods the bot calls
+and records when each message reaches a chat. A fraction of ``sendMessage``
+calls can be answered with 429 to exercise flood control handling.
+"""
+
+import asyncio
+import itertools
+import json
+import random
+import time
+from collections import Counter
+from typing import Dict, Optional, Tuple
+
+import tornado.httpserver
+import tornado.netutil
+import tornado.web
+
+# Bot returned by getMe
+BOT_USER = {
+    "id": 1,
+    "is_bot": True,
+    "first_name": "Load Test",
+    "username": "load_test_bot",
+}
+
+
+def _param(value: Optional[str]):
+    """Decode a form parameter the way python-telegram-bot encodes it."""
+    if value is None:
+        return None
+    try:
+        return json.loads(value)
+    except ValueError:
+        return value
+
+
+class FakeBotAPI:
+    """Answer Bot API calls and track the messages sent to each chat."""
+
+    def __init__(
+        self,
+        error_fraction: float = 0.0,
+        retry_after: int = 1,
+        latency: float = 0.0,
+        seed=0,
+    ):
+        """Initialize the FakeBotAPI.
+
+        Args:
+            error_fraction: Share of ``sendMessage`` calls answered with 429
+            retry_after: Seconds reported in injected 429 responses
+            latency: Seconds each call takes, like a round trip to Telegram
+            seed: Seed for choosing the calls to reject
+        """
+        self.error_fraction = error_fraction
+        self.latency = latency
+        self.retry_after = retry_after
+        self.calls = Counter()
+        self.throttled = 0
+        self._random = random.Random(seed)
+        self._message_ids = itertools.count(1)
+        # (chat_id, first word of the text) -> futures resolved on delivery
+        self._waiters: Dict[Tuple[int, str], asyncio.Future] = {}
+        self._server: Optional[tornado.httpserver.HTTPServer] = None
+        self.port: Optional[int] = None
+
+    @property
+    def base_url(self) -> str:
+        """Value for TELEGRAM_API_URL pointing the bot at this server."""
+        return f"http://127.0.0.1:{self.port}/bot"
+
+    def bind(self) -> int:
+        """Reserve a free local port.
+
+        Call before ``start`` so the URL is known before ``app`` is imported.
+
+        Returns:
+            int: Port number
+        """
+        self._sockets = tornado.netutil.bind_sockets(0, "127.0.0.1")
+        self.port = self._sockets[0].getsockname()[1]
+        return self.port
+
+    def start(self):
+        """Start serving on the bound port in the running event loop."""
+        if self.port is None:
+            self.bind()
+        application = tornado.web.Application(
+            [(r"/bot([^/]+)/(\w+)", _BotAPIHandler, {"api": self})]
+        )
+        self._server = tornado.httpserver.HTTPServer(application)
+        self._server.add_sockets(self._sockets)
+
+    async def stop(self):
+        """Stop the server."""
+        if self._server is not None:
+            self._server.stop()
+            await self._server.close_all_connections()
+            self._server = None
+
+    def expect(self, chat_id: int, marker: str) -> asyncio.Future:
+        """Get a future resolved with the arrival time of a message.
+
+        Args:
+            chat_id: Chat the message is sent to
+            marker: First word of the message text, e.g. an emoji
+
+        Returns:
+            asyncio.Future: Resolves to ``time.time()`` of the delivery
+        """
+        key = (chat_id, marker)
+        if key not in self._waiters:
+            self._waiters[key] = asyncio.get_running_loop().create_future()
+        return self._waiters[key]
+
+    def handle(self, method: str, params: dict) -> Tuple[int, dict]:
+        """Answer one Bot API call.
+
+        Args:
+            method: Bot API method name
+            params: Decoded request parameters
+
+        Returns:
+            tuple: HTTP status and JSON response body
+        """
+        self.calls[method] += 1
+        if method == "getMe":
+            return 200, {"ok": True, "result": BOT_USER}
+        if method != "sendMessage":
+            return 200, {"ok": True, "result": True}
+
+        if self.error_fraction and self._random.random() < self.error_fraction:
+            self.throttled += 1
+            return 429, {
+                "ok": False,
+                "error_code": 429,
+                "description": f"Too Many Requests: retry after {self.retry_after}",
+                "parameters": {"retry_after": self.retry_after},
+            }
+
+        chat_id = int(params["chat_id"])
+        text = str(params.get("text", ""))
+        waiter = self.expect(chat_id, text.split()[0] if text else "")
+        if not waiter.done():
+            waiter.set_result(time.time())
+        return 200, {
+            "ok": True,
+            "result": {
+                "message_id": next(self._message_ids),
+                "date": int(time.time()),
+                "chat": {"id": chat_id, "type": "private"},
+                "text": text,
+            },
+        }
+
+
+class _BotAPIHandler(tornado.web.RequestHandler):
+    """Route ``/bot<token>/<method>`` requests to a FakeBotAPI."""
+
+    def initialize(self, api: FakeBotAPI):
+        """Initialize the handler with the API it serves."""
+        self.api = api
+
+    async def post(self, token: str, method: str):
+        """Answer a Bot API call."""
+        if self.api.latency:
+            await asyncio.sleep(self.api.latency)
+        if self.request.headers.get("Content-Type", "").startswith("application/json"):
+            params = json.loads(self.request.body or b"{}")
+        else:
+            params = {
+                name: _param(self.get_body_argument(name))
+                for name in self.request.body_arguments
+            }
+        status, body = self.api.handle(method, params)
+        self.set_status(status)
+        self.set_header("Content-Type", "application/json")
+        self.finish(json.dumps(body))
+
+    get = post
+
+
+class UpdateFactory:
+    """Build raw updates of synthetic users in private chats."""
+
+    def __init__(self):
+        """Initialize the UpdateFactory."""
+        self.update_ids = itertools.count(1)
+
+    def _user(self, user_id: int) -> dict:
+        """Build the Telegram user of a synthetic user."""
+        return {"id": user_id, "is_bot": False, "first_name": f"User{user_id}"}
+
+    def _message(self, user_id: int, text: str) -> dict:
+        """Build a private chat message."""
+        return {
+            "message_id": next(self.update_ids),
+            "date": int(time.time()),
+            "chat": {"id": user_id, "type": "private"},
+            "from": self._user(user_id),
+            "text": text,
+        }
+
+    def command(self, user_id: int, command: str) -> dict:
+        """Build an update with a bot command."""
+        message = self._message(user_id, command)
+        message["entities"] = [
+            {"type": "bot_command", "offset": 0, "length": len(command.split()[0])}
+        ]
+        return {"update_id": next(self.update_ids), "message": message}
+
+    def callback(self, user_id: int, data: str) -> dict:
+        """Build an update with an inline keyboard press."""
+        return {
+            "update_id": next(self.update_ids),
+            "callback_query": {
+                "id": str(next(self.update_ids)),
+                "from": self._user(user_id),
+                "chat_instance": str(user_id),
+                "message": self._message(user_id, "keyboard"),
+                "data": data,
+            },
+        }
@@ -0,0 +1,61 @@
+"""Alembic environment for the Pomodoro bot.
+
+Migrations are written by hand and do not import the application, so they
+run without TELEGRAM_TOKEN and can render SQL offline for any dialect.
+"""
+
+import os
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy import engine_from_config, pool
+
+config = context.config
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name, disable_existing_loggers=False)
+
+
+def get_url() -> str:
+    """Get the synchronous database URL to migrate."""
+    url = config.get_main_option("sqlalchemy.url") or os.getenv(
+        "DATABASE_URL", "sqlite:///pomodoro.sqlite3"
+    )
+    # Heroku-style URLs use the scheme SQLAlchemy 1.4 dropped
+    if url.startswith("postgres://"):
+        url = "postgresql://" + url[len("postgres://") :]
+    return url
+
+
+def run_migrations_offline():
+    """Print the migration SQL without connecting to the database."""
+    context.configure(
+        url=get_url(),
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+        render_as_batch=get_url().startswith("sqlite"),
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online():
+    """Apply the migrations to the database."""
+    connectable = engine_from_config(
+        {"sqlalchemy.url": get_url()},
+        prefix="sqlalchemy.",
+        poolclass=pool.NullPool,
+    )
+    with connectable.connect() as connection:
+        context.configure(
+            connection=connection,
+            # SQLite can only alter tables by copying them
+            render_as_batch=connection.dialect.name == "sqlite",
+        )
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,142 @@
+"""Baseline schema, as created by init_db before migrations existed.
+
+Tables and indexes are created only if missing, so databases built by
+``Base.metadata.create_all`` can be upgraded without being stamped first.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def _rollup_columns():
+    """Counter columns shared by the stats rollups."""
+    return [
+        sa.Column("completed", sa.Integer(), nullable=False),
+        sa.Column("focus_minutes", sa.Integer(), nullable=False),
+    ]
+
+
+def upgrade():
+    """Create the baseline tables."""
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("telegram_id", sa.Integer()),
+        sa.Column("username", sa.String(), nullable=True),
+        sa.Column("first_name", sa.String()),
+        sa.Column("last_name", sa.String(), nullable=True),
+        sa.Column("timezone", sa.String()),
+        sa.Column("created_at", sa.DateTime()),
+        if_not_exists=True,
+    )
+    op.create_index(
+        "ix_users_telegram_id",
+        "users",
+        ["telegram_id"],
+        unique=True,
+        if_not_exists=True,
+    )
+
+    op.create_table(
+        "pomodoro_sessions",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id")),
+        sa.Column("work_minutes", sa.Integer()),
+        sa.Column("break_minutes", sa.Integer()),
+        sa.Column("start_time", sa.DateTime()),
+        sa.Column("end_time", sa.DateTime(), nullable=True),
+        sa.Column("completed", sa.Integer()),
+        if_not_exists=True,
+    )
+
+    op.create_table(
+        "pending_timers",
+        sa.Column("user_id", sa.BigInteger(), primary_key=True),
+        sa.Column("chat_id", sa.BigInteger()),
+        sa.Column("phase", sa.String()),
+        sa.Column("deadline", sa.DateTime()),
+        sa.Column(
+            "session_id",
+            sa.Integer(),
+            sa.ForeignKey("pomodoro_sessions.id"),
+            nullable=True,
+        ),
+        sa.Column("break_minutes", sa.Integer()),
+        sa.Column("shard_id", sa.Integer()),
+        sa.Column("updated_at", sa.DateTime()),
+        if_not_exists=True,
+    )
+    for column in ("deadline", "shard_id", "updated_at"):
+        op.create_index(
+            f"ix_pending_timers_{column}",
+            "pending_timers",
+            [column],
+            if_not_exists=True,
+        )
+
+    op.create_table(
+        "daily_stats",
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), primary_key=True),
+        sa.Column("date", sa.Date(), primary_key=True),
+        *_rollup_columns(),
+        if_not_exists=True,
+    )
+    op.create_table(
+        "hourly_stats",
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), primary_key=True),
+        sa.Column("date", sa.Date(), primary_key=True),
+        sa.Column("hour", sa.Integer(), primary_key=True),
+        *_rollup_columns(),
+        if_not_exists=True,
+    )
+    op.create_table(
+        "weekly_stats",
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), primary_key=True),
+        sa.Column("week_start", sa.Date(), primary_key=True),
+        *_rollup_columns(),
+        if_not_exists=True,
+    )
+
+    op.create_table(
+        "shard_leases",
+        sa.Column("shard_id", sa.Integer(), primary_key=True),
+        sa.Column("owner", sa.String(), nullable=True),
+        sa.Column("expires_at", sa.DateTime(), nullable=False),
+        if_not_exists=True,
+    )
+    op.create_table(
+        "worker_heartbeats",
+        sa.Column("worker_id", sa.String(), primary_key=True),
+        sa.Column("expires_at", sa.DateTime(), nullable=False),
+        if_not_exists=True,
+    )
+    op.create_index(
+        "ix_worker_heartbeats_expires_at",
+        "worker_heartbeats",
+        ["expires_at"],
+        if_not_exists=True,
+    )
+
+
+def downgrade():
+    """Drop all tables."""
+    for table in (
+        "worker_heartbeats",
+        "shard_leases",
+        "weekly_stats",
+        "hourly_stats",
+        "daily_stats",
+        "pending_timers",
+        "pomodoro_sessions",
+        "users",
+    ):
+        op.drop_table(table)
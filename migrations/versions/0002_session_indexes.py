@@ -0,0 +1,57 @@
+"""Indexes for the session hot paths.
+
+- ix_pomodoro_sessions_user_id_start_time: a user's sessions by time
+- ix_pomodoro_sessions_open: open sessions by ID, for the sweeper's keyset
+  paging; partial on end_time IS NULL so closed sessions do not bloat it
+- ix_users_timezone: the sweeper's walk over timezones
+- ix_pending_timers_session_id: the sweeper's check for armed sessions
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+OPEN_SESSIONS = sa.text("end_time IS NULL")
+
+
+def upgrade():
+    """Create the indexes."""
+    op.create_index(
+        "ix_pomodoro_sessions_user_id_start_time",
+        "pomodoro_sessions",
+        ["user_id", "start_time"],
+        if_not_exists=True,
+    )
+    op.create_index(
+        "ix_pomodoro_sessions_open",
+        "pomodoro_sessions",
+        ["id"],
+        sqlite_where=OPEN_SESSIONS,
+        postgresql_where=OPEN_SESSIONS,
+        if_not_exists=True,
+    )
+    op.create_index("ix_users_timezone", "users", ["timezone"], if_not_exists=True)
+    op.create_index(
+        "ix_pending_timers_session_id",
+        "pending_timers",
+        ["session_id"],
+        if_not_exists=True,
+    )
+
+
+def downgrade():
+    """Drop the indexes."""
+    op.drop_index("ix_pending_timers_session_id", table_name="pending_timers")
+    op.drop_index("ix_users_timezone", table_name="users")
+    op.drop_index("ix_pomodoro_sessions_open", table_name="pomodoro_sessions")
+    op.drop_index(
+        "ix_pomodoro_sessions_user_id_start_time", table_name="pomodoro_sessions"
+    )
@@ -0,0 +1,32 @@
+"""Persistent user_data, chat_data and bot_data.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Create the persistent_data table."""
+    op.create_table(
+        "persistent_data",
+        sa.Column("scope", sa.String(), primary_key=True),
+        sa.Column("owner_id", sa.BigInteger(), primary_key=True),
+        sa.Column("key", sa.String(), primary_key=True),
+        sa.Column("value", sa.JSON()),
+        sa.Column("updated_at", sa.DateTime()),
+        if_not_exists=True,
+    )
+
+
+def downgrade():
+    """Drop the persistent_data table."""
+    op.drop_table("persistent_data")
@@ -0,0 +1,62 @@
+"""Team timers of group chats.
+
+- teams: settings of a group chat's shared timer
+- team_members: members and their open sessions; ix_team_members_session_id
+  serves the sweeper's check for team sessions
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Create the team tables."""
+    op.create_table(
+        "teams",
+        sa.Column("chat_id", sa.BigInteger(), primary_key=True),
+        sa.Column("work_minutes", sa.Integer()),
+        sa.Column("break_minutes", sa.Integer()),
+        sa.Column("notify", sa.String()),
+        sa.Column("created_at", sa.DateTime()),
+        if_not_exists=True,
+    )
+    op.create_table(
+        "team_members",
+        sa.Column(
+            "chat_id",
+            sa.BigInteger(),
+            sa.ForeignKey("teams.chat_id"),
+            primary_key=True,
+        ),
+        sa.Column("user_id", sa.BigInteger(), primary_key=True),
+        sa.Column(
+            "session_id",
+            sa.Integer(),
+            sa.ForeignKey("pomodoro_sessions.id"),
+            nullable=True,
+        ),
+        sa.Column("joined_at", sa.DateTime()),
+        if_not_exists=True,
+    )
+    op.create_index(
+        "ix_team_members_session_id",
+        "team_members",
+        ["session_id"],
+        if_not_exists=True,
+    )
+
+
+def downgrade():
+    """Drop the team tables."""
+    op.drop_index("ix_team_members_session_id", table_name="team_members")
+    op.drop_table("team_members")
+    op.drop_table("teams")
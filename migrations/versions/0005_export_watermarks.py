@@ -0,0 +1,57 @@
+"""Watermark columns of the incremental analytics export.
+
+- users.updated_at and pomodoro_sessions.updated_at, set on every UPDATE;
+  existing rows start at their latest known change
+- ix_users_updated_at_id and ix_pomodoro_sessions_updated_at_id: keyset
+  pages of rows changed since the last export
+
+Columns already created by ``Base.metadata.create_all`` are kept.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17
+"""
+
+import sqlalchemy as sa
+from alembic import context, op
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+# Table -> value of updated_at for existing rows
+BACKFILL = {
+    "users": "created_at",
+    "pomodoro_sessions": "COALESCE(end_time, start_time)",
+}
+
+
+def _has_column(table: str, column: str) -> bool:
+    """Check whether a column exists; offline SQL assumes it does not."""
+    if context.is_offline_mode():
+        return False
+    columns = sa.inspect(op.get_bind()).get_columns(table)
+    return any(existing["name"] == column for existing in columns)
+
+
+def upgrade():
+    """Add and backfill the updated_at columns and their indexes."""
+    for table, value in BACKFILL.items():
+        if not _has_column(table, "updated_at"):
+            op.add_column(table, sa.Column("updated_at", sa.DateTime()))
+        op.execute(f"UPDATE {table} SET updated_at = {value} WHERE updated_at IS NULL")
+        op.create_index(
+            f"ix_{table}_updated_at_id",
+            table,
+            ["updated_at", "id"],
+            if_not_exists=True,
+        )
+
+
+def downgrade():
+    """Drop the updated_at columns and their indexes."""
+    for table in BACKFILL:
+        op.drop_index(f"ix_{table}_updated_at_id", table_name=table)
+        with op.batch_alter_table(table) as batch:
+            batch.drop_column("updated_at")
@@ -0,0 +1,41 @@
+"""Paused timers.
+
+- pending_timers.remaining_seconds: seconds left of a paused timer, NULL
+  while it runs
+
+A column already created by ``Base.metadata.create_all`` is kept.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17
+"""
+
+import sqlalchemy as sa
+from alembic import context, op
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+
+def _has_column(table: str, column: str) -> bool:
+    """Check whether a column exists; offline SQL assumes it does not."""
+    if context.is_offline_mode():
+        return False
+    columns = sa.inspect(op.get_bind()).get_columns(table)
+    return any(existing["name"] == column for existing in columns)
+
+
+def upgrade():
+    """Add the remaining_seconds column."""
+    if not _has_column("pending_timers", "remaining_seconds"):
+        op.add_column(
+            "pending_timers", sa.Column("remaining_seconds", sa.Float(), nullable=True)
+        )
+
+
+def downgrade():
+    """Drop the remaining_seconds column."""
+    with op.batch_alter_table("pending_timers") as batch:
+        batch.drop_column("remaining_seconds")
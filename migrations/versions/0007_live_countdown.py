@@ -0,0 +1,47 @@
+"""Live countdown opt-in.
+
+- users.live_countdown: timer messages are edited into a live countdown,
+  off for existing users
+
+A column already created by ``Base.metadata.create_all`` is kept.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17
+"""
+
+import sqlalchemy as sa
+from alembic import context, op
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+
+def _has_column(table: str, column: str) -> bool:
+    """Check whether a column exists; offline SQL assumes it does not."""
+    if context.is_offline_mode():
+        return False
+    columns = sa.inspect(op.get_bind()).get_columns(table)
+    return any(existing["name"] == column for existing in columns)
+
+
+def upgrade():
+    """Add the live_countdown column."""
+    if not _has_column("users", "live_countdown"):
+        op.add_column(
+            "users",
+            sa.Column(
+                "live_countdown",
+                sa.Boolean(),
+                nullable=False,
+                server_default=sa.false(),
+            ),
+        )
+
+
+def downgrade():
+    """Drop the live_countdown column."""
+    with op.batch_alter_table("users") as batch:
+        batch.drop_column("live_countdown")
@@ -0,0 +1 @@
+"""Command-line utilities for the Pomodoro bot."""
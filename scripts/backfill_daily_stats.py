@@ -0,0 +1,31 @@
+"""Rebuild the hourly, daily and weekly stats rollups from pomodoro sessions.
+
+Usage:
+    python -m scripts.backfill_daily_stats [--batch-size 10000]
+"""
+
+import argparse
+import logging
+
+from app.db.models import get_db_session, init_db
+from app.services.stats import backfill_daily_stats
+
+logging.basicConfig(
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    level=logging.INFO,
+)
+
+
+def main():
+    """Run the backfill."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    args = parser.parse_args()
+
+    init_db()
+    for session in get_db_session():
+        backfill_daily_stats(session, batch_size=args.batch_size)
+
+
+if __name__ == "__main__":
+    main()
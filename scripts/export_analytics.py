@@ -0,0 +1,57 @@
+"""Export users and pomodoro sessions changed since the last export.
+
+Writes Parquet files (CSV with ``--format csv`` or without pyarrow) under
+``<output>/users`` and ``<output>/sessions`` and keeps the watermarks of
+each table in ``<output>/watermarks.json``.
+
+Usage:
+    python -m scripts.export_analytics --output exports [--format csv] [--full]
+"""
+
+import argparse
+import logging
+
+from app.db.models import get_db_session
+from app.services.export import (
+    CSV,
+    EXPORT_TABLES,
+    PARQUET,
+    export_table,
+    resolve_format,
+)
+
+logging.basicConfig(
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    level=logging.INFO,
+)
+
+
+def main():
+    """Run the export."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", default="exports")
+    parser.add_argument("--format", choices=(PARQUET, CSV), default=PARQUET)
+    parser.add_argument("--tables", nargs="+", choices=list(EXPORT_TABLES))
+    parser.add_argument("--page-size", type=int, default=50_000)
+    parser.add_argument("--rows-per-file", type=int, default=1_000_000)
+    parser.add_argument(
+        "--full", action="store_true", help="ignore the watermarks, export all rows"
+    )
+    args = parser.parse_args()
+
+    fmt = resolve_format(args.format)
+    for session in get_db_session():
+        for table in args.tables or EXPORT_TABLES:
+            export_table(
+                session,
+                table,
+                args.output,
+                fmt=fmt,
+                page_size=args.page_size,
+                rows_per_file=args.rows_per_file,
+                full=args.full,
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,452 @@
+"""Fill the database with synthetic users and pomodoro sessions.
+
+Generates production-like data with NumPy, a block of users at a time:
+
+- per-user activity is skewed: session counts follow a lognormal weight,
+  so a few users own most of the sessions
+- users are spread over a weighted mix of timezones
+- work periods start on a diurnal curve of the user's local hour, with the
+  25/5 and 50/10 presets and custom durations
+- a share of sessions is left open, as if abandoned before midnight
+
+Rows are bulk loaded with COPY on Postgres (psycopg2) and executemany
+inserts elsewhere, never through ORM objects. The hourly, daily and weekly
+rollups of the generated sessions are aggregated in NumPy and loaded the
+same way, so /today, /week and /month see the generated history. Rows are
+appended, so the script can grow an existing database, and the tables are
+analyzed afterwards.
+
+Usage:
+    python -m scripts.generate_data --sessions 1000000 [--users 10000] [--seed 0]
+"""
+
+import argparse
+import csv
+import io
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+import numpy as np
+import pytz
+from sqlalchemy import func, insert, select
+
+from app.db.models import (
+    DailyStats,
+    HourlyStats,
+    PomodoroSession,
+    User,
+    WeeklyStats,
+    get_engine,
+    init_db,
+)
+
+logger = logging.getLogger(__name__)
+
+# Timezone and share of users
+TIMEZONES = (
+    ("Europe/Moscow", 0.45),
+    ("Europe/Kyiv", 0.08),
+    ("Asia/Yekaterinburg", 0.08),
+    ("Asia/Novosibirsk", 0.05),
+    ("Asia/Vladivostok", 0.03),
+    ("Asia/Almaty", 0.05),
+    ("Europe/Berlin", 0.07),
+    ("Europe/London", 0.04),
+    ("America/New_York", 0.05),
+    ("America/Los_Angeles", 0.03),
+    ("Asia/Kolkata", 0.02),
+    ("UTC", 0.05),
+)
+
+# Relative number of work periods started in each local hour: a morning and
+# an afternoon peak and a quiet night
+HOUR_WEIGHTS = np.array(
+    [1, 0.5, 0.3, 0.2, 0.2, 0.3, 1, 3, 6, 9, 10, 10,
+     7, 8, 10, 10, 9, 7, 6, 5, 5, 4, 3, 2],
+    dtype=float,
+)  # fmt: skip
+
+# Work minutes, break minutes and share of sessions
+PRESETS = ((25, 5, 0.6), (50, 10, 0.25), (30, 7, 0.05), (45, 15, 0.05), (15, 3, 0.05))
+
+# Rows loaded per executemany batch
+INSERT_BATCH = 20_000
+
+# First Telegram ID of generated users in an empty database
+FIRST_TELEGRAM_ID = 100_000_000
+
+
+def timezone_offsets(now: datetime, days: int) -> np.ndarray:
+    """Get the UTC offset of every timezone on each of the last days.
+
+    The offset at local noon stands for the whole day, which is off by the
+    DST shift for the hours before a transition.
+
+    Returns:
+        np.ndarray: Offsets in seconds, shape (timezones, days); column d is
+        d days before the timezone's current local date
+    """
+    offsets = np.empty((len(TIMEZONES), days), dtype=np.int64)
+    for index, (name, _) in enumerate(TIMEZONES):
+        tz = pytz.timezone(name)
+        today = pytz.utc.localize(now).astimezone(tz).date()
+        for day in range(days):
+            midnight = datetime.combine(
+                today - timedelta(days=day), datetime.min.time()
+            )
+            noon = midnight + timedelta(hours=12)
+            offsets[index, day] = tz.utcoffset(noon).total_seconds()
+    return offsets
+
+
+def local_today(now: datetime) -> np.ndarray:
+    """Get the current local date of every timezone as datetime64[D]."""
+    return np.array(
+        [
+            pytz.utc.localize(now).astimezone(pytz.timezone(name)).date()
+            for name, _ in TIMEZONES
+        ],
+        dtype="datetime64[D]",
+    )
+
+
+def to_python(values: np.ndarray) -> list:
+    """Convert an array to Python values the DB-API drivers accept."""
+    if values.dtype.kind == "M" and values.dtype != np.dtype("datetime64[D]"):
+        # datetime64[us] converts to datetime, NaT to None
+        return values.astype("datetime64[us]").tolist()
+    return values.tolist()
+
+
+def to_csv_field(values: np.ndarray) -> list:
+    """Convert an array to COPY CSV fields, an empty field for NULL."""
+    if values.dtype.kind == "M":
+        unit = "D" if values.dtype == np.dtype("datetime64[D]") else "s"
+        text = np.datetime_as_string(values, unit=unit)
+        return np.where(np.isnat(values), "", text).tolist()
+    return values.tolist()
+
+
+def bulk_insert(connection, table, columns: Dict[str, np.ndarray]):
+    """Load columns of equal length into a table.
+
+    Args:
+        connection: Sync connection inside a transaction
+        table: Table to load
+        columns: Column name -> values
+    """
+    names = list(columns)
+    if connection.dialect.driver == "psycopg2":
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(
+            zip(*(to_csv_field(values) for values in columns.values()))
+        )
+        buffer.seek(0)
+        cursor = connection.connection.cursor()
+        cursor.copy_expert(
+            f"COPY {table.name} ({', '.join(names)}) FROM STDIN WITH (FORMAT csv)",
+            buffer,
+        )
+        return
+    rows = [
+        dict(zip(names, row))
+        for row in zip(*(to_python(values) for values in columns.values()))
+    ]
+    for start in range(0, len(rows), INSERT_BATCH):
+        connection.execute(insert(table), rows[start : start + INSERT_BATCH])
+
+
+def aggregate(keys: np.ndarray, completed: np.ndarray, focus: np.ndarray):
+    """Sum completed pomodoros and focus minutes per distinct key.
+
+    Returns:
+        tuple: Distinct keys, completed sums and focus minute sums
+    """
+    distinct, inverse = np.unique(keys, return_inverse=True)
+    return (
+        distinct,
+        np.bincount(inverse, weights=completed).astype(np.int64),
+        np.bincount(inverse, weights=focus).astype(np.int64),
+    )
+
+
+def load_rollups(connection, user_ids, dates, hours, completed, work_minutes):
+    """Load the hourly, daily and weekly rollups of completed sessions.
+
+    Keys are packed into one int64 so that NumPy can group them: the local
+    date in days since the epoch takes the low 20 bits, the user ID the rest.
+    """
+    done = completed > 0
+    user_ids, days, hours = user_ids[done], dates[done].astype(np.int64), hours[done]
+    completed = completed[done]
+    focus = completed * work_minutes[done]
+
+    day_keys = (user_ids << 20) | days
+    keys, totals, minutes = aggregate(day_keys * 24 + hours, completed, focus)
+    bulk_insert(
+        connection,
+        HourlyStats.__table__,
+        {
+            "user_id": keys // 24 >> 20,
+            "date": (keys // 24 & 0xFFFFF).astype("datetime64[D]"),
+            "hour": keys % 24,
+            "completed": totals,
+            "focus_minutes": minutes,
+        },
+    )
+    keys, totals, minutes = aggregate(day_keys, completed, focus)
+    bulk_insert(
+        connection,
+        DailyStats.__table__,
+        {
+            "user_id": keys >> 20,
+            "date": (keys & 0xFFFFF).astype("datetime64[D]"),
+            "completed": totals,
+            "focus_minutes": minutes,
+        },
+    )
+    # 1970-01-01 was a Thursday, three days after a Monday
+    mondays = days - (days + 3) % 7
+    keys, totals, minutes = aggregate((user_ids << 20) | mondays, completed, focus)
+    bulk_insert(
+        connection,
+        WeeklyStats.__table__,
+        {
+            "user_id": keys >> 20,
+            "week_start": (keys & 0xFFFFF).astype("datetime64[D]"),
+            "completed": totals,
+            "focus_minutes": minutes,
+        },
+    )
+
+
+class SyntheticData:
+    """Generator of users and sessions with a reproducible random seed."""
+
+    def __init__(
+        self,
+        seed: int = 0,
+        days: int = 365,
+        open_fraction: float = 0.02,
+        now: Optional[datetime] = None,
+    ):
+        """Initialize the SyntheticData.
+
+        Args:
+            seed: Seed of the random generator
+            days: Days of history, ending today
+            open_fraction: Share of sessions left without an end time
+            now: Naive UTC time the history ends at
+        """
+        self.rng = np.random.default_rng(seed)
+        self.days = days
+        self.open_fraction = open_fraction
+        self.now = now or datetime.utcnow()
+        # One more day for sessions moved out of the future
+        self.offsets = timezone_offsets(self.now, days + 1)
+        self.today = local_today(self.now)
+        self.timezone_names = np.array([name for name, _ in TIMEZONES])
+        shares = np.array([share for _, share in TIMEZONES])
+        self.timezone_shares = shares / shares.sum()
+        weights = np.array([share for _, _, share in PRESETS])
+        self.preset_shares = weights / weights.sum()
+        self.work = np.array([work for work, _, _ in PRESETS])
+        self.breaks = np.array([pause for _, pause, _ in PRESETS])
+        self.hour_shares = HOUR_WEIGHTS / HOUR_WEIGHTS.sum()
+
+    def create_users(self, engine, users: int, sessions: int):
+        """Load users and draw their timezones and numbers of sessions.
+
+        Args:
+            engine: Sync engine
+            users: Number of users to create
+            sessions: Number of sessions shared among them
+
+        Returns:
+            tuple: Internal user IDs, index into TIMEZONES and number of
+            sessions of each user
+        """
+        timezones = self.rng.choice(len(TIMEZONES), users, p=self.timezone_shares)
+        created = np.datetime64(self.now, "s") - self.rng.integers(
+            self.days * 86_400, (self.days + 90) * 86_400, users
+        ).astype("timedelta64[s]")
+        with engine.begin() as connection:
+            last = connection.execute(select(func.max(User.telegram_id))).scalar()
+            first = max((last or 0) + 1, FIRST_TELEGRAM_ID)
+            telegram_ids = np.arange(first, first + users)
+            bulk_insert(
+                connection,
+                User.__table__,
+                {
+                    "telegram_id": telegram_ids,
+                    "username": np.char.add("user", telegram_ids.astype(str)),
+                    "first_name": np.full(users, "Synthetic"),
+                    "timezone": self.timezone_names[timezones],
+                    "created_at": created,
+                    "updated_at": created,
+                },
+            )
+            rows = connection.execute(
+                select(User.id, User.telegram_id).where(
+                    User.telegram_id.between(first, first + users - 1)
+                )
+            ).all()
+        loaded = np.array(rows, dtype=np.int64)
+        user_ids = np.empty(users, dtype=np.int64)
+        user_ids[loaded[:, 1] - first] = loaded[:, 0]
+
+        # Lognormal activity: a long tail of users with many sessions
+        weights = self.rng.lognormal(0.0, 1.5, users)
+        counts = self.rng.multinomial(sessions, weights / weights.sum())
+        return user_ids, timezones, counts
+
+    def sessions(self, user_ids: np.ndarray, timezones: np.ndarray, counts):
+        """Generate the sessions of a block of users.
+
+        Args:
+            user_ids: Internal IDs of the users
+            timezones: Index into TIMEZONES of each user
+            counts: Number of sessions of each user
+
+        Returns:
+            dict: Columns of pomodoro_sessions, plus the local date and hour
+            of each start under "date" and "hour"
+        """
+        rng = self.rng
+        owner = np.repeat(np.arange(len(user_ids)), counts)
+        size = len(owner)
+        tz = timezones[owner]
+        day = rng.integers(0, self.days, size)
+        hour = rng.choice(24, size, p=self.hour_shares)
+        second = rng.integers(0, 3600, size)
+        preset = rng.choice(len(PRESETS), size, p=self.preset_shares)
+        work = self.work[preset]
+
+        def starts(day):
+            """Get the local dates and UTC start times of days back from today."""
+            dates = self.today[tz] - day.astype("timedelta64[D]")
+            local = dates.astype("datetime64[s]") + (hour * 3600 + second).astype(
+                "timedelta64[s]"
+            )
+            return dates, local - self.offsets[tz, day].astype("timedelta64[s]")
+
+        dates, start = starts(day)
+        # Work periods of today that would not have ended yet start a day earlier
+        future = start + (work * 60).astype("timedelta64[s]") > np.datetime64(
+            self.now, "s"
+        )
+        day = np.where(future, day + 1, day)
+        dates, start = starts(day)
+
+        completed = np.minimum(rng.geometric(0.35, size) - 1, 8)
+        length = np.maximum(completed, 1) * (work + self.breaks[preset]) * 60
+        end = start + length.astype("timedelta64[s]")
+        end[rng.random(size) < self.open_fraction] = np.datetime64("NaT")
+        return {
+            "user_id": user_ids[owner],
+            "work_minutes": work,
+            "break_minutes": self.breaks[preset],
+            "start_time": start,
+            "end_time": end,
+            "completed": completed,
+            "updated_at": np.where(np.isnat(end), start, end),
+            "date": dates,
+            "hour": hour,
+        }
+
+
+def load_synthetic_data(
+    engine,
+    sessions: int,
+    users: Optional[int] = None,
+    seed: int = 0,
+    days: int = 365,
+    open_fraction: float = 0.02,
+    chunk_size: int = 200_000,
+    now: Optional[datetime] = None,
+) -> int:
+    """Append synthetic users, sessions and their rollups to the database.
+
+    Args:
+        engine: Sync engine
+        sessions: Number of sessions to generate
+        users: Number of users owning them, defaults to one per 100 sessions
+        seed: Seed of the random generator
+        days: Days of history, ending today
+        open_fraction: Share of sessions left without an end time
+        chunk_size: Approximate number of sessions loaded per transaction
+        now: Naive UTC time the history ends at, defaults to the current time
+
+    Returns:
+        int: Number of users created
+    """
+    users = users or max(1, sessions // 100)
+    data = SyntheticData(seed=seed, days=days, open_fraction=open_fraction, now=now)
+    user_ids, timezones, counts = data.create_users(engine, users, sessions)
+
+    # Blocks of whole users, so that each block's rollups are final
+    ends = np.cumsum(counts)
+    first = 0
+    while first < users:
+        loaded = ends[first - 1] if first else 0
+        last = max(first + 1, int(np.searchsorted(ends, loaded + chunk_size, "right")))
+        block = data.sessions(
+            user_ids[first:last], timezones[first:last], counts[first:last]
+        )
+        order = data.rng.permutation(len(block["user_id"]))
+        block = {name: values[order] for name, values in block.items()}
+        dates, hours = block.pop("date"), block.pop("hour")
+        with engine.begin() as connection:
+            bulk_insert(connection, PomodoroSession.__table__, block)
+            load_rollups(
+                connection,
+                block["user_id"],
+                dates,
+                hours,
+                block["completed"],
+                block["work_minutes"],
+            )
+        first = last
+
+    # Without statistics SQLite prefers the full user_id/start_time index
+    # over the small partial index of open sessions
+    with engine.begin() as connection:
+        connection.exec_driver_sql("ANALYZE")
+    return users
+
+
+def main():
+    """Generate the data."""
+    logging.basicConfig(
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+        level=logging.INFO,
+    )
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, help="defaults to sessions / 100")
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--open-fraction", type=float, default=0.02)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    init_db()
+    started = time.perf_counter()
+    users = load_synthetic_data(
+        get_engine(),
+        args.sessions,
+        users=args.users,
+        seed=args.seed,
+        days=args.days,
+        open_fraction=args.open_fraction,
+    )
+    elapsed = time.perf_counter() - started
+    logger.info(
+        f"Loaded {users} users and {args.sessions} sessions in {elapsed:.1f}s "
+        f"({args.sessions / elapsed:.0f} sessions/s)"
+    )
+
+
+if __name__ == "__main__":
+    main()
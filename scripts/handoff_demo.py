@@ -0,0 +1,193 @@
+"""Hand pending timers over from an old replica to a new one.
+
+Runs two unsharded replicas sharing one database, the way a deploy does:
+the old replica arms timers, the new one starts while the old one keeps
+arming more, then the old replica gets SIGTERM and drains. Each user
+should get exactly one break message and one next-round prompt, at the
+original deadline whichever replica sends it. Notifications go to
+per-replica log files instead of Telegram.
+
+Usage:
+    python -m scripts.handoff_demo --users 200 --duration 20
+
+Set DATABASE_URL to use Postgres; by default a temporary SQLite file is used.
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import signal
+import tempfile
+import time
+from collections import Counter, defaultdict
+from datetime import datetime
+
+SYNC_SECONDS = 1
+
+
+class FileBot:
+    """Bot stand-in appending each sent message to a log file."""
+
+    def __init__(self, replica: str, path: str):
+        """Initialize the FileBot.
+
+        Args:
+            replica: Name written next to every message
+            path: Log file to append to
+        """
+        self.replica = replica
+        self.path = path
+
+    async def send_message(self, chat_id: int, text: str, reply_markup=None):
+        """Record a message and the time it was sent."""
+        with open(self.path, "a") as log:
+            log.write(f"{self.replica} {chat_id} {text.split()[0]} {time.time()}\n")
+
+
+def deadline_of(user_id: int, start: float, users: int, spread: float) -> float:
+    """Get the work deadline of a demo user."""
+    return start + spread * user_id / users
+
+
+def run_replica(
+    replica: str,
+    database_url: str,
+    log_dir: str,
+    user_ids: range,
+    later_user_ids: range,
+    arm_later,
+    start: float,
+    users: int,
+    spread: float,
+):
+    """Run one replica until SIGTERM, then drain it."""
+    os.environ.setdefault("TELEGRAM_TOKEN", "123456:handoff-demo")
+    os.environ["DATABASE_URL"] = database_url
+    os.environ["TIMER_SYNC_SECONDS"] = str(SYNC_SECONDS)
+    # Log files need no Telegram rate limits
+    os.environ["TELEGRAM_RATE_LIMIT"] = "10000"
+
+    from app.bot import wait_for_stop_signal
+    from app.db.models import get_async_session
+    from app.services.scheduler import WORK_PHASE, TimerRecord
+    from app.services.timer import timer_service
+
+    async def arm(ids: range):
+        """Persist and arm work timers, as /pomodoro does."""
+        records = [
+            TimerRecord(
+                deadline=deadline_of(user_id, start, users, spread),
+                user_id=user_id,
+                chat_id=user_id,
+                phase=WORK_PHASE,
+            )
+            for user_id in ids
+        ]
+        async with get_async_session() as session:
+            for record in records:
+                await timer_service._save_pending(session, record)
+            await session.commit()
+        for record in records:
+            timer_service.timers.schedule(record)
+
+    async def main():
+        bot = FileBot(replica, os.path.join(log_dir, f"{replica}.log"))
+        timer_service.start_scheduler(bot)
+        await timer_service.restore_timers()
+        await arm(user_ids)
+        if later_user_ids:
+            # Timers started while the new replica is already running
+            await asyncio.get_running_loop().run_in_executor(None, arm_later.wait)
+            await arm(later_user_ids)
+        await wait_for_stop_signal()
+        await timer_service.shutdown()
+
+    asyncio.run(main())
+
+
+def main():
+    """Run the demo and print the results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--duration", type=float, default=20)
+    args = parser.parse_args()
+
+    log_dir = tempfile.mkdtemp()
+    database_url = os.environ.get(
+        "DATABASE_URL", f"sqlite:///{os.path.join(log_dir, 'handoff.sqlite3')}"
+    )
+    os.environ.setdefault("TELEGRAM_TOKEN", "123456:handoff-demo")
+    os.environ["DATABASE_URL"] = database_url
+
+    from app.db.models import init_db
+
+    init_db()
+
+    # Deadlines start after the handoff so most timers change replicas
+    start = time.time() + args.duration * 0.25
+    spread = args.duration * 0.6
+    half = args.users // 2
+    context = multiprocessing.get_context("spawn")
+    arm_later = context.Event()
+    common = (database_url, log_dir)
+    timing = (start, args.users, spread)
+    old = context.Process(
+        target=run_replica,
+        args=(
+            "old",
+            *common,
+            range(1, half + 1),
+            range(half + 1, args.users + 1),
+            arm_later,
+            *timing,
+        ),
+    )
+    new = context.Process(
+        target=run_replica,
+        args=("new", *common, range(0), range(0), None, *timing),
+    )
+
+    old.start()
+    time.sleep(args.duration * 0.1)
+    new.start()
+    time.sleep(args.duration * 0.05)
+    arm_later.set()
+    time.sleep(args.duration * 0.05)
+    print(f"{datetime.now():%H:%M:%S} SIGTERM to the old replica")
+    os.kill(old.pid, signal.SIGTERM)
+    old.join()
+    time.sleep(args.duration * 0.8)
+    os.kill(new.pid, signal.SIGTERM)
+    new.join()
+
+    messages = Counter()
+    per_replica = Counter()
+    lateness = defaultdict(list)
+    for name in os.listdir(log_dir):
+        if not name.endswith(".log"):
+            continue
+        with open(os.path.join(log_dir, name)) as log:
+            for line in log:
+                replica, chat_id, kind, sent_at = line.split()
+                messages[(int(chat_id), kind)] += 1
+                per_replica[replica] += 1
+                if kind == "✅":
+                    deadline = deadline_of(int(chat_id), start, args.users, spread)
+                    lateness[replica].append(float(sent_at) - deadline)
+
+    expected = {
+        (user_id, kind) for user_id in range(1, args.users + 1) for kind in "✅🚀"
+    }
+    missing = expected - set(messages)
+    duplicated = [key for key, count in messages.items() if count > 1]
+    print(f"Logs and database: {log_dir}")
+    print(f"Messages per replica: {dict(sorted(per_replica.items()))}")
+    for replica, values in sorted(lateness.items()):
+        print(f"Break message lateness ({replica}): max {max(values):.2f}s")
+    print(f"Missing: {sorted(missing)}")
+    print(f"Duplicated: {sorted(duplicated)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,11 @@
+"""Shared pytest configuration for the Pomodoro bot tests."""
+
+import os
+import tempfile
+
+# app.config reads the environment at import time
+os.environ.setdefault("TELEGRAM_TOKEN", "123456:test-token")
+os.environ.setdefault(
+    "DATABASE_URL",
+    f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'pomodoro_test.sqlite3')}",
+)
@@ -0,0 +1,32 @@
+"""Tests for the in-process LRU cache."""
+
+from app.services.cache import LRUCache
+
+
+def test_lru_cache_evicts_least_recently_used():
+    """Test that the oldest unused entry is evicted when full."""
+    cache = LRUCache(max_size=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "b" is now least recently used
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.evictions == 1
+
+
+def test_lru_cache_expires_and_invalidates():
+    """Test TTL expiry, explicit invalidation and hit/miss counters."""
+    cache = LRUCache(ttl=-1)
+    cache.set("expired", 1)
+    assert cache.get("expired") is None
+
+    cache = LRUCache()
+    cache.set("key", 1)
+    assert cache.get("key") == 1
+    cache.invalidate("key")
+    assert cache.get("key", "default") == "default"
+    assert cache.metrics["hits"] == 1
+    assert cache.metrics["misses"] == 1
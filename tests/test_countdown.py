@@ -0,0 +1,148 @@
+"""Tests for live countdown messages."""
+
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+from app.db.models import User, async_engine, get_async_session, init_db
+from app.services.countdown import LiveCountdown, edit_interval, render
+from app.services.scheduler import BREAK_PHASE, WORK_PHASE, TimerRecord
+from app.services.timer import WORK_STARTED, TimerService
+
+
+def fake_dispatcher() -> MagicMock:
+    """Build a dispatcher making each call as soon as it is queued."""
+
+    def submit(chat_id, call, priority):
+        future = asyncio.get_running_loop().create_future()
+        future.set_result(call())
+        return future
+
+    dispatcher = MagicMock()
+    dispatcher.submit.side_effect = submit
+    return dispatcher
+
+
+def make_record(user_id: int, deadline: float, phase: str = WORK_PHASE):
+    """Create a timer record for a test user."""
+    return TimerRecord(deadline=deadline, user_id=user_id, chat_id=user_id, phase=phase)
+
+
+def test_cadence_and_text_change_together():
+    """Test minute edits far from the deadline and 5 s edits near it."""
+    assert edit_interval(1500) == 60
+    assert edit_interval(120) == 15
+    assert edit_interval(30) == 5
+    assert render("⏱", 1441) == render("⏱", 1499) == "⏱\n⏳ Осталось 25 мин"
+    assert render("⏱", 101) == render("⏱", 105) == "⏱\n⏳ Осталось 1:45"
+    assert render("⏱", 7) == "⏱\n⏳ Осталось 0:10"
+    assert render("⏱", 90, paused=True) == "⏱\n⏸ На паузе, осталось 1:30"
+
+
+def test_tick_skips_unchanged_text_and_finishes_gone_timers():
+    """Test that only changed text is sent and ended timers get their text back."""
+    now = 1_000_000.0
+    timers = {1: (make_record(1, now + 630), None), 2: (make_record(2, now), 90.0)}
+
+    async def run():
+        countdown = LiveCountdown(
+            fake_dispatcher(), lambda u: timers.get(u, (None, None))
+        )
+        countdown.track(1, 1, 11, "⏱", WORK_PHASE)
+        countdown.track(2, 2, 22, "⏱", WORK_PHASE)
+        edits = [await countdown.tick(now, now)]
+        # Not due yet
+        edits.append(await countdown.tick(now + 30, now + 30))
+        # Due: the running timer changed, the paused one did not
+        edits.append(await countdown.tick(now + 60, now + 60))
+        timers[1] = (make_record(1, now + 900, BREAK_PHASE), None)
+        del timers[2]
+        edits.append(await countdown.tick(now + 120, now + 120))
+        return countdown, edits
+
+    countdown, edits = asyncio.run(run())
+    assert edits == [2, 0, 1, 2]
+    assert countdown.metrics["unchanged"] == 2
+    assert len(countdown) == 0
+    edit_message_text = countdown.dispatcher.bot.edit_message_text
+    assert [call.args[0] for call in edit_message_text.mock_calls] == [
+        "⏱\n⏳ Осталось 11 мин",
+        "⏱\n⏸ На паузе, осталось 1:30",
+        "⏱\n⏳ Осталось 10 мин",
+        "⏱",
+        "⏱",
+    ]
+
+
+def test_edits_are_bounded_by_the_budget():
+    """Test that many due countdowns share the edit budget, oldest first."""
+    now = 1_000_000.0
+
+    async def run():
+        countdown = LiveCountdown(
+            fake_dispatcher(),
+            lambda u: (make_record(u, now + 600), None),
+            edits_per_second=5,
+        )
+        for user_id in range(100):
+            countdown.track(user_id, user_id, user_id, "⏱", WORK_PHASE)
+        first = await countdown.tick(now, now)
+        second = await countdown.tick(now + 1, now + 1)
+        edited = [call.args[0] for call in countdown.dispatcher.submit.mock_calls]
+        return countdown, first, second, edited
+
+    countdown, first, second, edited = asyncio.run(run())
+    assert (first, second) == (5, 5)
+    assert edited == list(range(10))
+    assert countdown.metrics["deferred"] == 95 + 90
+
+
+def test_budget_ignores_wall_clock_jumps():
+    """Test that the edit budget refills with the monotonic clock only."""
+    now = 1_000_000.0
+
+    async def run():
+        countdown = LiveCountdown(
+            fake_dispatcher(),
+            lambda u: (make_record(u, now + 7200), None),
+            edits_per_second=5,
+        )
+        for user_id in range(100):
+            countdown.track(user_id, user_id, user_id, "⏱", WORK_PHASE)
+        first = await countdown.tick(now, 50.0)
+        # The system clock jumps an hour ahead within the same second
+        second = await countdown.tick(now + 3600, 50.5)
+        return first, second
+
+    assert asyncio.run(run()) == (5, 2)
+
+
+def test_live_setting_counts_down_in_the_start_message():
+    """Test that /live is stored and the next timer message is tracked."""
+    init_db()
+    service = TimerService()
+    update = SimpleNamespace(
+        effective_user=SimpleNamespace(
+            id=9201, username="live", first_name="Live", last_name=None
+        ),
+        effective_chat=SimpleNamespace(id=9201, type="private"),
+        effective_message=SimpleNamespace(
+            reply_text=AsyncMock(return_value=SimpleNamespace(message_id=77))
+        ),
+    )
+
+    async def run():
+        await service.toggle_live(update)
+        service.users.clear()
+        await service.start_timer(update, SimpleNamespace(user_data={}), 25, 5)
+        async with get_async_session() as session:
+            row = await session.get(User, service.users.get(9201).id)
+            enabled = row.live_countdown
+        await async_engine.dispose()
+        return enabled
+
+    enabled = asyncio.run(run())
+    assert enabled is True
+    message = service.countdown._messages[9201]
+    assert (message.message_id, message.prefix) == (77, WORK_STARTED)
+    assert update.effective_message.reply_text.call_args.args[0] == WORK_STARTED
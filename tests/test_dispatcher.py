@@ -0,0 +1,71 @@
+"""Tests for the outbound message dispatcher."""
+
+import asyncio
+
+from telegram.error import RetryAfter
+
+from app.services.dispatcher import (
+    INFO_PRIORITY,
+    TIMER_PRIORITY,
+    MessageDispatcher,
+    TokenBucket,
+)
+
+
+def test_token_bucket_limits_rate():
+    """Test that the bucket allows a burst and then reports the wait."""
+    bucket = TokenBucket(rate=2, capacity=2)
+    now = bucket.updated
+    assert bucket.take(now) == 0
+    assert bucket.take(now) == 0
+    assert bucket.take(now) == 0.5
+    assert bucket.take(now + 0.5) == 0
+
+
+def test_timer_messages_are_sent_before_info_messages():
+    """Test priority order and round-robin between chats."""
+    sent = []
+
+    def call(label):
+        async def send():
+            sent.append(label)
+            return label
+
+        return send
+
+    async def run():
+        dispatcher = MessageDispatcher(rate=100, chat_interval=0, max_in_flight=1)
+        dispatcher.submit(1, call("info-1"), INFO_PRIORITY)
+        dispatcher.submit(1, call("timer-1a"), TIMER_PRIORITY)
+        dispatcher.submit(1, call("timer-1b"), TIMER_PRIORITY)
+        last = dispatcher.submit(2, call("timer-2"), TIMER_PRIORITY)
+        dispatcher.start(bot=None)
+        assert await last == "timer-2"
+        await dispatcher.stop()
+
+    asyncio.run(run())
+    assert sent == ["timer-1a", "timer-2", "timer-1b", "info-1"]
+
+
+def test_retry_after_requeues_the_call():
+    """Test that flood control pauses sending and retries the call."""
+    attempts = []
+
+    async def flaky():
+        attempts.append(len(attempts))
+        if len(attempts) == 1:
+            raise RetryAfter(0)
+        return "ok"
+
+    async def run():
+        dispatcher = MessageDispatcher(rate=100, chat_interval=0)
+        dispatcher.start(bot=None)
+        result = await dispatcher.submit(1, flaky, TIMER_PRIORITY)
+        await dispatcher.stop()
+        return result, dispatcher.metrics
+
+    result, metrics = asyncio.run(run())
+    assert result == "ok"
+    assert len(attempts) == 2
+    assert metrics["retried"] == 1
+    assert metrics["sent"] == 1
@@ -0,0 +1,117 @@
+"""Tests for the incremental analytics export."""
+
+import csv
+import os
+import tempfile
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import update
+
+from app.db.models import PomodoroSession, User, get_db_session, init_db
+from app.services.export import CSV, PARQUET, export_table, load_watermarks
+
+# Far enough ahead that rows written by the test are past the export lag
+LATER = datetime.utcnow() + timedelta(hours=1)
+
+
+def add_sessions(session, telegram_id: int, count: int) -> list:
+    """Create a user with ``count`` sessions and get the session IDs."""
+    user = User(telegram_id=telegram_id, first_name="Export")
+    session.add(user)
+    session.flush()
+    sessions = [
+        PomodoroSession(user_id=user.id, work_minutes=25, break_minutes=5)
+        for _ in range(count)
+    ]
+    session.add_all(sessions)
+    session.commit()
+    return [pomodoro.id for pomodoro in sessions]
+
+
+def read_csv_ids(paths: list) -> list:
+    """Get the ids of the rows of exported CSV files."""
+    ids = []
+    for path in paths:
+        with open(path, newline="") as file:
+            ids.extend(int(row["id"]) for row in csv.DictReader(file))
+    return ids
+
+
+def test_csv_export_is_incremental():
+    """Test that only rows changed after the watermark are exported again."""
+    init_db()
+    output = tempfile.mkdtemp()
+    for session in get_db_session():
+        ids = add_sessions(session, 8001, 5)
+        first = export_table(
+            session, "sessions", output, fmt=CSV, page_size=2, now=LATER
+        )
+        again = export_table(session, "sessions", output, fmt=CSV, now=LATER)
+
+        # A completed pomodoro moves the session past the watermark
+        session.execute(
+            update(PomodoroSession)
+            .where(PomodoroSession.id == ids[1])
+            .values(completed=PomodoroSession.completed + 1)
+        )
+        session.commit()
+        changed = export_table(
+            session,
+            "sessions",
+            output,
+            fmt=CSV,
+            now=datetime.utcnow() + timedelta(hours=2),
+        )
+
+    assert set(ids) <= set(read_csv_ids(first.files))
+    assert again.rows == 0 and again.files == []
+    assert read_csv_ids(changed.files) == [ids[1]]
+    assert load_watermarks(output)["sessions"].id == ids[1]
+
+
+def test_export_leaves_out_recent_changes_and_splits_files():
+    """Test the export lag and the split into files of rows_per_file rows."""
+    init_db()
+    output = tempfile.mkdtemp()
+    for session in get_db_session():
+        add_sessions(session, 8101, 3)
+        recent = export_table(
+            session, "users", output, fmt=CSV, now=datetime.utcnow(), full=True
+        )
+        split = export_table(
+            session,
+            "sessions",
+            output,
+            fmt=CSV,
+            page_size=1,
+            rows_per_file=2,
+            full=True,
+            now=LATER,
+        )
+
+    exported = []
+    for path in recent.files:
+        with open(path, newline="") as file:
+            exported.extend(int(row["telegram_id"]) for row in csv.DictReader(file))
+    assert 8101 not in exported
+    assert all(len(read_csv_ids([path])) <= 2 for path in split.files)
+    assert len(split.files) == (split.rows + 1) // 2
+    assert not [name for name in os.listdir(output) if name.endswith(".tmp")]
+
+
+def test_parquet_export_keeps_column_types():
+    """Test that Parquet files hold typed columns of every exported row."""
+    pq = pytest.importorskip("pyarrow.parquet")
+    init_db()
+    output = tempfile.mkdtemp()
+    for session in get_db_session():
+        ids = add_sessions(session, 8201, 3)
+        result = export_table(
+            session, "sessions", output, fmt=PARQUET, page_size=2, full=True, now=LATER
+        )
+
+    table = pq.read_table(result.files[0])
+    assert set(ids) <= set(table.column("id").to_pylist())
+    assert str(table.schema.field("start_time").type) == "timestamp[us]"
+    assert pq.ParquetFile(result.files[0]).num_row_groups == -(-result.rows // 2)
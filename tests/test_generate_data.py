@@ -0,0 +1,85 @@
+"""Tests for the synthetic data generator."""
+
+import os
+import tempfile
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import Session
+
+from app.db.models import (
+    Base,
+    DailyStats,
+    HourlyStats,
+    PomodoroSession,
+    User,
+    WeeklyStats,
+)
+from app.services.stats import RollupIncrements
+
+pytest.importorskip("numpy")
+generate_data = pytest.importorskip("scripts.generate_data")
+
+
+def test_generated_rollups_match_the_sessions():
+    """Test that the NumPy rollups count sessions as the bot's rollups do."""
+    # A database of its own keeps the ANALYZE after loading away from the
+    # query plan tests
+    engine = create_engine(
+        f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'generated.sqlite3')}"
+    )
+    Base.metadata.create_all(engine)
+    # Local hours are drawn against each day's noon offset, which a DST
+    # change could shift; the 60 days before July have none
+    generate_data.load_synthetic_data(
+        engine,
+        3000,
+        users=30,
+        seed=7,
+        days=60,
+        chunk_size=500,
+        now=datetime(2024, 7, 1, 12),
+    )
+
+    with Session(engine) as session:
+        user_ids = select(User.id).where(
+            User.telegram_id >= generate_data.FIRST_TELEGRAM_ID
+        )
+        count = session.scalar(
+            select(func.count()).where(PomodoroSession.user_id.in_(user_ids))
+        )
+        rows = session.execute(
+            select(
+                PomodoroSession.user_id,
+                User.timezone,
+                PomodoroSession.start_time,
+                PomodoroSession.completed,
+                PomodoroSession.work_minutes,
+            )
+            .join(User, User.id == PomodoroSession.user_id)
+            .where(User.id.in_(user_ids), PomodoroSession.completed > 0)
+        )
+        expected = RollupIncrements()
+        for user_id, timezone, start_time, completed, work_minutes in rows:
+            expected.add(user_id, timezone, start_time, work_minutes, completed)
+
+        def stored(model, key_columns):
+            rows = session.execute(
+                select(*key_columns, model.completed, model.focus_minutes).where(
+                    model.user_id.in_(user_ids)
+                )
+            )
+            return {tuple(row[:-2]): (row[-2], row[-1]) for row in rows}
+
+        daily = stored(DailyStats, (DailyStats.user_id, DailyStats.date))
+        hourly = stored(
+            HourlyStats, (HourlyStats.user_id, HourlyStats.date, HourlyStats.hour)
+        )
+        weekly = stored(WeeklyStats, (WeeklyStats.user_id, WeeklyStats.week_start))
+    engine.dispose()
+
+    assert count == 3000
+    assert daily == expected.daily
+    assert hourly == expected.hourly
+    assert weekly == expected.weekly
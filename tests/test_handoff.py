@@ -0,0 +1,58 @@
+"""Tests for handing timers over between replicas."""
+
+import asyncio
+import time
+
+from app.db.models import async_engine, get_async_session, init_db
+from app.services.scheduler import WORK_PHASE, TimerRecord
+from app.services.timer import TimerService
+
+
+def make_record(user_id: int, deadline: float) -> TimerRecord:
+    """Create a work timer record for a test user."""
+    return TimerRecord(
+        deadline=deadline, user_id=user_id, chat_id=user_id, phase=WORK_PHASE
+    )
+
+
+async def save(service: TimerService, record: TimerRecord):
+    """Persist a timer record as start_timer does."""
+    async with get_async_session() as session:
+        await service._save_pending(session, record)
+        await session.commit()
+
+
+def test_new_replica_arms_timers_started_by_the_old_one():
+    """Test that a running replica picks up timers at their own deadline."""
+    init_db()
+    old, new = TimerService(), TimerService()
+    record = make_record(4242, time.time() + 600)
+
+    async def run():
+        # The old replica starts a timer after the new one restored
+        await save(old, record)
+        old.timers.schedule(record)
+        await new._sync_timers()
+        await async_engine.dispose()
+
+    asyncio.run(run())
+    armed = new.timers.get(4242)
+    assert armed is not None
+    assert abs(armed.deadline - record.deadline) < 0.001
+
+
+def test_sync_skips_timers_being_fired():
+    """Test that a sync does not re-arm a timer popped for firing."""
+    init_db()
+    service = TimerService()
+    record = make_record(4343, time.time() - 1)
+
+    async def run():
+        await save(service, record)
+        # Popped by the scheduler, not yet claimed
+        service._firing.add(record.user_id)
+        await service._sync_timers()
+        await async_engine.dispose()
+
+    asyncio.run(run())
+    assert 4343 not in service.timers
@@ -0,0 +1,122 @@
+"""Tests for queue-based webhook ingestion."""
+
+import asyncio
+import random
+import socket
+
+import httpx
+
+from app.services.ingestion import SECRET_TOKEN_HEADER, UpdateIngestor
+
+
+class RecordingApplication:
+    """Application stand-in recording the processed updates."""
+
+    bot = None
+
+    def __init__(self, delay: float = 0.0):
+        """Initialize the RecordingApplication."""
+        self.delay = delay
+        self.processed = []
+        self.release = asyncio.Event()
+        self.release.set()
+
+    async def process_update(self, update):
+        """Record the chat and text of an update after a short delay."""
+        await self.release.wait()
+        await asyncio.sleep(random.random() * self.delay)
+        self.processed.append((update.effective_chat.id, update.message.text))
+
+
+def message_update(update_id: int, chat_id: int, text: str) -> dict:
+    """Build a raw private message update."""
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": 0,
+            "chat": {"id": chat_id, "type": "private"},
+            "text": text,
+        },
+    }
+
+
+def free_port() -> int:
+    """Find a free local TCP port."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def test_updates_of_a_chat_keep_their_order():
+    """Test that concurrent consumers process each chat in arrival order."""
+
+    async def run():
+        application = RecordingApplication(delay=0.002)
+        ingestor = UpdateIngestor(application, consumers=4, queue_size=1000)
+        ingestor.start_consumers()
+        update_id = 0
+        for index in range(20):
+            for chat_id in range(10):
+                update_id += 1
+                assert await ingestor.put(
+                    message_update(update_id, chat_id, str(index))
+                )
+        await ingestor.stop()
+        return application.processed
+
+    processed = asyncio.run(run())
+    assert len(processed) == 200
+    for chat_id in range(10):
+        texts = [int(text) for chat, text in processed if chat == chat_id]
+        assert texts == list(range(20))
+
+
+def test_webhook_checks_secret_and_applies_backpressure():
+    """Test secret token validation and 503 answers while queues are full."""
+
+    async def run():
+        application = RecordingApplication()
+        application.release.clear()
+        ingestor = UpdateIngestor(
+            application,
+            consumers=1,
+            queue_size=2,
+            enqueue_timeout=0.05,
+            secret_token="s3cret",
+        )
+        port = free_port()
+        ingestor.start("127.0.0.1", port, url_path="webhook")
+        url = f"http://127.0.0.1:{port}/webhook"
+        headers = {SECRET_TOKEN_HEADER: "s3cret"}
+
+        async with httpx.AsyncClient() as client:
+            wrong = await client.post(
+                url,
+                json=message_update(1, 1, "x"),
+                headers={SECRET_TOKEN_HEADER: "wrong"},
+            )
+            # The first update is taken by the blocked consumer, two fill
+            # the queue and the last one is rejected
+            statuses = [
+                (
+                    await client.post(
+                        url, json=message_update(i, 1, str(i)), headers=headers
+                    )
+                ).status_code
+                for i in range(2, 6)
+            ]
+            await asyncio.sleep(0)
+
+        metrics = ingestor.metrics
+        application.release.set()
+        await ingestor.stop()
+        return wrong.status_code, statuses, metrics, application.processed
+
+    wrong, statuses, metrics, processed = asyncio.run(run())
+    assert wrong == 403
+    assert statuses == [200, 200, 200, 503]
+    assert metrics["unauthorized"] == 1
+    assert metrics["rejected"] == 1
+    assert metrics["max_queue_depth"] == 2
+    assert [text for _, text in processed] == ["2", "3", "4"]
@@ -0,0 +1,115 @@
+"""Tests for the Prometheus-style metrics."""
+
+import asyncio
+
+import pytest
+from sqlalchemy import create_engine, text
+from telegram import CallbackQuery, Update, User
+
+from app.services.metrics import (
+    DB_ERRORS,
+    DB_QUERY_SECONDS,
+    HANDLER_ERRORS,
+    HANDLER_SECONDS,
+    MetricsRegistry,
+    handler_label,
+    instrument_engine,
+    instrument_handler,
+)
+
+
+def callback_update(data: str) -> Update:
+    """Build an update with an inline keyboard press."""
+    user = User(id=1, first_name="User1", is_bot=False)
+    query = CallbackQuery(id="1", from_user=user, chat_instance="1", data=data)
+    return Update(update_id=1, callback_query=query)
+
+
+def test_expose_renders_prometheus_text():
+    """Test the text format of counters, gauges, histograms and collectors."""
+    registry = MetricsRegistry()
+    requests = registry.counter("requests_total", "Requests", ["method"])
+    depth = registry.gauge("queue_depth", "Queued items")
+    latency = registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+    registry.add_collector("component", lambda: {"sent": 3, "ratio": 0.5})
+
+    requests.labels("sendMessage").inc()
+    requests.labels("sendMessage").inc(2)
+    depth.set_function(lambda: 7)
+    for value in (0.05, 0.1, 0.5, 3.0):
+        latency.observe(value)
+
+    lines = registry.expose().splitlines()
+    assert "# TYPE requests_total counter" in lines
+    assert 'requests_total{method="sendMessage"} 3' in lines
+    assert "queue_depth 7" in lines
+    assert 'latency_seconds_bucket{le="0.1"} 2' in lines
+    assert 'latency_seconds_bucket{le="1"} 3' in lines
+    assert 'latency_seconds_bucket{le="+Inf"} 4' in lines
+    assert "latency_seconds_sum 3.65" in lines
+    assert "latency_seconds_count 4" in lines
+    assert "component_sent 3" in lines
+    assert "component_ratio 0.5" in lines
+
+
+def test_duplicate_metric_names_are_rejected():
+    """Test that a name can only be registered once."""
+    registry = MetricsRegistry()
+    registry.counter("events_total", "Events")
+    with pytest.raises(ValueError):
+        registry.gauge("events_total", "Events")
+
+
+def test_handler_label_groups_callbacks_by_kind():
+    """Test that callback labels do not grow with the button data."""
+    assert handler_label("callback", callback_update("preset_25_5")) == (
+        "callback:preset"
+    )
+    assert handler_label("callback", callback_update("preset_50_10")) == (
+        "callback:preset"
+    )
+    assert handler_label("callback", callback_update("skip_break")) == (
+        "callback:skip_break"
+    )
+    assert handler_label("callback", callback_update("anything")) == "callback:other"
+    assert handler_label("/today", Update(update_id=1)) == "/today"
+
+
+def test_instrument_handler_records_latency_and_errors():
+    """Test that wrapped handlers are timed and their errors counted."""
+
+    async def ok(update, context):
+        return "done"
+
+    async def broken(update, context):
+        raise RuntimeError("boom")
+
+    seconds = HANDLER_SECONDS.labels("/test_ok")
+    errors = HANDLER_ERRORS.labels("/test_broken")
+
+    assert asyncio.run(instrument_handler("/test_ok", ok)(None, None)) == "done"
+    with pytest.raises(RuntimeError):
+        asyncio.run(instrument_handler("/test_broken", broken)(None, None))
+
+    assert seconds.count == 1
+    assert errors.value == 1
+    assert HANDLER_SECONDS.labels("/test_broken").count == 1
+
+
+def test_instrument_engine_records_queries_and_errors():
+    """Test that statements on an instrumented engine are timed and counted."""
+    engine = create_engine("sqlite://")
+    instrument_engine(engine)
+    selects = DB_QUERY_SECONDS.labels("SELECT")
+    before = selects.count
+    errors_before = DB_ERRORS.labels().value
+
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+        connection.execute(text("SELECT 2"))
+        with pytest.raises(Exception):
+            connection.execute(text("SELECT * FROM missing_table"))
+        assert not connection.info["query_started"]
+
+    assert selects.count == before + 2
+    assert DB_ERRORS.labels().value == errors_before + 1
@@ -0,0 +1,203 @@
+"""Tests for the database migrations and the query plans they enable."""
+
+import asyncio
+import io
+import os
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+from unittest.mock import patch
+
+from alembic import command
+from alembic.config import Config
+from alembic.script import ScriptDirectory
+from sqlalchemy import create_engine, insert, inspect, select, text
+
+from app.db.models import (
+    Base,
+    PomodoroSession,
+    User,
+    async_engine,
+    engine,
+    init_db,
+)
+from app.db.schema import SCHEMA_VERSION, ensure_schema, get_schema_version
+from app.services.sweeper import stale_sessions_query
+
+ROOT = Path(__file__).parent.parent
+
+SESSION_INDEXES = {
+    "ix_pomodoro_sessions_user_id_start_time",
+    "ix_pomodoro_sessions_open",
+}
+
+
+def alembic_config(url: str, output_buffer=None) -> Config:
+    """Build an Alembic configuration for a database URL."""
+    config = Config(str(ROOT / "alembic.ini"), output_buffer=output_buffer)
+    config.set_main_option("script_location", str(ROOT / "migrations"))
+    config.set_main_option("sqlalchemy.url", url)
+    return config
+
+
+def temp_sqlite_url() -> str:
+    """Get the URL of a new empty SQLite database."""
+    return f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'migrations.sqlite3')}"
+
+
+def index_names(url: str, table: str) -> set:
+    """Get the index names of a table."""
+    migrated = create_engine(url)
+    try:
+        return {index["name"] for index in inspect(migrated).get_indexes(table)}
+    finally:
+        migrated.dispose()
+
+
+def test_upgrade_and_downgrade_fresh_database():
+    """Test that the migrations build the schema and can be reverted."""
+    url = temp_sqlite_url()
+    config = alembic_config(url)
+
+    command.upgrade(config, "head")
+    assert SESSION_INDEXES <= index_names(url, "pomodoro_sessions")
+    assert "ix_users_timezone" in index_names(url, "users")
+    assert "ix_pending_timers_session_id" in index_names(url, "pending_timers")
+
+    command.downgrade(config, "base")
+    migrated = create_engine(url)
+    assert inspect(migrated).get_table_names() == ["alembic_version"]
+    migrated.dispose()
+
+
+def test_upgrade_database_created_by_create_all():
+    """Test that databases built before migrations existed can be upgraded."""
+    url = temp_sqlite_url()
+    existing = create_engine(url)
+    Base.metadata.create_all(bind=existing)
+    existing.dispose()
+
+    command.upgrade(alembic_config(url), "head")
+    assert SESSION_INDEXES <= index_names(url, "pomodoro_sessions")
+
+
+def test_offline_sql_for_postgres():
+    """Test that the migrations render as SQL without a database."""
+    buffer = io.StringIO()
+    config = alembic_config("postgresql://user@localhost/pomodoro", buffer)
+    command.upgrade(config, "head", sql=True)
+    sql = buffer.getvalue()
+    assert "CREATE TABLE IF NOT EXISTS pomodoro_sessions" in sql
+    assert (
+        "CREATE INDEX IF NOT EXISTS ix_pomodoro_sessions_open "
+        "ON pomodoro_sessions (id) WHERE end_time IS NULL"
+    ) in sql
+
+
+def test_schema_version_is_migrations_head():
+    """Test that SCHEMA_VERSION is bumped with every migration."""
+    script = ScriptDirectory.from_config(alembic_config(temp_sqlite_url()))
+    assert script.get_current_head() == SCHEMA_VERSION
+
+
+def test_ensure_schema_migrates_only_when_version_changes():
+    """Test that an up-to-date database is not migrated again."""
+
+    async def run():
+        try:
+            await ensure_schema()
+            assert await get_schema_version() == SCHEMA_VERSION
+            return await ensure_schema()
+        finally:
+            await async_engine.dispose()
+
+    assert asyncio.run(run()) is False
+
+
+def test_ensure_schema_skips_migrations_another_worker_applied():
+    """Test that the version is checked again once the lock is held."""
+    versions = iter(["0001", SCHEMA_VERSION])
+
+    async def run():
+        try:
+            return await ensure_schema()
+        finally:
+            await async_engine.dispose()
+
+    with (
+        patch("app.db.schema.get_schema_version", side_effect=lambda: next(versions)),
+        patch("app.db.schema.upgrade_schema") as upgrade,
+    ):
+        assert asyncio.run(run()) is False
+    upgrade.assert_not_called()
+
+
+def query_plan(statement, bind=None) -> str:
+    """Get the query plan of a statement, by default on the test database."""
+    bind = bind or engine
+    compiled = statement.compile(bind, compile_kwargs={"literal_binds": True})
+    with bind.connect() as connection:
+        if bind.dialect.name == "sqlite":
+            rows = connection.execute(text(f"EXPLAIN QUERY PLAN {compiled}"))
+            return "\n".join(str(row[-1]) for row in rows)
+        # Tiny test tables would otherwise always be scanned
+        connection.execute(text("SET enable_seqscan = off"))
+        rows = connection.execute(text(f"EXPLAIN {compiled}"))
+        return "\n".join(row[0] for row in rows)
+
+
+def test_sweeper_query_uses_indexes():
+    """Test that the stale session sweep pages open sessions by index."""
+    # Statistics of a database of its own, so other plan tests keep theirs
+    analyzed = create_engine(temp_sqlite_url())
+    Base.metadata.create_all(analyzed)
+    timezones = ["UTC", "Europe/Moscow", "Asia/Tokyo", "America/New_York"]
+    started = datetime(2024, 1, 1)
+    with analyzed.begin() as connection:
+        connection.execute(
+            insert(User),
+            [
+                {"telegram_id": index, "first_name": "Plan", "timezone": timezone}
+                for index, timezone in enumerate(timezones * 50, start=1)
+            ],
+        )
+        # One session in fifty is still open
+        connection.execute(
+            insert(PomodoroSession),
+            [
+                {
+                    "user_id": 1 + index % 200,
+                    "start_time": started + timedelta(minutes=index),
+                    "end_time": (
+                        None
+                        if index % 50 == 0
+                        else started + timedelta(minutes=index + 25)
+                    ),
+                }
+                for index in range(20_000)
+            ],
+        )
+        connection.execute(text("ANALYZE"))
+
+    plan = query_plan(
+        stale_sessions_query("UTC", datetime(2024, 2, 1), 0, 500), analyzed
+    )
+    analyzed.dispose()
+    assert "ix_pomodoro_sessions_open" in plan
+    # Pages come out of the index in ID order
+    assert "TEMP B-TREE" not in plan
+    assert "ix_users_timezone" in plan
+    assert "ix_pending_timers_session_id" in plan
+
+
+def test_user_session_range_query_uses_index():
+    """Test that a user's sessions in a time range are found by index."""
+    init_db()
+    plan = query_plan(
+        select(PomodoroSession.id).where(
+            PomodoroSession.user_id == 1,
+            PomodoroSession.start_time >= datetime(2024, 1, 1),
+            PomodoroSession.start_time < datetime(2024, 1, 2),
+        )
+    )
+    assert "ix_pomodoro_sessions_user_id_start_time" in plan
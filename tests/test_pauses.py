@@ -0,0 +1,133 @@
+"""Tests for pausing and resuming timers."""
+
+import asyncio
+import time
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+from app.db.models import PendingTimer, async_engine, get_async_session, init_db
+from app.services.scheduler import WORK_PHASE, TimerRecord
+from app.services.timer import TimerService
+
+
+def private_update(user_id: int) -> SimpleNamespace:
+    """Build a stand-in for an update from a private chat."""
+    return SimpleNamespace(
+        effective_user=SimpleNamespace(id=user_id),
+        effective_chat=SimpleNamespace(id=user_id, type="private"),
+        effective_message=SimpleNamespace(reply_text=AsyncMock()),
+    )
+
+
+async def arm(service: TimerService, user_id: int, seconds: float) -> TimerRecord:
+    """Persist and arm a work timer as start_timer does."""
+    record = TimerRecord(
+        deadline=time.time() + seconds,
+        user_id=user_id,
+        chat_id=user_id,
+        phase=WORK_PHASE,
+        break_minutes=5,
+    )
+    async with get_async_session() as session:
+        await service._save_pending(session, record)
+        await session.commit()
+    service.timers.schedule(record)
+    return record
+
+
+async def load_pending(user_id: int) -> PendingTimer:
+    """Read a user's persisted timer row."""
+    async with get_async_session() as session:
+        return await session.get(PendingTimer, user_id)
+
+
+def test_pause_status_and_resume_answer_without_the_database():
+    """Test that commands use the in-memory timers and only the flush writes."""
+    init_db()
+    service = TimerService()
+    update = private_update(9101)
+
+    async def run():
+        record = await arm(service, 9101, 600)
+        with (
+            patch("app.services.timer.get_async_session", side_effect=AssertionError),
+            patch("app.services.pauses.get_async_session", side_effect=AssertionError),
+        ):
+            await service.pause_timer(update)
+            await service.send_status(update)
+            await service.pause_timer(update)
+        await service.pauses.flush()
+        paused = await load_pending(9101)
+        await service.resume_timer(update)
+        await service.pauses.flush()
+        resumed = await load_pending(9101)
+        await async_engine.dispose()
+        return record, paused, resumed
+
+    record, paused, resumed = asyncio.run(run())
+    replies = [call.args[0] for call in update.effective_message.reply_text.mock_calls]
+    assert replies[0].startswith("⏸ Пауза. До конца работы осталось")
+    assert replies[1].startswith("⏸ На паузе")
+    assert replies[2].startswith("⏸ Таймер уже на паузе")
+    assert replies[3].startswith("▶️ Продолжаем!")
+
+    assert 590 < paused.remaining_seconds <= 600
+    assert paused.deadline == datetime.utcfromtimestamp(record.deadline)
+    assert resumed.remaining_seconds is None
+    armed = service.timers.get(9101)
+    assert armed.deadline > record.deadline
+    assert resumed.deadline == datetime.utcfromtimestamp(armed.deadline)
+
+
+def test_pauses_between_flushes_are_written_once():
+    """Test that pausing and resuming repeatedly costs a single write."""
+    init_db()
+    service = TimerService()
+    update = private_update(9102)
+
+    async def run():
+        await arm(service, 9102, 600)
+        for _ in range(3):
+            await service.pause_timer(update)
+            await service.resume_timer(update)
+        await service.pause_timer(update)
+        await service.pauses.flush()
+        pending = await load_pending(9102)
+        await async_engine.dispose()
+        return pending
+
+    pending = asyncio.run(run())
+    metrics = service.pauses.metrics
+    assert metrics["flushes"] == 1
+    assert metrics["flushed_changes"] == 1
+    assert metrics["coalesced_changes"] == 6
+    assert pending.remaining_seconds is not None
+    assert 9102 in service.paused
+    assert service.timers.get(9102) is None
+
+
+def test_paused_timers_are_restored_paused_and_never_fire():
+    """Test that a paused row survives a restart and cannot be claimed."""
+    init_db()
+    old, new = TimerService(), TimerService()
+    update = private_update(9103)
+
+    async def run():
+        record = await arm(old, 9103, -1)
+        await old.pause_timer(update)
+        await old.pauses.stop()
+        await new.restore_timers()
+        async with get_async_session() as session:
+            claimed = await new._claim(session, [record])
+            await session.commit()
+        await new.send_status(update)
+        await async_engine.dispose()
+        return claimed
+
+    claimed = asyncio.run(run())
+    assert claimed == set()
+    assert new.timers.get(9103) is None
+    assert new.paused[9103].remaining == 0
+    reply = update.effective_message.reply_text.call_args.args[0]
+    assert reply.startswith("⏸ На паузе: до конца работы осталось 0:00")
@@ -0,0 +1,130 @@
+"""Tests for the database-backed user_data persistence."""
+
+import asyncio
+
+from sqlalchemy import event
+
+from app.db.models import async_engine, init_db
+from app.services.persistence import DatabasePersistence
+
+
+def run(coroutine):
+    """Run a coroutine and release the engine's connections afterwards."""
+
+    async def wrapper():
+        try:
+            return await coroutine
+        finally:
+            await async_engine.dispose()
+
+    return asyncio.run(wrapper())
+
+
+def test_user_data_survives_a_restart():
+    """Test that a new process sees the session of the last round."""
+    init_db()
+
+    async def scenario():
+        before = DatabasePersistence()
+        user_data = {}
+        await before.refresh_user_data(9001, user_data)
+        user_data["session_id"] = 42
+        await before.update_user_data(9001, user_data)
+
+        after = DatabasePersistence()
+        assert await after.get_user_data() == {}
+        restored = {}
+        await after.refresh_user_data(9001, restored)
+        return restored
+
+    assert run(scenario()) == {"session_id": 42}
+
+
+def test_only_changed_keys_are_written():
+    """Test that unchanged data costs no writes and removed keys are deleted."""
+    init_db()
+    persistence = DatabasePersistence()
+
+    async def scenario():
+        await persistence.refresh_user_data(9002, {})
+        await persistence.update_user_data(9002, {"session_id": 1, "preset": "25/5"})
+        assert persistence.rows_written == 2
+
+        await persistence.update_user_data(9002, {"session_id": 1, "preset": "25/5"})
+        assert persistence.rows_written == 2
+        assert persistence.unchanged_owners == 1
+
+        await persistence.update_user_data(9002, {"session_id": 2})
+        assert persistence.rows_written == 3
+        assert persistence.rows_deleted == 1
+
+        restored = {}
+        await DatabasePersistence().refresh_user_data(9002, restored)
+        return restored
+
+    assert run(scenario()) == {"session_id": 2}
+
+
+def test_owners_handed_over_together_are_written_in_one_flush():
+    """Test that a persistence run costs one transaction, not one per user."""
+    init_db()
+    persistence = DatabasePersistence()
+
+    async def scenario():
+        await asyncio.gather(
+            *(
+                persistence.update_user_data(user_id, {"session_id": user_id})
+                for user_id in range(10_000, 10_050)
+            )
+        )
+
+    run(scenario())
+    assert persistence.flushes == 1
+    assert persistence.rows_written == 50
+
+
+def test_drop_user_data():
+    """Test that dropped users lose all their keys."""
+    init_db()
+
+    async def scenario():
+        persistence = DatabasePersistence()
+        await persistence.update_user_data(9003, {"session_id": 3})
+        await persistence.drop_user_data(9003)
+        restored = {}
+        await DatabasePersistence().refresh_user_data(9003, restored)
+        return restored
+
+    assert run(scenario()) == {}
+
+
+def test_large_flushes_stay_within_the_sqlite_parameter_limit():
+    """Test that a flush of many keys is split into statements of <= 999 params."""
+    init_db()
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement.split()[0], len(parameters)))
+
+    async def scenario():
+        persistence = DatabasePersistence()
+        data = {f"key{number}": number for number in range(1200)}
+        await persistence.update_user_data(9004, data)
+        await persistence.update_user_data(9004, {})
+        written = persistence.rows_written
+        restored = {}
+        await DatabasePersistence().refresh_user_data(9004, restored)
+        return written, persistence.rows_deleted, restored
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", record)
+    try:
+        written, deleted, restored = run(scenario())
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", record)
+    assert (written, deleted, restored) == (1200, 1200, {})
+    inserts = [count for kind, count in statements if kind == "INSERT"]
+    deletes = [count for kind, count in statements if kind == "DELETE"]
+    # 199 five-column rows per INSERT, 997 keys per DELETE
+    assert len(inserts) == 7
+    assert len(deletes) == 2
+    assert max(inserts + deletes) <= 999
@@ -0,0 +1,185 @@
+"""Tests for the Pomodoro timer scheduler."""
+
+import asyncio
+import time
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+from app.db.models import async_engine, get_async_session, init_db
+from app.services.scheduler import (
+    BREAK_PHASE,
+    WORK_PHASE,
+    TimerRecord,
+    TimerScheduler,
+)
+from app.services.timer import MAX_DRIFT_CORRECTION_SECONDS, TimerService
+
+
+def make_record(user_id: int, deadline: float, phase: str = WORK_PHASE):
+    """Create a timer record for a test user."""
+    return TimerRecord(deadline=deadline, user_id=user_id, chat_id=user_id, phase=phase)
+
+
+def test_pop_due_returns_records_in_deadline_order():
+    """Test that due records are popped earliest first."""
+    scheduler = TimerScheduler()
+    scheduler.schedule(make_record(1, 30.0))
+    scheduler.schedule(make_record(2, 10.0))
+    scheduler.schedule(make_record(3, 20.0))
+
+    due = scheduler.pop_due(25.0)
+    assert [r.user_id for r in due] == [2, 3]
+    assert len(scheduler) == 1
+
+
+def test_schedule_replaces_and_cancel_removes():
+    """Test that replaced and cancelled records never fire."""
+    scheduler = TimerScheduler()
+    scheduler.schedule(make_record(1, 10.0))
+    scheduler.schedule(make_record(1, 50.0, BREAK_PHASE))
+    scheduler.schedule(make_record(2, 10.0))
+    scheduler.cancel(2)
+
+    assert scheduler.pop_due(20.0) == []
+    due = scheduler.pop_due(60.0)
+    assert [(r.user_id, r.phase) for r in due] == [(1, BREAK_PHASE)]
+
+
+def test_pop_due_respects_batch_size():
+    """Test that a single batch never exceeds the batch size."""
+    scheduler = TimerScheduler(batch_size=2)
+    for user_id in range(5):
+        scheduler.schedule(make_record(user_id, 1.0))
+
+    assert len(scheduler.pop_due(2.0)) == 2
+    assert len(scheduler) == 3
+
+
+def test_run_fires_due_records_in_batches():
+    """Test that the firing loop delivers every record to the handler."""
+    batches = []
+
+    async def handler(records):
+        batches.append([r.user_id for r in records])
+
+    async def run():
+        scheduler = TimerScheduler()
+        scheduler.start(handler)
+        now = time.time()
+        for user_id in range(3):
+            scheduler.schedule(make_record(user_id, now + 0.05))
+        await asyncio.sleep(0.2)
+        await scheduler.stop()
+
+    asyncio.run(run())
+    assert sorted(u for batch in batches for u in batch) == [0, 1, 2]
+
+
+def test_stop_finishes_the_batch_being_fired():
+    """Test that stopping waits for the handler instead of cancelling it."""
+    handled = []
+
+    async def handler(batch):
+        await asyncio.sleep(0.05)
+        handled.extend(record.user_id for record in batch)
+
+    async def run():
+        scheduler = TimerScheduler()
+        scheduler.schedule(make_record(1, time.time()))
+        scheduler.schedule(make_record(2, time.time() + 60))
+        scheduler.start(handler)
+        await asyncio.sleep(0.01)
+        await scheduler.stop()
+        return scheduler
+
+    scheduler = asyncio.run(run())
+    assert handled == [1]
+    # Records not yet due are kept for the next process
+    assert 2 in scheduler
+
+
+def test_heap_is_compacted_when_stale_records_dominate():
+    """Test that restarting timers does not grow the heap without bound."""
+    scheduler = TimerScheduler()
+    for restart in range(5):
+        for user_id in range(1000):
+            scheduler.schedule(make_record(user_id, 100.0 + restart))
+
+    assert len(scheduler) == 1000
+    assert len(scheduler._heap) <= 3000
+    due = scheduler.pop_due(200.0) + scheduler.pop_due(200.0)
+    assert sorted(r.user_id for r in due) == list(range(1000))
+    assert all(r.deadline == 104.0 for r in due)
+    assert scheduler.pop_due(200.0) == []
+
+
+def test_deadlines_within_the_window_share_a_wake_up():
+    """Test that close deadlines are coalesced and distant ones are not."""
+    batches = []
+
+    async def handler(records):
+        batches.append([r.user_id for r in records])
+
+    async def run():
+        scheduler = TimerScheduler(coalesce_window=0.25)
+        now = time.time()
+        scheduler.schedule(make_record(1, now + 0.05))
+        scheduler.schedule(make_record(2, now + 0.2))
+        scheduler.schedule(make_record(3, now + 0.6))
+        scheduler.start(handler)
+        await asyncio.sleep(0.8)
+        await scheduler.stop()
+        return scheduler
+
+    scheduler = asyncio.run(run())
+    assert batches == [[1, 2], [3]]
+    assert scheduler.metrics["fired"] == 3
+    assert scheduler.metrics["fired_early"] == 1
+
+
+def test_wall_clock_jump_is_noticed_within_max_sleep():
+    """Test that a suspend or clock step does not leave a due timer asleep."""
+    fired = []
+    offset = SimpleNamespace(seconds=0.0)
+    clock = SimpleNamespace(time=lambda: time.time() + offset.seconds)
+
+    async def handler(records):
+        fired.extend(r.user_id for r in records)
+
+    async def run():
+        scheduler = TimerScheduler(max_sleep=0.05)
+        scheduler.schedule(make_record(1, time.time() + 60))
+        scheduler.start(handler)
+        await asyncio.sleep(0.05)
+        # The monotonic sleep goes on for a minute, the deadline has passed
+        offset.seconds = 60
+        await asyncio.sleep(0.2)
+        await scheduler.stop()
+
+    with patch("app.services.scheduler.time", clock):
+        asyncio.run(run())
+    assert fired == [1]
+
+
+def test_break_starts_at_the_deadline_of_a_slightly_late_work_period():
+    """Test that firing drift is not carried over to the break timer."""
+    init_db()
+    service = TimerService()
+    service.dispatcher = MagicMock()
+    now = time.time()
+    slightly_late = TimerRecord(now - 1, 901, 901, WORK_PHASE, break_minutes=5)
+    long_overdue = TimerRecord(
+        now - MAX_DRIFT_CORRECTION_SECONDS - 60, 902, 902, WORK_PHASE, break_minutes=5
+    )
+
+    async def run():
+        async with get_async_session() as session:
+            await service._save_pending(session, slightly_late)
+            await service._save_pending(session, long_overdue)
+            await session.commit()
+        await service._fire_batch([slightly_late, long_overdue])
+        await async_engine.dispose()
+
+    asyncio.run(run())
+    assert service.timers.get(901).deadline == slightly_late.deadline + 5 * 60
+    assert service.timers.get(902).deadline >= now + 5 * 60
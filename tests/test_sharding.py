@@ -0,0 +1,131 @@
+"""Tests for timer sharding between workers."""
+
+import asyncio
+from datetime import datetime, timedelta
+
+from sqlalchemy import update
+
+from app.db.models import (
+    PendingTimer,
+    ShardLease,
+    WorkerHeartbeat,
+    async_engine,
+    get_async_session,
+    init_db,
+)
+from app.services.scheduler import BREAK_PHASE, WORK_PHASE, TimerRecord
+from app.services.sharding import ShardCoordinator, preferred_owner, shard_for_user
+from app.services.timer import TimerService
+
+
+def test_shard_for_user_is_stable_and_in_range():
+    """Test that users map to the same shard every time."""
+    shards = [shard_for_user(user_id, 16) for user_id in range(1000)]
+    assert shards == [shard_for_user(user_id, 16) for user_id in range(1000)]
+    assert set(shards) == set(range(16))
+    assert shard_for_user(12345, 0) == 0
+
+
+def test_preferred_owner_moves_only_the_leaving_workers_shards():
+    """Test that removing a worker keeps the other assignments."""
+    before = {shard: preferred_owner(shard, ["a", "b", "c"]) for shard in range(64)}
+    after = {shard: preferred_owner(shard, ["a", "b"]) for shard in range(64)}
+    for shard, owner in before.items():
+        if owner != "c":
+            assert after[shard] == owner
+
+
+def test_workers_split_shards_and_take_over_expired_leases():
+    """Test lease claiming, rebalancing and takeover after a worker dies."""
+    init_db()
+    events = []
+
+    def coordinator(worker_id):
+        async def acquired(shards):
+            events.append((worker_id, "acquire", len(shards)))
+
+        async def released(shards):
+            events.append((worker_id, "release", len(shards)))
+
+        return ShardCoordinator(worker_id, 8, 30, acquired, released)
+
+    async def run():
+        first, second = coordinator("w1"), coordinator("w2")
+        await first.heartbeat()
+        assert first.owned == set(range(8))
+
+        # The second worker joins: the first hands over its share
+        await second.heartbeat()
+        await first.heartbeat()
+        await second.heartbeat()
+        assert first.owned | second.owned == set(range(8))
+        assert not first.owned & second.owned
+        assert second.owned
+
+        # The first worker dies without releasing its leases
+        expired = datetime.utcnow() - timedelta(seconds=1)
+        async with get_async_session() as session:
+            await session.execute(
+                update(ShardLease)
+                .where(ShardLease.owner == "w1")
+                .values(expires_at=expired)
+            )
+            await session.execute(
+                update(WorkerHeartbeat)
+                .where(WorkerHeartbeat.worker_id == "w1")
+                .values(expires_at=expired)
+            )
+            await session.commit()
+        await second.heartbeat()
+        assert second.owned == set(range(8))
+
+        await second.release_all()
+        assert not second.owned
+        await async_engine.dispose()
+
+    asyncio.run(run())
+    assert [kind for worker, kind, _ in events if worker == "w1"] == [
+        "acquire",
+        "release",
+    ]
+    assert [kind for worker, kind, _ in events if worker == "w2"] == [
+        "acquire",
+        "acquire",
+        "release",
+    ]
+
+
+def test_expired_timer_is_claimed_once():
+    """Test that only one worker can fire the same persisted timer."""
+    init_db()
+    deadline = datetime.utcnow().replace(microsecond=250_000)
+    record = TimerRecord(
+        deadline=(deadline - datetime(1970, 1, 1)).total_seconds(),
+        user_id=777,
+        chat_id=777,
+        phase=WORK_PHASE,
+    )
+    first, second = TimerService(), TimerService()
+
+    async def claim(service, claimed_record):
+        async with get_async_session() as session:
+            claimed = await service._claim(session, [claimed_record])
+            await session.commit()
+        return claimed
+
+    async def run():
+        async with get_async_session() as session:
+            await first._save_pending(session, record)
+            await session.commit()
+
+        # A stale record of the same user does not match the persisted row
+        stale = TimerRecord(record.deadline, 777, 777, BREAK_PHASE)
+        assert await claim(second, stale) == set()
+
+        assert await claim(first, record) == {777}
+        assert await claim(second, record) == set()
+        async with get_async_session() as session:
+            assert await session.get(PendingTimer, 777) is None
+        await async_engine.dispose()
+
+    asyncio.run(run())
@@ -0,0 +1,72 @@
+"""Tests for the startup timing and webhook checks."""
+
+import asyncio
+from types import SimpleNamespace
+
+from app.bot import ALLOWED_UPDATES, ensure_webhook
+from app.startup import StartupTimer
+
+WEBHOOK_URL = "https://example.com/webhook"
+
+
+class FakeBot:
+    """Bot stand-in recording setWebhook calls."""
+
+    def __init__(self, url: str, last_error_message=None):
+        """Initialize the FakeBot.
+
+        Args:
+            url: URL returned by getWebhookInfo
+            last_error_message: Last delivery error returned by getWebhookInfo
+        """
+        self.info = SimpleNamespace(
+            url=url,
+            last_error_message=last_error_message,
+            allowed_updates=list(ALLOWED_UPDATES),
+        )
+        self.set_calls = []
+
+    async def get_webhook_info(self):
+        """Return the current webhook info."""
+        return self.info
+
+    async def set_webhook(self, **kwargs):
+        """Record a setWebhook call."""
+        self.set_calls.append(kwargs)
+        return True
+
+
+def test_startup_timer_breakdown():
+    """Test that phases are summed and reported with the total."""
+    timer = StartupTimer()
+    with timer.phase("imports"):
+        pass
+    with timer.phase("schema"):
+        pass
+    with timer.phase("schema"):
+        pass
+
+    breakdown = timer.finish()
+    assert list(timer.phases) == ["imports", "schema"]
+    assert breakdown.startswith("imports ")
+    assert breakdown.endswith(f"total {timer.total:.2f}s")
+    assert timer.total >= sum(timer.phases.values())
+
+
+def test_ensure_webhook_skips_matching_webhook():
+    """Test that an unchanged webhook is not set again."""
+    bot = FakeBot(WEBHOOK_URL)
+    assert asyncio.run(ensure_webhook(bot, WEBHOOK_URL)) is False
+    assert bot.set_calls == []
+
+
+def test_ensure_webhook_sets_changed_or_failing_webhook():
+    """Test that a different URL or a failing delivery resets the webhook."""
+    bot = FakeBot("https://old.example.com/webhook")
+    assert asyncio.run(ensure_webhook(bot, WEBHOOK_URL)) is True
+    assert bot.set_calls[0]["url"] == WEBHOOK_URL
+    # Queued updates are kept
+    assert "drop_pending_updates" not in bot.set_calls[0]
+
+    bot = FakeBot(WEBHOOK_URL, last_error_message="Connection refused")
+    assert asyncio.run(ensure_webhook(bot, WEBHOOK_URL)) is True
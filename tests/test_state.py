@@ -0,0 +1,168 @@
+"""Tests for the shared state stores and their use by the timer service."""
+
+import asyncio
+import os
+import time
+from datetime import datetime
+from unittest.mock import patch
+
+import pytest
+
+from app.db.models import (
+    PomodoroSession,
+    User,
+    async_engine,
+    get_async_session,
+    init_db,
+)
+from app.services.scheduler import BREAK_PHASE, WORK_PHASE, TimerRecord
+from app.services.state import (
+    MemoryStateStore,
+    RedisStateStore,
+    SharedRateLimit,
+    create_state_store,
+)
+from app.services.timer import TimerService, _today_key, _today_version_key
+
+STORES = ["memory"]
+if os.getenv("REDIS_URL"):
+    STORES.append("redis")
+
+
+def make_store(kind: str):
+    """Create an empty store of the given kind."""
+    if kind == "memory":
+        return MemoryStateStore()
+    return RedisStateStore(os.environ["REDIS_URL"], prefix=f"test:{time.time()}:")
+
+
+@pytest.mark.parametrize("kind", STORES)
+def test_counters_increment_only_existing_keys_when_asked(kind):
+    """Test INCRBY semantics, existing_only and set-if-absent."""
+
+    async def run():
+        store = make_store(kind)
+        created = await store.incr_many({"a": 1, "b": 2}, ttl=60)
+        existing = await store.incr_many({"a": 1, "c": 5}, existing_only=True)
+        first = await store.set_counter_if_absent("c", 3, ttl=60)
+        second = await store.set_counter_if_absent("c", 7, ttl=60)
+        values = await store.get_counters(["a", "b", "c", "d"])
+        await store.close()
+        return created, existing, first, second, values
+
+    created, existing, first, second, values = asyncio.run(run())
+    assert created == {"a": 1, "b": 2}
+    assert existing == {"a": 2, "c": None}
+    assert (first, second) == (3, 3)
+    assert values == {"a": 2, "b": 2, "c": 3, "d": None}
+
+
+def test_memory_counters_expire():
+    """Test that counters past their TTL read as missing."""
+
+    async def run():
+        store = MemoryStateStore()
+        await store.incr_many({"gone": 1}, ttl=-1)
+        await store.set_counter_if_absent("kept", 1)
+        return await store.get_counters(["gone", "kept"])
+
+    assert asyncio.run(run()) == {"gone": None, "kept": 1}
+
+
+def test_shared_rate_limit_allows_rate_calls_per_second():
+    """Test that calls past the rate wait for the next window."""
+
+    async def run():
+        limit = SharedRateLimit(MemoryStateStore(), rate=3)
+        waits = [await limit.take(now=100.25) for _ in range(4)]
+        return waits + [await limit.take(now=101.0)]
+
+    assert asyncio.run(run()) == [0.0, 0.0, 0.0, 0.75, 0.0]
+
+
+def test_create_state_store_rejects_unknown_urls():
+    """Test the store picked for each URL scheme."""
+    assert isinstance(create_state_store("memory://"), MemoryStateStore)
+    with pytest.raises(ValueError):
+        create_state_store("memcached://localhost")
+
+
+async def add_due_timer(service: TimerService, telegram_id: int):
+    """Add a user with a work timer that is already due."""
+    async with get_async_session() as session:
+        user = User(telegram_id=telegram_id, timezone="UTC")
+        session.add(user)
+        await session.flush()
+        pomodoro = PomodoroSession(user_id=user.id, work_minutes=25, break_minutes=5)
+        session.add(pomodoro)
+        await session.commit()
+        user_id, session_id = user.id, pomodoro.id
+
+    record = TimerRecord(
+        deadline=time.time() - 1,
+        user_id=telegram_id,
+        chat_id=telegram_id,
+        phase=WORK_PHASE,
+        session_id=session_id,
+        break_minutes=5,
+    )
+    async with get_async_session() as session:
+        await service._save_pending(session, record)
+        await session.commit()
+    return user_id, record
+
+
+def test_timer_service_keeps_daily_counts_in_the_store():
+    """Test today's count cached in the store and invalidated by completions."""
+    init_db()
+    service = TimerService()
+    telegram_id = 5151
+
+    async def run():
+        user_id, record = await add_due_timer(service, telegram_id)
+        today = datetime.utcnow().date()
+
+        # Read from the database, then kept in the store
+        before = await service.get_today_count(telegram_id)
+        cached = await service.state.get_counters([_today_key(user_id, today, 0)])
+        await service._fire_batch([record])
+        # The flush behind the next read bumps the day's version
+        after = await service.get_today_count(telegram_id)
+        versions = await service.state.get_counters(
+            [_today_version_key(user_id, today)]
+        )
+        # A count read before that flush and stored late is never read back
+        await service.state.set_counter_if_absent(_today_key(user_id, today, 0), 0)
+        again = await service.get_today_count(telegram_id)
+        await async_engine.dispose()
+        return before, cached, after, versions, again
+
+    before, cached, after, versions, again = asyncio.run(run())
+    assert service.timers.get(telegram_id).phase == BREAK_PHASE
+    assert before == 0
+    assert list(cached.values()) == [0]
+    assert after == 1
+    assert list(versions.values()) == [1]
+    assert again == 1
+
+
+def test_timer_service_skips_a_local_count_cache_when_sharded():
+    """Test that a per-process store does not cache counts other shards change."""
+    init_db()
+    with patch("app.services.timer.config.SHARD_COUNT", 2):
+        service = TimerService()
+    telegram_id = 5252
+
+    async def run():
+        _, record = await add_due_timer(service, telegram_id)
+        before = await service.get_today_count(telegram_id)
+        service.completions.add_completion(record.session_id)
+        after = await service.get_today_count(telegram_id)
+        await async_engine.dispose()
+        return before, after
+
+    before, after = asyncio.run(run())
+    assert not service.cache_today
+    assert service.completions.on_flush is None
+    assert (before, after) == (0, 1)
+    assert not service.state._counters
@@ -0,0 +1,162 @@
+"""Tests for the Pomodoro statistics helpers."""
+
+import asyncio
+from datetime import date, datetime
+
+from app.db.models import (
+    DailyStats,
+    HourlyStats,
+    PomodoroSession,
+    User,
+    WeeklyStats,
+    async_engine,
+    get_async_session,
+    get_db_session,
+    init_db,
+)
+from app.services.stats import (
+    PeriodSummary,
+    RollupIncrements,
+    backfill_daily_stats,
+    daily_stats_upsert,
+    get_period_summary,
+    get_streaks,
+    local_date,
+)
+from app.services.timer import TimerService
+
+
+def test_local_date_follows_user_timezone():
+    """Test that the day boundary follows the user's timezone."""
+    moment = datetime(2024, 3, 1, 22, 30)
+    assert local_date("UTC", moment) == date(2024, 3, 1)
+    assert local_date("Europe/Moscow", moment) == date(2024, 3, 2)
+    assert local_date("Not/AZone", moment) == date(2024, 3, 1)
+
+
+def test_daily_stats_upsert_accumulates():
+    """Test that repeated upserts add to the same daily row."""
+    init_db()
+    for session in get_db_session():
+        user = User(telegram_id=3001, first_name="Stats")
+        session.add(user)
+        session.commit()
+        user_id = user.id
+
+    async def run():
+        today = local_date("UTC", datetime.utcnow())
+        async with get_async_session() as session:
+            dialect = session.bind.dialect.name
+            await session.execute(
+                daily_stats_upsert(dialect, {(user_id, today): (1, 25)})
+            )
+            await session.execute(
+                daily_stats_upsert(dialect, {(user_id, today): (2, 50)})
+            )
+            await session.commit()
+            stats = await session.get(DailyStats, (user_id, today))
+        count = await TimerService().get_today_count(3001)
+        await async_engine.dispose()
+        return stats.completed, stats.focus_minutes, count
+
+    assert asyncio.run(run()) == (3, 75, 3)
+
+
+def test_backfill_daily_stats_groups_sessions_by_local_day():
+    """Test that the backfill sums completed sessions per local day."""
+    init_db()
+    for session in get_db_session():
+        user = User(telegram_id=3002, first_name="Backfill", timezone="Asia/Tokyo")
+        session.add(user)
+        session.flush()
+        session.add_all(
+            [
+                PomodoroSession(
+                    user_id=user.id,
+                    work_minutes=25,
+                    break_minutes=5,
+                    start_time=datetime(2024, 5, 1, 10, 0),
+                    completed=2,
+                ),
+                # 16:00 UTC is already May 2nd in Tokyo
+                PomodoroSession(
+                    user_id=user.id,
+                    work_minutes=50,
+                    break_minutes=10,
+                    start_time=datetime(2024, 5, 1, 16, 0),
+                    completed=1,
+                ),
+            ]
+        )
+        session.commit()
+
+        backfill_daily_stats(session)
+        first = session.get(DailyStats, (user.id, date(2024, 5, 1)))
+        second = session.get(DailyStats, (user.id, date(2024, 5, 2)))
+        assert (first.completed, first.focus_minutes) == (2, 50)
+        assert (second.completed, second.focus_minutes) == (1, 50)
+        hourly = session.get(HourlyStats, (user.id, date(2024, 5, 2), 1))
+        weekly = session.get(WeeklyStats, (user.id, date(2024, 4, 29)))
+        assert (hourly.completed, hourly.focus_minutes) == (1, 50)
+        assert (weekly.completed, weekly.focus_minutes) == (3, 100)
+
+
+def test_rollups_follow_local_hour_and_week():
+    """Test that one completion is counted in its local hour, day and week."""
+    rollups = RollupIncrements()
+    # Sunday 23:30 UTC is Monday 02:30 in Moscow
+    rollups.add(7, "Europe/Moscow", datetime(2024, 3, 3, 23, 30), 25)
+    rollups.add(7, "Europe/Moscow", datetime(2024, 3, 4, 0, 10), 50, completed=2)
+    assert rollups.hourly == {
+        (7, date(2024, 3, 4), 2): (1, 25),
+        (7, date(2024, 3, 4), 3): (2, 100),
+    }
+    assert rollups.daily == {(7, date(2024, 3, 4)): (3, 125)}
+    assert rollups.weekly == {(7, date(2024, 3, 4)): (3, 125)}
+
+
+def test_period_summary_reads_rollups():
+    """Test weekly totals, best hour and streaks computed from the rollups."""
+    init_db()
+    for session in get_db_session():
+        user = User(telegram_id=3003, first_name="Summary")
+        session.add(user)
+        session.commit()
+        user_id = user.id
+
+    rollups = RollupIncrements()
+    # A run from Sunday to Tuesday, after a two day run the week before
+    for day in (2, 3, 7, 8, 9):
+        rollups.add(user_id, "UTC", datetime(2024, 4, day, 9, 0), 25)
+    rollups.add(user_id, "UTC", datetime(2024, 4, 9, 14, 0), 25)
+    rollups.add(user_id, "UTC", datetime(2024, 4, 8, 14, 0), 25)
+    rollups.add(user_id, "UTC", datetime(2024, 4, 9, 14, 30), 25)
+
+    async def run():
+        async with get_async_session() as session:
+            for statement in rollups.upserts(session.bind.dialect.name):
+                await session.execute(statement)
+            await session.commit()
+            today = date(2024, 4, 10)
+            week = await get_period_summary(
+                session, user_id, date(2024, 4, 8), date(2024, 4, 14), today
+            )
+            month = await get_period_summary(
+                session, user_id, date(2024, 4, 1), date(2024, 4, 30), today
+            )
+            later = await get_streaks(session, user_id, date(2024, 4, 12))
+        await async_engine.dispose()
+        return week, month, later
+
+    week, month, later = asyncio.run(run())
+    assert week == PeriodSummary(
+        completed=5,
+        focus_minutes=125,
+        active_days=2,
+        best_hour=14,
+        current_streak=3,
+        longest_streak=3,
+    )
+    assert (month.completed, month.active_days, month.best_hour) == (8, 5, 9)
+    # The run is broken once a whole day passes without a pomodoro
+    assert later == (0, 3)
@@ -0,0 +1,96 @@
+"""Tests for the stale session sweeper."""
+
+import asyncio
+from datetime import datetime
+
+from app.db.models import (
+    PendingTimer,
+    PomodoroSession,
+    User,
+    async_engine,
+    get_db_session,
+    init_db,
+)
+from app.services.sweeper import SessionSweeper
+
+
+def create_sessions(telegram_id: int, timezone: str, start_times: list) -> list:
+    """Create a user with open sessions started at the given times."""
+    init_db()
+    for session in get_db_session():
+        user = User(telegram_id=telegram_id, first_name="Sweep", timezone=timezone)
+        session.add(user)
+        session.flush()
+        pomodoros = [
+            PomodoroSession(
+                user_id=user.id, work_minutes=25, break_minutes=5, start_time=start
+            )
+            for start in start_times
+        ]
+        session.add_all(pomodoros)
+        session.commit()
+        return [pomodoro.id for pomodoro in pomodoros]
+
+
+def end_times(session_ids: list) -> list:
+    """Get the end times of sessions in the given order."""
+    for session in get_db_session():
+        rows = {
+            p.id: p.end_time
+            for p in session.query(PomodoroSession).filter(
+                PomodoroSession.id.in_(session_ids)
+            )
+        }
+        return [rows[session_id] for session_id in session_ids]
+
+
+def test_sweep_follows_each_users_midnight():
+    """Test that sessions close only once their user's local day ended."""
+    # 22:30 UTC is already the next day in Moscow, not yet in New York
+    now = datetime(2024, 7, 1, 22, 30)
+    moscow = create_sessions(
+        5001,
+        "Europe/Moscow",
+        [
+            datetime(2024, 7, 1, 20, 0),  # Before Moscow midnight (21:00 UTC)
+            datetime(2024, 7, 1, 21, 30),  # After it
+        ],
+    )
+    new_york = create_sessions(
+        5002,
+        "America/New_York",
+        [
+            datetime(2024, 7, 1, 3, 0),  # Before New York midnight (04:00 UTC)
+            datetime(2024, 7, 1, 20, 0),  # After it
+            datetime(2024, 6, 30, 12, 0),  # Still armed by a timer
+        ],
+    )
+    for session in get_db_session():
+        session.add(
+            PendingTimer(
+                user_id=5002,
+                chat_id=5002,
+                phase="work",
+                deadline=now,
+                session_id=new_york[2],
+                break_minutes=5,
+            )
+        )
+        session.commit()
+
+    sweeper = SessionSweeper(batch_size=1)
+
+    async def run():
+        closed = await sweeper.sweep(now)
+        again = await sweeper.sweep(now)
+        await async_engine.dispose()
+        return closed, again
+
+    # Open sessions of other tests share the database
+    closed, again = asyncio.run(run())
+    assert closed >= 2
+    assert again == 0
+    assert end_times(moscow) == [now, None]
+    assert end_times(new_york) == [now, None, None]
+    assert sweeper.closed == closed
+    assert sweeper.batches >= 2
@@ -0,0 +1,242 @@
+"""Tests for team timers of group chats."""
+
+import asyncio
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+from sqlalchemy import select, update
+
+from app.db.models import (
+    DailyStats,
+    PendingTimer,
+    PomodoroSession,
+    Team,
+    TeamMember,
+    User,
+    async_engine,
+    get_async_session,
+    init_db,
+)
+from app.services.scheduler import BREAK_PHASE, WORK_PHASE, TimerRecord
+from app.services.teams import DM_NOTIFY
+from app.services.timer import TimerService
+
+
+def group_update(chat_id: int, user_id: int) -> SimpleNamespace:
+    """Build a stand-in for an update from a group chat member."""
+    return SimpleNamespace(
+        effective_user=SimpleNamespace(
+            id=user_id, username=f"user{user_id}", first_name="Team", last_name=None
+        ),
+        effective_chat=SimpleNamespace(id=chat_id, type="supergroup"),
+        effective_message=SimpleNamespace(reply_text=AsyncMock()),
+    )
+
+
+def start_team(service: TimerService, chat_id: int, user_ids: list, notify: str):
+    """Start a team timer and let members join it, then fire the work period."""
+
+    async def run():
+        first, *others = user_ids
+        await service.start_team_timer(group_update(chat_id, first), 25, 5, notify)
+        for user_id in others:
+            await service.join_team(group_update(chat_id, user_id))
+        record = service.timers.get(chat_id)
+        # Let the work period end now, after the members joined
+        async with get_async_session() as session:
+            pending = await session.get(PendingTimer, chat_id)
+            record.deadline = time.time() - 1
+            pending.deadline = datetime.utcfromtimestamp(record.deadline)
+            await session.execute(
+                update(TeamMember)
+                .where(TeamMember.chat_id == chat_id)
+                .values(joined_at=pending.deadline - timedelta(minutes=1))
+            )
+            await session.commit()
+        service.timers.cancel(chat_id)
+        await service._fire_batch([record])
+        await service.completions.flush()
+
+    asyncio.run(run())
+
+
+def test_team_timer_fires_once_for_all_members():
+    """Test one group message and one bulk completion write for a team."""
+    init_db()
+    service = TimerService()
+    service.dispatcher = MagicMock()
+    chat_id = -100500
+
+    start_team(service, chat_id, [6001, 6002, 6003], notify="group")
+
+    async def check():
+        async with get_async_session() as session:
+            rows = await session.execute(
+                select(DailyStats.completed)
+                .join(User, User.id == DailyStats.user_id)
+                .where(User.telegram_id.in_([6001, 6002, 6003]))
+            )
+            completed = [count for (count,) in rows]
+        await async_engine.dispose()
+        return completed
+
+    assert asyncio.run(check()) == [1, 1, 1]
+    assert service.timers.get(chat_id).phase == BREAK_PHASE
+    assert service.completions.flushes == 1
+    service.dispatcher.send_message.assert_called_once()
+    assert service.dispatcher.send_message.call_args.args[0] == chat_id
+
+
+def test_team_timer_sends_direct_messages_and_members_can_leave():
+    """Test DM fan-out to each member and leaving and stopping a team."""
+    init_db()
+    service = TimerService()
+    service.dispatcher = MagicMock()
+    chat_id = -100600
+
+    start_team(service, chat_id, [6101, 6102, 6103, 6104], notify=DM_NOTIFY)
+    recipients = [call.args[0] for call in service.dispatcher.send_message.mock_calls]
+    assert sorted(recipients) == [6101, 6102, 6103, 6104]
+
+    async def leave_and_stop():
+        answer = await service.leave_team(group_update(chat_id, 6104))
+        async with get_async_session() as session:
+            left = await session.scalars(
+                select(TeamMember.user_id).where(TeamMember.chat_id == chat_id)
+            )
+            members = sorted(left)
+        await service.stop_team(group_update(chat_id, 6101))
+        async with get_async_session() as session:
+            team = await session.get(Team, chat_id)
+            pending = await session.get(PendingTimer, chat_id)
+        await service.completions.flush()
+        await async_engine.dispose()
+        return answer, members, team, pending
+
+    answer, members, team, pending = asyncio.run(leave_and_stop())
+    assert answer == "Ты вышел из команды."
+    assert members == [6101, 6102, 6103]
+    assert team is None and pending is None
+    assert chat_id not in service.timers
+
+
+def test_members_are_credited_from_joining_to_the_deadline():
+    """Test that a mid-round joiner gets only the rest of the round."""
+    init_db()
+    service = TimerService()
+    service.dispatcher = MagicMock()
+    chat_id = -100700
+
+    async def member_minutes():
+        async with get_async_session() as session:
+            rows = await session.execute(
+                select(TeamMember.user_id, PomodoroSession.work_minutes)
+                .join(PomodoroSession, PomodoroSession.id == TeamMember.session_id)
+                .where(TeamMember.chat_id == chat_id)
+                .order_by(TeamMember.user_id)
+            )
+            return [minutes for _, minutes in rows]
+
+    async def run():
+        await service.start_team_timer(group_update(chat_id, 6301), 25, 5)
+        # Ten minutes of the round are left when the second member joins
+        service.timers.get(chat_id).deadline = time.time() + 10 * 60
+        await service.join_team(group_update(chat_id, 6302))
+        joined = await member_minutes()
+        await service.start_team_timer(group_update(chat_id, 6301), 30, 5)
+        next_round = await member_minutes()
+        await async_engine.dispose()
+        return joined, next_round
+
+    joined, next_round = asyncio.run(run())
+    assert joined == [25, 10]
+    assert next_round == [30, 30]
+
+
+def test_member_joining_at_the_end_of_a_round_works_from_the_next():
+    """Test that the last half minute of a round is not credited to a joiner."""
+    init_db()
+    service = TimerService()
+    service.dispatcher = MagicMock()
+    chat_id = -100800
+
+    async def run():
+        await service.start_team_timer(group_update(chat_id, 6401), 25, 5)
+        record = service.timers.get(chat_id)
+        # Twenty seconds of the round are left when the second member joins
+        async with get_async_session() as session:
+            pending = await session.get(PendingTimer, chat_id)
+            record.deadline = time.time() + 20
+            pending.deadline = datetime.utcfromtimestamp(record.deadline)
+            await session.commit()
+        answer = await service.join_team(group_update(chat_id, 6402))
+        async with get_async_session() as session:
+            work_minutes = await session.scalar(
+                select(PomodoroSession.work_minutes)
+                .join(TeamMember, TeamMember.session_id == PomodoroSession.id)
+                .where(TeamMember.user_id == 6402)
+            )
+
+        service.timers.cancel(chat_id)
+        await service._fire_batch([record])
+        await service.completions.flush()
+        async with get_async_session() as session:
+            rows = await session.execute(
+                select(User.telegram_id, DailyStats.completed)
+                .join(DailyStats, DailyStats.user_id == User.id)
+                .where(User.telegram_id.in_([6401, 6402]))
+            )
+            completed = dict(rows.all())
+        await async_engine.dispose()
+        return answer, work_minutes, completed
+
+    answer, work_minutes, completed = asyncio.run(run())
+    assert "следующего" in answer
+    assert work_minutes == 25
+    assert completed == {6401: 1}
+    text = service.dispatcher.send_message.call_args_list[0].args[1]
+    assert text.endswith("участникам: 1")
+
+
+def test_team_timer_requires_a_group_chat():
+    """Test that private chats cannot start team timers."""
+    service = TimerService()
+    update = group_update(777, 777)
+    update.effective_chat.type = "private"
+
+    asyncio.run(service.start_team_timer(update, 25, 5))
+    assert 777 not in service.timers
+    assert "группах" in update.effective_message.reply_text.call_args.args[0]
+
+
+def test_team_stop_in_a_private_chat_keeps_the_personal_timer():
+    """Test that /team_stop cannot stop the timer keyed by the user's own ID."""
+    init_db()
+    service = TimerService()
+    update = group_update(6201, 6201)
+    update.effective_chat.type = "private"
+    record = TimerRecord(
+        deadline=time.time() + 600,
+        user_id=6201,
+        chat_id=6201,
+        phase=WORK_PHASE,
+        break_minutes=5,
+    )
+
+    async def run():
+        async with get_async_session() as session:
+            await service._save_pending(session, record)
+            await session.commit()
+        service.timers.schedule(record)
+        await service.stop_team(update)
+        async with get_async_session() as session:
+            pending = await session.get(PendingTimer, 6201)
+        await async_engine.dispose()
+        return pending
+
+    pending = asyncio.run(run())
+    assert pending is not None
+    assert service.timers.get(6201) is record
+    assert "группах" in update.effective_message.reply_text.call_args.args[0]
@@ -0,0 +1,132 @@
+"""Tests for concurrent update processing with per-user ordering."""
+
+import asyncio
+
+from telegram import Chat, Message, Update, User
+
+from app.services.update_processor import PerUserUpdateProcessor, update_user_id
+
+
+def message_update(update_id: int, user_id: int) -> Update:
+    """Build a private message update from a user."""
+    user = User(id=user_id, first_name=f"User{user_id}", is_bot=False)
+    message = Message(
+        message_id=update_id,
+        date=None,
+        chat=Chat(id=user_id, type=Chat.PRIVATE),
+        from_user=user,
+        text="/start",
+    )
+    return Update(update_id=update_id, message=message)
+
+
+def test_update_user_id():
+    """Test that updates are keyed on their user."""
+    assert update_user_id(message_update(1, 42)) == 42
+    assert update_user_id(Update(update_id=2)) is None
+    assert update_user_id("not an update") is None
+
+
+def test_updates_of_a_user_run_one_at_a_time_and_in_order():
+    """Test that a user's updates never overlap and keep their order."""
+
+    async def run():
+        processor = PerUserUpdateProcessor(16)
+        running = {}
+        overlaps = []
+        processed = []
+
+        async def handle(update_id: int, user_id: int):
+            if running.get(user_id):
+                overlaps.append(user_id)
+            running[user_id] = True
+            await asyncio.sleep(0.001 * (update_id % 3))
+            processed.append((user_id, update_id))
+            running[user_id] = False
+
+        tasks = []
+        update_id = 0
+        for _ in range(5):
+            for user_id in range(4):
+                update_id += 1
+                update = message_update(update_id, user_id)
+                tasks.append(
+                    asyncio.create_task(
+                        processor.process_update(update, handle(update_id, user_id))
+                    )
+                )
+        await asyncio.gather(*tasks)
+        return processor, overlaps, processed
+
+    processor, overlaps, processed = asyncio.run(run())
+    assert overlaps == []
+    for user_id in range(4):
+        ids = [update_id for user, update_id in processed if user == user_id]
+        assert ids == sorted(ids)
+        assert len(ids) == 5
+    assert processor.active_users == 0
+
+
+def test_different_users_run_concurrently():
+    """Test that a slow user does not hold back other users."""
+
+    async def run():
+        processor = PerUserUpdateProcessor(16)
+        release = asyncio.Event()
+        processed = []
+
+        async def slow():
+            await release.wait()
+            processed.append(1)
+
+        async def fast():
+            processed.append(2)
+
+        slow_task = asyncio.create_task(
+            processor.process_update(message_update(1, 1), slow())
+        )
+        await asyncio.sleep(0)
+        await processor.process_update(message_update(2, 2), fast())
+        assert processed == [2]
+        assert processor.active_users == 1
+        release.set()
+        await slow_task
+        return processed
+
+    assert asyncio.run(run()) == [2, 1]
+
+
+def test_backlog_of_a_user_leaves_slots_to_others():
+    """Test that updates waiting for their user's turn hold no slot."""
+
+    async def run():
+        processor = PerUserUpdateProcessor(2)
+        release = asyncio.Event()
+        started = []
+        processed = []
+
+        async def slow(update_id: int):
+            started.append(update_id)
+            await release.wait()
+            processed.append(update_id)
+
+        async def fast():
+            processed.append(6)
+
+        backlog = [
+            asyncio.create_task(
+                processor.process_update(message_update(update_id, 1), slow(update_id))
+            )
+            for update_id in range(1, 6)
+        ]
+        await asyncio.sleep(0)
+        # Four updates of user 1 are waiting, yet user 2 gets a slot at once
+        await asyncio.wait_for(
+            processor.process_update(message_update(6, 2), fast()), timeout=1
+        )
+        assert started == [1]
+        release.set()
+        await asyncio.gather(*backlog)
+        return processed
+
+    assert asyncio.run(run()) == [6, 1, 2, 3, 4, 5]
@@ -0,0 +1,86 @@
+"""Tests for the write-behind completion buffer."""
+
+import asyncio
+from datetime import datetime
+
+from app.db.models import (
+    DailyStats,
+    PomodoroSession,
+    User,
+    async_engine,
+    get_db_session,
+    init_db,
+)
+from app.services.write_behind import CompletionBuffer
+
+
+def create_sessions(telegram_id: int, count: int) -> list:
+    """Create a user with ``count`` pomodoro sessions and return their ids."""
+    init_db()
+    for session in get_db_session():
+        user = User(telegram_id=telegram_id, first_name="Buffer")
+        session.add(user)
+        session.flush()
+        pomodoros = [
+            PomodoroSession(user_id=user.id, work_minutes=25, break_minutes=5)
+            for _ in range(count)
+        ]
+        session.add_all(pomodoros)
+        session.commit()
+        return [pomodoro.id for pomodoro in pomodoros]
+
+
+def test_flush_writes_all_events_in_one_batch():
+    """Test that completions, daily counters and session ends are written."""
+    session_ids = create_sessions(4001, 3)
+    completed_at = datetime(2024, 6, 1, 12, 0)
+    buffer = CompletionBuffer()
+
+    async def run():
+        buffer.add_completion(session_ids[0], completed_at)
+        buffer.add_completion(session_ids[0], completed_at)
+        buffer.add_completion(session_ids[1], completed_at)
+        buffer.end_session(session_ids[2], completed_at)
+        assert buffer.queue_depth == 4
+        await buffer.flush()
+        await async_engine.dispose()
+
+    asyncio.run(run())
+    assert buffer.queue_depth == 0
+    assert buffer.flushes == 1
+    assert buffer.flushed_events == 4
+
+    for session in get_db_session():
+        rows = {
+            p.id: p
+            for p in session.query(PomodoroSession).filter(
+                PomodoroSession.id.in_(session_ids)
+            )
+        }
+        assert [rows[i].completed for i in session_ids] == [2, 1, 0]
+        assert rows[session_ids[2]].end_time == completed_at
+        assert rows[session_ids[0]].end_time is None
+
+        stats = session.get(
+            DailyStats, (rows[session_ids[0]].user_id, completed_at.date())
+        )
+        assert (stats.completed, stats.focus_minutes) == (3, 75)
+
+
+def test_full_buffer_triggers_early_flush():
+    """Test that reaching max_events flushes before the interval elapses."""
+    session_ids = create_sessions(4002, 2)
+    buffer = CompletionBuffer(flush_interval_ms=60_000, max_events=2)
+
+    async def run():
+        buffer.start()
+        for session_id in session_ids:
+            buffer.add_completion(session_id)
+        await asyncio.sleep(0.2)
+        depth = buffer.queue_depth
+        await buffer.stop()
+        await async_engine.dispose()
+        return depth
+
+    assert asyncio.run(run()) == 0
+    assert buffer.flushes == 1